@@ -8,12 +8,24 @@ from sqlmodel.ext.asyncio.session import AsyncSession
 import logging
 import logfire
 
-from api import status, summarize_and_send_to_group_api, webhook
+from agents import agent_registry, llm_gateway
+from api import jobs, metrics, status, summarize_and_send_to_group_api, webhook
 import models  # noqa
+from models import group_settings, known_jids, upsert_stats
 from config import Settings
+from dedupe import create_dedupe
+from forwarder import Forwarder
+from ingest import IngestQueue, MessageWriter, message_pipeline, triage_stats
 from whatsapp import WhatsAppClient
 from whatsapp.init_groups import gather_groups
 from scheduler import DailySummaryScheduler
+from summarize_and_send_to_groups import (
+    SummaryJobRunner,
+    summary_batcher,
+    summary_cache,
+    summary_flights,
+    summary_pipeline,
+)
 
 settings = Settings()  # pyright: ignore [reportCallIssue]
 
@@ -50,17 +62,115 @@ async def lifespan(app: FastAPI):
         engine, expire_on_commit=False, class_=AsyncSession
     )
 
+    known_jids.configure(settings.known_jid_cache_size)
+    app.state.known_jids = known_jids
+    group_settings.configure(settings.group_settings_ttl)
+    group_settings.start(settings.listen_db_uri)
+    app.state.group_settings = group_settings
+
     asyncio.create_task(gather_groups(engine, app.state.whatsapp))
 
     app.state.db_engine = engine
     app.state.async_session = async_session
+    app.state.upsert_stats = upsert_stats
+    app.state.webhook_triage = triage_stats
+
+    app.state.dedupe = create_dedupe(settings, engine)
+    app.state.dedupe.start()
+
+    app.state.forwarder = Forwarder(
+        concurrency=settings.forward_concurrency,
+        queue_size=settings.forward_queue_size,
+        batch_size=settings.forward_batch_size,
+        batch_urls=settings.forward_batch_urls,
+        timeout=settings.forward_timeout,
+        max_attempts=settings.forward_max_attempts,
+    )
+
+    app.state.message_writer = MessageWriter(
+        async_session,
+        batch_size=settings.message_writer_batch_size,
+        flush_interval=settings.message_writer_flush_interval,
+    )
+    app.state.message_writer.start()
+
+    # Secret-word summaries run in the background, reported at GET /jobs/{id}
+    app.state.summary_jobs = None
+    if settings.monitor_phone:
+        app.state.summary_jobs = SummaryJobRunner(
+            async_session,
+            app.state.whatsapp,
+            settings.monitor_phone,
+            concurrency=settings.summary_concurrency,
+        )
+        app.state.summary_jobs.start()
+
+    pipeline = message_pipeline(
+        async_session,
+        app.state.whatsapp,
+        settings,
+        app.state.message_writer,
+        app.state.dedupe,
+        app.state.forwarder,
+        app.state.summary_jobs,
+    )
+    app.state.ingest_queue = IngestQueue(
+        pipeline,
+        workers=settings.ingest_workers,
+        maxsize=settings.ingest_queue_size,
+    )
+    app.state.ingest_queue.start()
+    # /webhook/batch gets its own workers, so backfills neither wait behind nor
+    # crowd out live webhook traffic
+    app.state.batch_ingest_queue = IngestQueue(
+        pipeline,
+        workers=settings.ingest_batch_workers,
+        maxsize=settings.ingest_queue_size,
+    )
+    app.state.batch_ingest_queue.start()
+
+    summary_pipeline.configure(
+        chunk_tokens=settings.summary_chunk_tokens,
+        overlap=settings.summary_chunk_overlap,
+        fan_out=settings.summary_fan_out,
+    )
+    app.state.summary_pipeline = summary_pipeline
+    summary_batcher.configure(
+        max_tokens=settings.summary_batch_tokens,
+        wait=settings.summary_batch_wait,
+    )
+    app.state.summary_batcher = summary_batcher
+    app.state.summary_cache = summary_cache
+    summary_flights.configure(
+        engine if settings.summary_single_flight == "postgres" else None
+    )
+    app.state.summary_flights = summary_flights
+
+    # Spam checks, secret-word and daily summaries share one LLM budget
+    llm_gateway.configure(
+        concurrency=settings.llm_concurrency,
+        tokens_per_minute=settings.llm_tokens_per_minute,
+        aging=settings.llm_priority_aging,
+    )
+    app.state.llm_gateway = llm_gateway
+    agent_registry.configure(
+        settings.llm_model,
+        api_key=settings.anthropic_api_key,
+        max_connections=settings.llm_max_connections,
+    )
+    if settings.llm_warm_up:
+        await agent_registry.warm_up()
+    app.state.llm_agents = agent_registry
 
     # Initialize daily summary scheduler if monitor phone is configured
     if hasattr(settings, 'monitor_phone') and settings.monitor_phone:
         app.state.scheduler = DailySummaryScheduler(
             async_session,
             app.state.whatsapp,
-            settings.monitor_phone
+            settings.monitor_phone,
+            concurrency=settings.summary_concurrency,
+            partial_interval=settings.summary_partial_interval,
+            partial_min_messages=settings.summary_partial_min_messages,
         )
         app.state.scheduler.start()
     try:
@@ -69,6 +179,16 @@ async def lifespan(app: FastAPI):
         # Stop scheduler if it exists
         if hasattr(app.state, 'scheduler'):
             app.state.scheduler.stop()
+        await app.state.ingest_queue.stop()
+        await app.state.batch_ingest_queue.stop()
+        if app.state.summary_jobs is not None:
+            await app.state.summary_jobs.stop()
+        await app.state.message_writer.stop()
+        await app.state.dedupe.stop()
+        await app.state.forwarder.stop()
+        await group_settings.stop()
+        await summary_flights.close()
+        await agent_registry.close()
         await engine.dispose()
 
 
@@ -85,6 +205,8 @@ logfire.instrument_system_metrics()
 app.include_router(webhook.router)
 app.include_router(status.router)
 app.include_router(summarize_and_send_to_group_api.router)
+app.include_router(metrics.router)
+app.include_router(jobs.router)
 
 if __name__ == "__main__":
     import uvicorn
@@ -32,6 +32,9 @@ def include_object(object, name, type_, reflected, compare_to):
     # Exclude any table that starts with 'whatsmeow_'
     if type_ == "table" and name.startswith("whatsmeow_"):
         return False
+    # Unlogged dedupe claims, managed with raw SQL by dedupe.PostgresDedupe
+    if type_ == "table" and name == "message_claim":
+        return False
     return True
 
 
@@ -0,0 +1,49 @@
+"""group_settings_notify_trigger
+
+Revision ID: c3f1a9d2e7b4
+Revises: remove_kb_and_community_keys
+Create Date: 2026-10-17 19:33:44.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c3f1a9d2e7b4"
+down_revision: Union[str, None] = "remove_kb_and_community_keys"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Notify listeners (the in-process group settings cache) when routing flags change
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION notify_group_settings_changed() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                PERFORM pg_notify('group_settings_changed', OLD.group_jid);
+            ELSE
+                PERFORM pg_notify('group_settings_changed', NEW.group_jid);
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER group_settings_changed
+        AFTER INSERT OR DELETE OR UPDATE OF managed, forward_url, notify_on_spam
+        ON "group"
+        FOR EACH ROW EXECUTE FUNCTION notify_group_settings_changed();
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute('DROP TRIGGER IF EXISTS group_settings_changed ON "group";')
+    op.execute("DROP FUNCTION IF EXISTS notify_group_settings_changed();")
@@ -0,0 +1,35 @@
+"""message_claim
+
+Revision ID: 7b2e4c9a1f05
+Revises: c3f1a9d2e7b4
+Create Date: 2026-10-17 20:48:33.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "7b2e4c9a1f05"
+down_revision: Union[str, None] = "c3f1a9d2e7b4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Short-lived dedupe claims (see dedupe.PostgresDedupe). Unlogged: losing them
+    # on a crash only means a message may be handled twice, and it skips WAL writes.
+    op.execute(
+        """
+        CREATE UNLOGGED TABLE message_claim (
+            message_id VARCHAR PRIMARY KEY,
+            claimed_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        );
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS message_claim;")
@@ -0,0 +1,58 @@
+"""message_group_timestamp_indexes
+
+Revision ID: 9d4a6e2b8c13
+Revises: 7b2e4c9a1f05
+Create Date: 2026-10-17 23:07:31.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9d4a6e2b8c13"
+down_revision: Union[str, None] = "7b2e4c9a1f05"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY can't run inside a transaction, and keeps message writable while building
+    with op.get_context().autocommit_block():
+        # Per-group transcript reads: group_jid = ? AND timestamp >= ? ORDER BY timestamp
+        op.create_index(
+            "idx_message_group_jid_timestamp",
+            "message",
+            ["group_jid", "timestamp"],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        # Time-range scans across all groups; tiny since rows arrive in timestamp order
+        op.create_index(
+            "idx_message_timestamp_brin",
+            "message",
+            ["timestamp"],
+            unique=False,
+            postgresql_using="brin",
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "idx_message_timestamp_brin",
+            table_name="message",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            "idx_message_group_jid_timestamp",
+            table_name="message",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
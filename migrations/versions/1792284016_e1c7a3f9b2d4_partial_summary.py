@@ -0,0 +1,41 @@
+"""partial_summary
+
+Revision ID: e1c7a3f9b2d4
+Revises: 9d4a6e2b8c13
+Create Date: 2026-10-17 23:40:16.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e1c7a3f9b2d4"
+down_revision: Union[str, None] = "9d4a6e2b8c13"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "partial_summary",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("group_jid", sa.String(length=255), nullable=False),
+        sa.Column("start_time", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("end_time", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("message_count", sa.Integer(), nullable=False),
+        sa.Column("text", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["group_jid"], ["group.group_jid"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint(
+            "group_jid", "start_time", name="uq_partial_summary_group_jid_start_time"
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("partial_summary")
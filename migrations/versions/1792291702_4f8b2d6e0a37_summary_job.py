@@ -0,0 +1,53 @@
+"""summary_job
+
+Revision ID: 4f8b2d6e0a37
+Revises: e1c7a3f9b2d4
+Create Date: 2026-10-18 01:48:22.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "4f8b2d6e0a37"
+down_revision: Union[str, None] = "e1c7a3f9b2d4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "summary_job",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("kind", sa.String(length=32), nullable=False),
+        sa.Column("status", sa.String(length=16), nullable=False),
+        sa.Column("requested_by", sa.String(length=255), nullable=True),
+        sa.Column("groups_total", sa.Integer(), nullable=False),
+        sa.Column("groups_done", sa.Integer(), nullable=False),
+        sa.Column("groups_summarized", sa.Integer(), nullable=False),
+        sa.Column("error", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_summary_job_status"), "summary_job", ["status"], unique=False
+    )
+    op.create_index(
+        "ux_summary_job_active_kind",
+        "summary_job",
+        ["kind"],
+        unique=True,
+        postgresql_where=sa.text("status IN ('pending', 'running')"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ux_summary_job_active_kind", table_name="summary_job")
+    op.drop_index(op.f("ix_summary_job_status"), table_name="summary_job")
+    op.drop_table("summary_job")
@@ -0,0 +1,14 @@
+from .gateway import LLMGateway, Priority, current_priority, llm_gateway, llm_priority
+from .registry import DEFAULT_MODEL, AgentFactory, AgentRegistry, agent_registry
+
+__all__ = [
+    "DEFAULT_MODEL",
+    "AgentFactory",
+    "AgentRegistry",
+    "LLMGateway",
+    "Priority",
+    "agent_registry",
+    "current_priority",
+    "llm_gateway",
+    "llm_priority",
+]
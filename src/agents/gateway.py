@@ -0,0 +1,206 @@
+import asyncio
+import itertools
+import logging
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any, AsyncIterator, Dict, Iterator, List
+
+from utils.metrics import LatencyTracker
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    """LLM request classes, most urgent first"""
+
+    INTERACTIVE = 0  # secret-word summaries someone is waiting for
+    SPAM = 1  # spam checks of incoming messages
+    BATCH = 2  # daily summaries and partial roll-ups
+
+
+_priority: ContextVar[Priority] = ContextVar("llm_priority", default=Priority.BATCH)
+
+
+@contextmanager
+def llm_priority(priority: Priority) -> Iterator[None]:
+    """Run the LLM calls made within the block (and tasks it starts) at a priority"""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> Priority:
+    return _priority.get()
+
+
+@dataclass
+class _Waiter:
+    priority: Priority
+    tokens: int
+    seq: int
+    enqueued: float
+    granted: asyncio.Future = field(repr=False)
+
+
+class Grant:
+    """A granted slot; report the tokens the call really used with `used()`"""
+
+    def __init__(self, gateway: "LLMGateway", tokens: int):
+        self._gateway = gateway
+        self.tokens = tokens
+
+    def used(self, tokens: int) -> None:
+        self._gateway._debit(tokens - self.tokens)
+        self.tokens = tokens
+
+
+class LLMGateway:
+    """
+    Admission control for every model call in the process.
+
+    Calls wait for one of `concurrency` slots and, if a token budget is set, for
+    their estimated tokens to be available in a bucket refilled at
+    `tokens_per_minute`. Waiting calls are admitted by priority class, then in
+    arrival order; a call is promoted one class for every `aging` seconds it
+    waits, so a steady stream of urgent calls cannot starve the daily batch.
+    """
+
+    def __init__(self):
+        self.configure()
+
+    def configure(
+        self,
+        concurrency: int = 8,
+        tokens_per_minute: int = 0,
+        aging: float = 30,
+    ) -> None:
+        """
+        Set the budget, dropping the counters.
+        :param concurrency: Max model calls in flight
+        :param tokens_per_minute: Token budget, 0 for no limit
+        :param aging: Seconds of waiting that promote a call by one priority class
+        """
+        self.concurrency = concurrency
+        self.tokens_per_minute = tokens_per_minute
+        self.aging = aging
+        self._in_flight = 0
+        self._tokens = float(tokens_per_minute)
+        self._refilled = time.monotonic()
+        self._waiters: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._timer: asyncio.TimerHandle | None = None
+        self.queue_wait = {p: LatencyTracker() for p in Priority}
+        self.granted = {p: 0 for p in Priority}
+        self.promoted = 0
+
+    @asynccontextmanager
+    async def slot(
+        self, tokens: int, priority: Priority | None = None
+    ) -> AsyncIterator[Grant]:
+        """
+        Hold a call slot for the duration of a model call.
+        :param tokens: Estimated tokens of the call
+        :param priority: Request class, taken from `llm_priority` if not given [Optional]
+        """
+        priority = current_priority() if priority is None else priority
+        await self._acquire(priority, tokens)
+        try:
+            yield Grant(self, tokens)
+        finally:
+            self._in_flight -= 1
+            self._dispatch()
+
+    async def _acquire(self, priority: Priority, tokens: int) -> None:
+        waiter = _Waiter(
+            priority,
+            tokens,
+            next(self._seq),
+            time.monotonic(),
+            asyncio.get_running_loop().create_future(),
+        )
+        self._waiters.append(waiter)
+        self._dispatch()
+        try:
+            await waiter.granted
+        except asyncio.CancelledError:
+            if waiter.granted.done() and not waiter.granted.cancelled():
+                # Granted just as we were cancelled; hand the slot on
+                self._in_flight -= 1
+            elif waiter in self._waiters:
+                # Unless a release already dispatched past it
+                self._waiters.remove(waiter)
+            self._dispatch()
+            raise
+
+    def _rank(self, waiter: _Waiter, now: float) -> tuple:
+        promotion = int((now - waiter.enqueued) / self.aging) if self.aging else 0
+        return (max(0, waiter.priority - promotion), waiter.seq)
+
+    def _refill(self, now: float) -> None:
+        if self.tokens_per_minute:
+            self._tokens = min(
+                self.tokens_per_minute,
+                self._tokens + (now - self._refilled) * self.tokens_per_minute / 60,
+            )
+        self._refilled = now
+
+    def _dispatch(self) -> None:
+        now = time.monotonic()
+        self._refill(now)
+        while self._waiters and self._in_flight < self.concurrency:
+            waiter = min(self._waiters, key=lambda w: self._rank(w, now))
+            if waiter.granted.done():
+                # Cancelled, its caller is about to clean up
+                self._waiters.remove(waiter)
+                continue
+            # A call larger than the whole budget only waits for a full bucket
+            needed = min(waiter.tokens, self.tokens_per_minute)
+            if self.tokens_per_minute and self._tokens < needed:
+                # The head of the queue waits for the bucket, nobody overtakes it
+                self._schedule((needed - self._tokens) * 60 / self.tokens_per_minute)
+                return
+            self._waiters.remove(waiter)
+            self._in_flight += 1
+            self._tokens -= waiter.tokens
+            self.granted[waiter.priority] += 1
+            if self._rank(waiter, now)[0] < waiter.priority:
+                self.promoted += 1
+            self.queue_wait[waiter.priority].observe(now - waiter.enqueued)
+            waiter.granted.set_result(None)
+
+    def _schedule(self, delay: float) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+
+    def _debit(self, tokens: int) -> None:
+        if self.tokens_per_minute:
+            self._refill(time.monotonic())
+            self._tokens -= tokens
+            self._dispatch()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "concurrency": self.concurrency,
+            "in_flight": self._in_flight,
+            "tokens_per_minute": self.tokens_per_minute,
+            "tokens_available": int(self._tokens) if self.tokens_per_minute else None,
+            "promoted": self.promoted,
+            "classes": {
+                p.name.lower(): {
+                    "waiting": sum(1 for w in self._waiters if w.priority == p),
+                    "granted": self.granted[p],
+                    "queue_wait": self.queue_wait[p].snapshot(),
+                }
+                for p in Priority
+            },
+        }
+
+
+# Shared by every agent in the process
+llm_gateway = LLMGateway()
@@ -0,0 +1,169 @@
+import logging
+import time
+from typing import Any, Callable, Dict
+
+import httpx
+from pydantic_ai import Agent
+from pydantic_ai.agent import AgentRunResult
+from pydantic_ai.models import Model, infer_model
+
+from utils.metrics import LatencyTracker
+from utils.tokens import estimate_tokens
+from .gateway import LLMGateway, Priority, llm_gateway
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "anthropic:claude-4-sonnet-20250514"
+
+AgentFactory = Callable[[Model], Agent]
+
+
+class AgentRegistry:
+    """
+    Process-wide, pre-built pydantic-ai agents.
+
+    Modules register a factory per agent at import time; the agents are built
+    once (at warm-up or first use) on a single model whose provider shares one
+    pooled HTTP client, so calls reuse prompts, clients and TLS connections.
+    Every call is admitted through an `LLMGateway`, and each agent's call
+    latency is tracked for /metrics.
+    """
+
+    def __init__(self, gateway: LLMGateway = llm_gateway):
+        self.gateway = gateway
+        self._factories: Dict[str, AgentFactory] = {}
+        self.configure()
+
+    def configure(
+        self,
+        model: Model | str = DEFAULT_MODEL,
+        api_key: str | None = None,
+        max_connections: int = 20,
+        timeout: float = 600,
+    ) -> None:
+        """
+        Set the model every agent runs on, dropping agents built so far.
+        :param model: A model instance, or a "provider:model" name
+        :param api_key: Provider API key, read from the environment if not given [Optional]
+        :param max_connections: Size of the shared HTTP connection pool
+        :param timeout: Seconds to wait for a model response
+        """
+        self._model_spec = model
+        self._api_key = api_key
+        self._max_connections = max_connections
+        self._timeout = timeout
+        self._model: Model | None = None
+        self._http_client: httpx.AsyncClient | None = None
+        self._agents: Dict[str, Agent] = {}
+        self._latency: Dict[str, LatencyTracker] = {}
+        self._errors: Dict[str, int] = {}
+
+    def register(self, name: str, factory: AgentFactory) -> None:
+        """Register how to build an agent, given the shared model"""
+        self._factories[name] = factory
+        self._agents.pop(name, None)
+
+    @property
+    def model(self) -> Model:
+        if self._model is None:
+            self._model = self._build_model()
+        return self._model
+
+    def _build_model(self) -> Model:
+        spec = self._model_spec
+        if isinstance(spec, Model):
+            return spec
+        provider, _, model_name = spec.partition(":")
+        if provider != "anthropic":
+            # Other providers keep pydantic-ai's own cached client
+            return infer_model(spec)
+
+        from pydantic_ai.models.anthropic import AnthropicModel
+        from pydantic_ai.providers.anthropic import AnthropicProvider
+
+        self._http_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(self._timeout, connect=5),
+            limits=httpx.Limits(
+                max_connections=self._max_connections,
+                max_keepalive_connections=self._max_connections,
+            ),
+        )
+        return AnthropicModel(
+            model_name,
+            provider=AnthropicProvider(
+                api_key=self._api_key, http_client=self._http_client
+            ),
+        )
+
+    def get(self, name: str) -> Agent:
+        agent = self._agents.get(name)
+        if agent is None:
+            agent = self._agents[name] = self._factories[name](self.model)
+        return agent
+
+    async def run(
+        self,
+        name: str,
+        prompt: str,
+        priority: Priority | None = None,
+        **kwargs: Any,
+    ) -> AgentRunResult:
+        """
+        Run a registered agent once the gateway admits it, timing the call.
+        :param name: The agent to run
+        :param prompt: The user prompt
+        :param priority: Request class, taken from `llm_priority` if not given [Optional]
+        :param kwargs: Passed on to `Agent.run` (e.g. deps)
+        """
+        agent = self.get(name)
+        latency = self._latency.setdefault(name, LatencyTracker())
+        async with self.gateway.slot(estimate_tokens(prompt), priority) as grant:
+            started = time.perf_counter()
+            try:
+                result = await agent.run(prompt, **kwargs)
+            except Exception:
+                self._errors[name] = self._errors.get(name, 0) + 1
+                raise
+            finally:
+                latency.since(started)
+            grant.used(result.usage().total_tokens or grant.tokens)
+            return result
+
+    async def warm_up(self) -> None:
+        """Build all registered agents and open a connection to the provider"""
+        for name in self._factories:
+            self.get(name)
+        if self._http_client is None:
+            return
+        try:
+            # Any response will do; the TLS connection stays in the pool
+            await self._http_client.head("https://api.anthropic.com/")
+        except httpx.HTTPError as e:
+            logger.warning(f"LLM provider warm-up failed: {e}")
+        logger.info(f"Warmed up {len(self._agents)} LLM agents")
+
+    async def close(self) -> None:
+        if self._http_client is not None:
+            await self._http_client.aclose()
+        self.configure(
+            self._model_spec, self._api_key, self._max_connections, self._timeout
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "model": self.model.model_name if self._model else str(self._model_spec),
+            "agents": {
+                name: {
+                    "built": name in self._agents,
+                    "errors": self._errors.get(name, 0),
+                    "latency": self._latency[name].snapshot()
+                    if name in self._latency
+                    else {"count": 0},
+                }
+                for name in self._factories
+            },
+        }
+
+
+# Shared by every module that calls the model
+agent_registry = AgentRegistry()
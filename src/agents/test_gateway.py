@@ -0,0 +1,140 @@
+import asyncio
+import time
+
+import pytest
+
+from agents import LLMGateway, Priority, llm_priority
+
+
+async def hold(gateway: LLMGateway, release: asyncio.Event, tokens: int = 1):
+    async with gateway.slot(tokens, Priority.BATCH):
+        await release.wait()
+
+
+@pytest.mark.asyncio
+async def test_waiting_calls_are_admitted_by_priority():
+    gateway = LLMGateway()
+    gateway.configure(concurrency=1)
+    release = asyncio.Event()
+    holder = asyncio.create_task(hold(gateway, release))
+    await asyncio.sleep(0)
+    order = []
+
+    async def call(priority: Priority, name: str):
+        async with gateway.slot(1, priority):
+            order.append(name)
+
+    waiters = [
+        asyncio.create_task(call(Priority.BATCH, "daily-1")),
+        asyncio.create_task(call(Priority.SPAM, "spam")),
+        asyncio.create_task(call(Priority.BATCH, "daily-2")),
+        asyncio.create_task(call(Priority.INTERACTIVE, "secret-word")),
+    ]
+    await asyncio.sleep(0.01)
+    assert gateway.stats()["classes"]["batch"]["waiting"] == 2
+
+    release.set()
+    await asyncio.gather(holder, *waiters)
+
+    assert order == ["secret-word", "spam", "daily-1", "daily-2"]
+    stats = gateway.stats()
+    assert stats["in_flight"] == 0
+    assert stats["classes"]["batch"]["granted"] == 3
+    assert stats["classes"]["interactive"]["queue_wait"]["count"] == 1
+
+
+@pytest.mark.asyncio
+async def test_long_waiting_calls_are_promoted():
+    gateway = LLMGateway()
+    gateway.configure(concurrency=1, aging=0.05)
+    release = asyncio.Event()
+    holder = asyncio.create_task(hold(gateway, release))
+    await asyncio.sleep(0)
+    order = []
+
+    async def call(priority: Priority, name: str):
+        async with gateway.slot(1, priority):
+            order.append(name)
+
+    daily = asyncio.create_task(call(Priority.BATCH, "daily"))
+    await asyncio.sleep(0.12)
+    spam = asyncio.create_task(call(Priority.SPAM, "spam"))
+    await asyncio.sleep(0)
+
+    release.set()
+    await asyncio.gather(holder, daily, spam)
+
+    assert order == ["daily", "spam"]
+    assert gateway.stats()["promoted"] == 1
+
+
+@pytest.mark.asyncio
+async def test_token_budget_delays_calls_until_refilled():
+    gateway = LLMGateway()
+    gateway.configure(concurrency=4, tokens_per_minute=600)  # 10 tokens a second
+
+    async with gateway.slot(500, Priority.BATCH) as grant:
+        grant.used(600)  # the estimate was low
+    assert gateway.stats()["tokens_available"] <= 0
+
+    started = time.monotonic()
+    async with gateway.slot(3, Priority.INTERACTIVE):
+        pass
+    assert time.monotonic() - started >= 0.25
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_gives_up_its_place():
+    gateway = LLMGateway()
+    gateway.configure(concurrency=1)
+    release = asyncio.Event()
+    holder = asyncio.create_task(hold(gateway, release))
+    await asyncio.sleep(0)
+
+    waiter = asyncio.create_task(hold(gateway, asyncio.Event()))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    await asyncio.gather(waiter, return_exceptions=True)
+
+    release.set()
+    await holder
+    async with gateway.slot(1, Priority.BATCH):
+        assert gateway.stats()["in_flight"] == 1
+    assert gateway.stats()["in_flight"] == 0
+    assert gateway.stats()["classes"]["batch"]["waiting"] == 0
+
+
+@pytest.mark.asyncio
+async def test_waiter_cancelled_while_a_slot_is_released():
+    gateway = LLMGateway()
+    gateway.configure(concurrency=1)
+    held = gateway.slot(1, Priority.BATCH)
+    await held.__aenter__()
+    waiter = asyncio.create_task(hold(gateway, asyncio.Event()))
+    await asyncio.sleep(0)
+
+    # The release dispatches past the cancelled waiter before it runs its cleanup
+    waiter.cancel()
+    await held.__aexit__(None, None, None)
+
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    assert gateway.stats()["in_flight"] == 0
+    assert gateway.stats()["classes"]["batch"]["waiting"] == 0
+
+
+@pytest.mark.asyncio
+async def test_priority_is_inherited_by_started_tasks():
+    gateway = LLMGateway()
+    seen = []
+
+    async def call():
+        async with gateway.slot(1):
+            seen.append(gateway.stats()["classes"]["interactive"]["granted"])
+
+    with llm_priority(Priority.INTERACTIVE):
+        await asyncio.gather(call(), call())
+    await call()
+
+    assert gateway.stats()["classes"]["interactive"]["granted"] == 2
+    assert gateway.stats()["classes"]["batch"]["granted"] == 1
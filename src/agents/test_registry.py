@@ -0,0 +1,85 @@
+import pytest
+from pydantic_ai import Agent, RunContext
+from pydantic_ai.models.test import TestModel
+
+from agents import AgentRegistry
+
+
+def greeter(model):
+    def instructions(ctx: RunContext[str]) -> str:
+        return f"Greet {ctx.deps}"
+
+    return Agent(model, deps_type=str, instructions=instructions, output_type=str)
+
+
+@pytest.mark.asyncio
+async def test_agents_are_built_once_and_reused():
+    registry = AgentRegistry()
+    registry.configure(TestModel(custom_output_text="hello"))
+    built = []
+
+    def factory(model):
+        built.append(model)
+        return greeter(model)
+
+    registry.register("greet", factory)
+
+    first = await registry.run("greet", "hi", deps="alice")
+    second = await registry.run("greet", "hi", deps="bob")
+
+    assert first.output == second.output == "hello"
+    assert len(built) == 1
+    assert registry.get("greet") is registry.get("greet")
+
+    stats = registry.stats()["agents"]["greet"]
+    assert stats["built"]
+    assert stats["latency"]["count"] == 2
+    assert stats["errors"] == 0
+
+
+@pytest.mark.asyncio
+async def test_reconfigure_rebuilds_agents_on_the_new_model():
+    registry = AgentRegistry()
+    registry.register("greet", greeter)
+    registry.configure(TestModel(custom_output_text="one"))
+    assert (await registry.run("greet", "hi", deps="a")).output == "one"
+
+    registry.configure(TestModel(custom_output_text="two"))
+    assert not registry.stats()["agents"]["greet"]["built"]
+    assert (await registry.run("greet", "hi", deps="a")).output == "two"
+
+
+@pytest.mark.asyncio
+async def test_warm_up_builds_every_agent_and_failures_are_counted():
+    registry = AgentRegistry()
+    registry.configure(TestModel())
+
+    def broken(model):
+        agent = greeter(model)
+
+        @agent.output_validator
+        def reject(output: str) -> str:
+            raise ValueError("nope")
+
+        return agent
+
+    registry.register("greet", greeter)
+    registry.register("broken", broken)
+    await registry.warm_up()
+    assert all(a["built"] for a in registry.stats()["agents"].values())
+
+    with pytest.raises(ValueError):
+        await registry.run("broken", "hi", deps="a")
+    assert registry.stats()["agents"]["broken"]["errors"] == 1
+    assert registry.stats()["agents"]["broken"]["latency"]["count"] == 1
+
+
+def test_anthropic_models_share_one_pooled_client():
+    registry = AgentRegistry()
+    registry.configure(
+        "anthropic:claude-4-sonnet-20250514", api_key="test", max_connections=7
+    )
+    registry.register("greet", greeter)
+
+    assert registry.get("greet").model is registry.model
+    assert registry.model.client._client is registry._http_client
@@ -4,6 +4,7 @@ from fastapi import Depends, Request
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from handler import MessageHandler
+from ingest import IngestQueue
 from whatsapp import WhatsAppClient
 from config import Settings
 
@@ -24,6 +25,16 @@ def get_whatsapp(request: Request) -> WhatsAppClient:
     return request.app.state.whatsapp
 
 
+def get_ingest_queue(request: Request) -> IngestQueue:
+    assert request.app.state.ingest_queue, "Ingest queue not initialized"
+    return request.app.state.ingest_queue
+
+
+def get_batch_ingest_queue(request: Request) -> IngestQueue:
+    assert request.app.state.batch_ingest_queue, "Batch ingest queue not initialized"
+    return request.app.state.batch_ingest_queue
+
+
 def get_settings(request: Request) -> Settings:
     assert request.app.state.settings, "Settings not initialized"
     return request.app.state.settings
@@ -33,5 +44,13 @@ async def get_handler(
     session: Annotated[AsyncSession, Depends(get_db_async_session)],
     whatsapp: Annotated[WhatsAppClient, Depends(get_whatsapp)],
     settings: Annotated[Settings, Depends(get_settings)],
+    request: Request,
 ) -> MessageHandler:
-    return MessageHandler(session, whatsapp, settings)
+    return MessageHandler(
+        session,
+        whatsapp,
+        settings,
+        dedupe=getattr(request.app.state, "dedupe", None),
+        forwarder=getattr(request.app.state, "forwarder", None),
+        summary_jobs=getattr(request.app.state, "summary_jobs", None),
+    )
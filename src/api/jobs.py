@@ -0,0 +1,21 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from models import SummaryJob
+from .deps import get_db_async_session
+
+router = APIRouter()
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(
+    job_id: int,
+    session: Annotated[AsyncSession, Depends(get_db_async_session)],
+) -> SummaryJob:
+    """Status and progress of a background summary job."""
+    job = await session.get(SummaryJob, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
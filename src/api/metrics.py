@@ -0,0 +1,36 @@
+from typing import Any, Dict
+
+from fastapi import APIRouter, Request
+
+router = APIRouter()
+
+# app.state attributes whose components expose a stats() snapshot
+METRIC_SOURCES = [
+    "webhook_triage",
+    "ingest_queue",
+    "batch_ingest_queue",
+    "message_writer",
+    "upsert_stats",
+    "known_jids",
+    "group_settings",
+    "dedupe",
+    "forwarder",
+    "scheduler",
+    "summary_pipeline",
+    "summary_batcher",
+    "summary_cache",
+    "summary_flights",
+    "summary_jobs",
+    "llm_agents",
+    "llm_gateway",
+]
+
+
+@router.get("/metrics")
+async def metrics(request: Request) -> Dict[str, Any]:
+    """Snapshot of in-process pipeline metrics (queue depths, latencies, counters)."""
+    return {
+        name: getattr(request.app.state, name).stats()
+        for name in METRIC_SOURCES
+        if getattr(request.app.state, name, None) is not None
+    }
@@ -0,0 +1,125 @@
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api import webhook
+from config import Settings
+from ingest import IngestQueue
+from models import GroupSettings, group_settings
+
+GROUP = "123456789-123456@g.us"
+
+
+def event(message_id: str, text: str = "hello", chat: str = GROUP) -> dict:
+    return {
+        "from": f"1234567890@s.whatsapp.net in {chat}",
+        "timestamp": "2025-01-01T00:00:00Z",
+        "message": {"id": message_id, "text": text},
+    }
+
+
+REACTION = {**event("m2"), "message": {"id": "m2"}, "reaction": {"id": "m1"}}
+STICKER = {**event("m4"), "message": {"id": "m4"}, "sticker": {"media_path": "/s"}}
+RECEIPT = {"event": "message.ack", "timestamp": "2025-01-01T00:00:00Z", "ids": ["m1"]}
+INVALID = {**event("m3"), "timestamp": "yesterday"}
+
+
+@pytest.fixture
+def client():
+    async def handle(payload):
+        pass
+
+    app = FastAPI()
+    app.include_router(webhook.router)
+    # No workers started, so nothing drains the queue
+    app.state.ingest_queue = IngestQueue(handle, maxsize=4)
+    app.state.batch_ingest_queue = IngestQueue(handle, maxsize=4)
+    app.state.settings = Settings.model_construct(secret_word="summary")
+    return TestClient(app)
+
+
+@pytest.fixture
+def unmanaged_group():
+    group_settings.invalidate()
+    group_settings._settings[GROUP] = GroupSettings(
+        managed=False, forward_url=None, notify_on_spam=False
+    )
+    yield
+    group_settings.invalidate()
+
+
+def test_low_priority_is_shed_first(client: TestClient, unmanaged_group):
+    # LOW may fill half of the 4-slot queue
+    statuses = [
+        client.post("/webhook", json=event(f"m{i}")).status_code for i in range(3)
+    ]
+    assert statuses == [200, 200, 503]
+
+    # Secret word (HIGH) and direct messages (NORMAL) are still admitted
+    assert client.post("/webhook", json=event("s", text="Summary")).status_code == 200
+    response = client.post("/webhook", json=event("d", chat="1@s.whatsapp.net"))
+    assert response.status_code == 200
+
+    response = client.post("/webhook", json=event("d2", chat="1@s.whatsapp.net"))
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "5"
+
+    stats = client.app.state.ingest_queue.stats()
+    assert stats["shed"] == {"high": 0, "normal": 1, "low": 1}
+    assert stats["depth_by_priority"] == {"high": 1, "normal": 1, "low": 2}
+
+
+@pytest.mark.parametrize("ndjson", [False, True])
+def test_batch_endpoint_reports_per_item_results(client: TestClient, ndjson: bool):
+    items = [event("m1"), REACTION, INVALID]
+    if ndjson:
+        response = client.post(
+            "/webhook/batch",
+            content="\n".join(json.dumps(item) for item in items),
+            headers={"Content-Type": "application/x-ndjson"},
+        )
+    else:
+        response = client.post("/webhook/batch", json=items)
+
+    body = response.json()
+    assert response.status_code == 200
+    assert [r["status"] for r in body["results"]] == ["queued", "skipped", "invalid"]
+    assert body["results"][2]["errors"][0]["loc"] == ["timestamp"]
+    assert (body["queued"], body["skipped"], body["invalid"]) == (1, 1, 1)
+    assert client.app.state.batch_ingest_queue.stats()["depth"] == 1
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        {**event("m1"), "from": 123},
+        {**event("m1"), "message": {"id": "m1", "text": 5}},
+    ],
+)
+def test_malformed_fields_are_rejected_with_422(client: TestClient, body: dict):
+    response = client.post("/webhook", json=body)
+
+    assert response.status_code == 422
+    assert client.app.state.ingest_queue.stats()["depth"] == 0
+
+
+@pytest.mark.parametrize(
+    "body, validations",
+    [(REACTION, 0), (STICKER, 0), (RECEIPT, 0), (event("m1"), 1)],
+)
+def test_only_relevant_events_are_validated(
+    client: TestClient, monkeypatch, body: dict, validations: int
+):
+    calls = []
+    validate = webhook.WhatsAppWebhookPayload.model_validate
+
+    def spy(obj, *args, **kwargs):
+        calls.append(obj)
+        return validate(obj, *args, **kwargs)
+
+    monkeypatch.setattr(webhook.WhatsAppWebhookPayload, "model_validate", spy)
+
+    assert client.post("/webhook", json=body).status_code == 200
+    assert len(calls) == validations
@@ -1,27 +1,168 @@
-from typing import Annotated
+import json
+from typing import Annotated, Any, Dict, List
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
 
-from api.deps import get_handler
-from handler import MessageHandler
+from api.deps import get_batch_ingest_queue, get_ingest_queue, get_settings
+from config import Settings
+from ingest import (
+    BatchParseError,
+    IngestQueue,
+    iter_json_array,
+    iter_ndjson,
+    prioritize,
+    triage,
+    triage_stats,
+)
 from models.webhook import WhatsAppWebhookPayload
 
 # Create router for webhook endpoints
 router = APIRouter(tags=["webhook"])
 
+NDJSON_CONTENT_TYPES = (
+    "application/x-ndjson",
+    "application/jsonl",
+    "application/jsonlines",
+)
 
-@router.post("/webhook")
+_PAYLOAD_EXAMPLE = WhatsAppWebhookPayload.model_config["json_schema_extra"]["example"]
+
+
+def _validation_errors(e: ValidationError) -> List[Dict[str, Any]]:
+    return [
+        {**err, "loc": ("body", *err["loc"])} for err in e.errors(include_url=False)
+    ]
+
+
+@router.post(
+    "/webhook",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"example": _PAYLOAD_EXAMPLE}},
+        }
+    },
+)
 async def webhook(
-    payload: WhatsAppWebhookPayload,
-    handler: Annotated[MessageHandler, Depends(get_handler)],
+    request: Request,
+    ingest_queue: Annotated[IngestQueue, Depends(get_ingest_queue)],
+    settings: Annotated[Settings, Depends(get_settings)],
 ) -> str:
     """
     WhatsApp webhook endpoint for receiving incoming messages.
+    Events that can't produce a stored message (no sender, reactions, receipts,
+    media without a caption) are acknowledged without full validation; the rest
+    are validated and queued for the ingest workers by priority.
+    When the queue is too full for the message's priority it is shed with a
+    503 and Retry-After, so the sender retries later.
     Returns:
         Simple "ok" response to acknowledge receipt
     """
-    # Only process messages that have a sender (from_ field)
-    if payload.from_:
-        await handler(payload)
+    try:
+        event = json.loads(await request.body())
+    except json.JSONDecodeError as e:
+        raise RequestValidationError(
+            [
+                {
+                    "type": "json_invalid",
+                    "loc": ("body", e.pos),
+                    "msg": e.msg,
+                    "input": {},
+                }
+            ]
+        )
+
+    if not triage_stats.record(triage(event)):
+        return "ok"
+
+    # Shed before validating, so an overloaded queue costs as little as possible
+    priority = prioritize(event, settings.secret_word)
+    if ingest_queue.admits(priority):
+        try:
+            payload = WhatsAppWebhookPayload.model_validate(event)
+        except ValidationError as e:
+            raise RequestValidationError(_validation_errors(e), body=event)
+        if ingest_queue.enqueue(payload, priority):
+            return "ok"
+    else:
+        ingest_queue.shed[priority] += 1
+
+    raise HTTPException(
+        status_code=503,
+        detail="Ingest queue is full, retry later",
+        headers={"Retry-After": str(settings.ingest_retry_after)},
+    )
+
+
+@router.post(
+    "/webhook/batch",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"example": [_PAYLOAD_EXAMPLE]},
+                "application/x-ndjson": {"example": json.dumps(_PAYLOAD_EXAMPLE)},
+            },
+        }
+    },
+)
+async def webhook_batch(
+    request: Request,
+    ingest_queue: Annotated[IngestQueue, Depends(get_batch_ingest_queue)],
+    settings: Annotated[Settings, Depends(get_settings)],
+) -> Dict[str, Any]:
+    """
+    Batch variant of /webhook for replays, backfills and relays.
+
+    Accepts a JSON array of webhook payloads, or NDJSON (one payload per line)
+    when sent as application/x-ndjson. Items are parsed as the body streams in
+    and each goes through the same triage and validation as /webhook, then onto
+    the batch ingest queue, whose workers (INGEST_BATCH_WORKERS) run the same
+    message pipeline; when the queue is too full for an item's priority the
+    request waits for room instead of shedding it.
+
+    Returns per-item results: "queued", "skipped" (nothing to store) or
+    "invalid" (with the validation errors). A malformed array stops parsing
+    and is reported in "error"; items before it are still processed.
+    """
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith(NDJSON_CONTENT_TYPES):
+        events = iter_ndjson(request.stream())
+    else:
+        events = iter_json_array(request.stream())
+
+    counts = {"queued": 0, "skipped": 0, "invalid": 0}
+    results: List[Dict[str, Any]] = []
+    error = None
+    index = 0
+    try:
+        async for event in events:
+            result: Dict[str, Any] = {"index": index}
+            index += 1
+            if isinstance(event, json.JSONDecodeError):
+                result.update(
+                    status="invalid",
+                    errors=[{"type": "json_invalid", "msg": event.msg}],
+                )
+            elif not triage_stats.record(triage(event)):
+                result["status"] = "skipped"
+            else:
+                try:
+                    await ingest_queue.put(
+                        WhatsAppWebhookPayload.model_validate(event),
+                        prioritize(event, settings.secret_word),
+                    )
+                    result["status"] = "queued"
+                except ValidationError as e:
+                    result.update(
+                        status="invalid",
+                        errors=e.errors(include_url=False, include_input=False),
+                    )
+            counts[result["status"]] += 1
+            results.append(result)
+    except BatchParseError as e:
+        error = str(e)
 
-    return "ok"
+    return {**counts, "error": error, "results": results}
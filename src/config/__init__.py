@@ -1,5 +1,5 @@
 from os import environ
-from typing import Optional, Self
+from typing import Literal, Optional, Self
 
 from pydantic import model_validator, Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -19,10 +19,71 @@ class Settings(BaseSettings):
     whatsapp_basic_auth_user: Optional[str] = None
 
     anthropic_api_key: str
+    llm_model: str = "anthropic:claude-4-sonnet-20250514"
+    # Pooled HTTP connections shared by all agents
+    llm_max_connections: int = 20
+    # Build agents and connect to the provider at startup
+    llm_warm_up: bool = False
+    # Model calls in flight across all agents
+    llm_concurrency: int = 8
+    # Token budget across all agents, 0 for no limit
+    llm_tokens_per_minute: int = 0
+    # Seconds of waiting that promote a call one priority class
+    llm_priority_aging: float = 30
 
     # Monitor settings for daily summaries
     monitor_phone: Optional[str] = None
     secret_word: Optional[str] = None
+    # Groups summarized in parallel
+    summary_concurrency: int = 4
+    # Estimated tokens per summary prompt
+    summary_chunk_tokens: int = 30_000
+    # Messages repeated when a chunk is cut mid-conversation
+    summary_chunk_overlap: int = 20
+    # Chunk summaries of one group in flight at once
+    summary_fan_out: int = 4
+    # Minutes between partial summary roll-ups, 0 to disable
+    summary_partial_interval: float = 60
+    # New messages needed to roll up a partial summary
+    summary_partial_min_messages: int = 50
+    # Estimated tokens per prompt packing small groups, 0 to disable
+    summary_batch_tokens: int = 20_000
+    # Seconds to collect small groups into one prompt
+    summary_batch_wait: float = 0.5
+    # Postgres for multiple workers/replicas
+    summary_single_flight: Literal["memory", "postgres"] = "memory"
+
+    # Webhook ingest settings
+    ingest_workers: int = 4
+    ingest_queue_size: int = 1000
+    # Workers draining /webhook/batch, separate from the single-event ones
+    ingest_batch_workers: int = 16
+    # Retry-After seconds sent with 503 when the queue sheds a message
+    ingest_retry_after: int = 5
+    message_writer_batch_size: int = 200
+    # Max seconds to keep adding messages that keep arriving to a batch
+    message_writer_flush_interval: float = 0.05
+    known_jid_cache_size: int = 10_000
+    # Seconds group flags stay cached, bounds staleness if LISTEN drops
+    group_settings_ttl: float = 300
+    # Postgres for multiple workers/replicas
+    dedupe_backend: Literal["memory", "postgres"] = "memory"
+    # Seconds a handled message ID is remembered
+    dedupe_ttl: float = 4 * 60
+    # Memory backend only
+    dedupe_cache_size: int = 100_000
+
+    # Forwarding to Group.forward_url
+    # In-flight requests per destination
+    forward_concurrency: int = 4
+    # Messages waiting per destination
+    forward_queue_size: int = 1000
+    forward_batch_size: int = 50
+    # Destinations that accept JSON arrays
+    forward_batch_urls: list[str] = []
+    # Seconds to wait on a destination per attempt
+    forward_timeout: float = 30.0
+    forward_max_attempts: int = 5
 
     # Optional settings
     debug: bool = False
@@ -44,6 +105,11 @@ class Settings(BaseSettings):
             return self.db_uri.replace("postgresql://", "postgresql+asyncpg://", 1)
         return self.db_uri
 
+    @property
+    def listen_db_uri(self) -> str:
+        """DB URI in plain libpq form, for direct asyncpg connections"""
+        return self.db_uri.replace("postgresql+asyncpg://", "postgresql://", 1)
+
     @model_validator(mode="after")
     def apply_env(self) -> Self:
         if self.anthropic_api_key:
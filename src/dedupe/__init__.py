@@ -0,0 +1,21 @@
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from config import Settings
+from .base import MessageDedupe
+from .memory import MemoryDedupe
+from .postgres import PostgresDedupe
+
+
+def create_dedupe(settings: Settings, engine: AsyncEngine) -> MessageDedupe:
+    """Build the dedupe backend selected by `settings.dedupe_backend`"""
+    if settings.dedupe_backend == "postgres":
+        return PostgresDedupe(engine, ttl=settings.dedupe_ttl)
+    return MemoryDedupe(ttl=settings.dedupe_ttl, maxsize=settings.dedupe_cache_size)
+
+
+__all__ = [
+    "MessageDedupe",
+    "MemoryDedupe",
+    "PostgresDedupe",
+    "create_dedupe",
+]
@@ -0,0 +1,57 @@
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict
+
+from utils.metrics import LatencyTracker
+
+
+class MessageDedupe(ABC):
+    """
+    Claims message IDs so each message is handled once.
+
+    `claim()` returns True for the first caller within `ttl` seconds and False
+    for every duplicate delivery after it.
+    """
+
+    backend: str
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.claim_latency = LatencyTracker()
+        self.claimed = 0
+        self.duplicates = 0
+
+    async def claim(self, message_id: str) -> bool:
+        """
+        Claim a message for processing.
+        :param message_id: The message to claim
+        :return: True if this caller should process the message
+        """
+        started = time.perf_counter()
+        try:
+            first = await self._claim(message_id)
+        finally:
+            self.claim_latency.since(started)
+        if first:
+            self.claimed += 1
+        else:
+            self.duplicates += 1
+        return first
+
+    @abstractmethod
+    async def _claim(self, message_id: str) -> bool: ...
+
+    def start(self):
+        """Start any background maintenance"""
+
+    async def stop(self):
+        """Stop background maintenance"""
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.backend,
+            "ttl": self.ttl,
+            "claimed": self.claimed,
+            "duplicates": self.duplicates,
+            "claim_latency": self.claim_latency.snapshot(),
+        }
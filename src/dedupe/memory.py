@@ -0,0 +1,52 @@
+from typing import Any, Dict
+
+from cachetools import TTLCache
+
+from .base import MessageDedupe
+
+
+class _ClaimShard(TTLCache):
+    """TTLCache that counts entries dropped for space before their TTL ran out"""
+
+    evicted = 0
+
+    def popitem(self):
+        self.evicted += 1
+        return super().popitem()
+
+
+class MemoryDedupe(MessageDedupe):
+    """
+    In-process dedupe over a sharded TTL map.
+
+    The check-and-set in `_claim` never awaits, so it is atomic on the event
+    loop and needs no lock. Message IDs are spread over independent shards so
+    expiry and eviction work stays proportional to one shard. Only dedupes
+    within a single process; use `PostgresDedupe` when running several
+    workers or replicas.
+    """
+
+    backend = "memory"
+
+    def __init__(self, ttl: float = 4 * 60, maxsize: int = 100_000, shards: int = 16):
+        super().__init__(ttl)
+        self._shards = [
+            _ClaimShard(maxsize=max(1, maxsize // shards), ttl=ttl)
+            for _ in range(shards)
+        ]
+
+    async def _claim(self, message_id: str) -> bool:
+        shard = self._shards[hash(message_id) % len(self._shards)]
+        if message_id in shard:
+            return False
+        shard[message_id] = True
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **super().stats(),
+            "size": sum(len(shard) for shard in self._shards),
+            "max_size": sum(shard.maxsize for shard in self._shards),
+            # Claims dropped for space before their TTL; non-zero means the cache is too small
+            "evicted": sum(shard.evicted for shard in self._shards),
+        }
@@ -0,0 +1,79 @@
+import asyncio
+import logging
+from typing import Any, Dict
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from .base import MessageDedupe
+
+logger = logging.getLogger(__name__)
+
+# A claim row is taken over once it is older than the TTL
+_CLAIM = text(
+    """
+    INSERT INTO message_claim (message_id, claimed_at) VALUES (:message_id, now())
+    ON CONFLICT (message_id) DO UPDATE SET claimed_at = EXCLUDED.claimed_at
+    WHERE message_claim.claimed_at < now() - make_interval(secs => :ttl)
+    RETURNING 1
+    """
+)
+_PURGE = text(
+    "DELETE FROM message_claim WHERE claimed_at < now() - make_interval(secs => :ttl)"
+)
+
+
+class PostgresDedupe(MessageDedupe):
+    """
+    Cross-process dedupe through the unlogged `message_claim` table.
+
+    Each claim is a single-row insert committed on its own connection, so it
+    holds across uvicorn workers and replicas sharing the database. Expired
+    claims are purged in the background. If the database can't be reached the
+    message is processed anyway (fail open) and counted in `errors`.
+    """
+
+    backend = "postgres"
+
+    def __init__(self, engine: AsyncEngine, ttl: float = 4 * 60):
+        super().__init__(ttl)
+        self.engine = engine
+        self.errors = 0
+        self.purged = 0
+        self._task: asyncio.Task | None = None
+
+    async def _claim(self, message_id: str) -> bool:
+        try:
+            async with self.engine.begin() as conn:
+                result = await conn.execute(
+                    _CLAIM, {"message_id": message_id, "ttl": self.ttl}
+                )
+                return result.first() is not None
+        except Exception as e:
+            self.errors += 1
+            logger.warning(
+                f"Dedupe claim for {message_id} failed, processing anyway: {e}"
+            )
+            return True
+
+    def start(self):
+        self._task = asyncio.create_task(self._purge_loop(), name="dedupe-purge")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _purge_loop(self):
+        while True:
+            await asyncio.sleep(self.ttl)
+            try:
+                async with self.engine.begin() as conn:
+                    result = await conn.execute(_PURGE, {"ttl": self.ttl})
+                    self.purged += result.rowcount
+            except Exception as e:
+                logger.warning(f"Error purging expired dedupe claims: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), "errors": self.errors, "purged": self.purged}
@@ -0,0 +1,39 @@
+import asyncio
+
+import pytest
+
+from dedupe import MemoryDedupe
+
+
+@pytest.mark.asyncio
+async def test_only_first_claim_wins():
+    dedupe = MemoryDedupe()
+
+    results = await asyncio.gather(*(dedupe.claim("m1") for _ in range(5)))
+
+    assert results.count(True) == 1
+    assert await dedupe.claim("m2")
+    stats = dedupe.stats()
+    assert stats["claimed"] == 2
+    assert stats["duplicates"] == 4
+    assert stats["claim_latency"]["count"] == 6
+
+
+@pytest.mark.asyncio
+async def test_claims_expire_after_ttl():
+    dedupe = MemoryDedupe(ttl=0.01)
+
+    assert await dedupe.claim("m1")
+    await asyncio.sleep(0.02)
+
+    assert await dedupe.claim("m1")
+
+
+@pytest.mark.asyncio
+async def test_evictions_before_ttl_are_counted():
+    dedupe = MemoryDedupe(maxsize=4, shards=1)
+
+    for i in range(6):
+        await dedupe.claim(f"m{i}")
+
+    assert dedupe.stats()["evicted"] == 2
@@ -0,0 +1,7 @@
+from .destination import Destination
+from .forwarder import Forwarder
+
+__all__ = [
+    "Destination",
+    "Forwarder",
+]
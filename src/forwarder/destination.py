@@ -0,0 +1,149 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List
+
+import httpx
+from tenacity import (
+    AsyncRetrying,
+    before_sleep_log,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_random_exponential,
+)
+
+from utils.metrics import LatencyTracker
+
+logger = logging.getLogger(__name__)
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    # Client errors won't succeed on retry, except timeouts and rate limiting
+    if isinstance(exc, httpx.HTTPStatusError):
+        status = exc.response.status_code
+        return status >= 500 or status in (408, 429)
+    return isinstance(exc, httpx.HTTPError)
+
+
+class Destination:
+    """
+    Delivery queue for a single forward URL.
+
+    Owns a long-lived keep-alive client and `concurrency` worker tasks. When
+    `batch_size` > 1 each worker posts up to that many queued payloads as one
+    JSON array; otherwise every payload is posted on its own.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        concurrency: int = 4,
+        queue_size: int = 1000,
+        batch_size: int = 1,
+        timeout: float = 30.0,
+        max_attempts: int = 5,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        self.url = url
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self._client = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=concurrency, max_keepalive_connections=concurrency
+            ),
+            headers={"Content-Type": "application/json"},
+            transport=transport,
+        )
+        self._queue: asyncio.Queue[tuple[float, Dict[str, Any]]] = asyncio.Queue(
+            maxsize=queue_size
+        )
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"forward-{url}-{i}")
+            for i in range(concurrency)
+        ]
+        self.request_latency = LatencyTracker()
+        self.delivery_latency = LatencyTracker()
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+        self.retries = 0
+
+    def enqueue(self, payload: Dict[str, Any]) -> bool:
+        try:
+            self._queue.put_nowait((time.perf_counter(), payload))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logger.warning(f"Forward queue for {self.url} is full, dropping message")
+            return False
+        return True
+
+    async def stop(self, timeout: float = 10.0):
+        """Deliver what is queued (up to `timeout` seconds), then close the client"""
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(
+                f"Forwarder for {self.url} stopped with {self._queue.qsize()} messages pending"
+            )
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        await self._client.aclose()
+
+    def _take(self) -> List[tuple[float, Dict[str, Any]]]:
+        batch = []
+        while len(batch) < self.batch_size - 1 and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _worker(self):
+        while True:
+            batch = [await self._queue.get()]
+            batch.extend(self._take())
+            try:
+                await self._post(
+                    [payload for _, payload in batch]
+                    if self.batch_size > 1
+                    else batch[0][1]
+                )
+                self.sent += len(batch)
+            except Exception as e:
+                self.failed += len(batch)
+                logger.error(
+                    f"Failed to forward {len(batch)} message(s) to {self.url}: {e}"
+                )
+            finally:
+                for enqueued_at, _ in batch:
+                    self.delivery_latency.since(enqueued_at)
+                    self._queue.task_done()
+
+    async def _post(self, body: Any):
+        async for attempt in AsyncRetrying(
+            wait=wait_random_exponential(min=0.5, max=30),
+            stop=stop_after_attempt(self.max_attempts),
+            retry=retry_if_exception(_is_retryable),
+            before_sleep=before_sleep_log(logger, logging.DEBUG),
+            reraise=True,
+        ):
+            with attempt:
+                if attempt.retry_state.attempt_number > 1:
+                    self.retries += 1
+                started = time.perf_counter()
+                try:
+                    response = await self._client.post(self.url, json=body)
+                finally:
+                    self.request_latency.since(started)
+                response.raise_for_status()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backlog": self._queue.qsize(),
+            "batch_size": self.batch_size,
+            "sent": self.sent,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "retries": self.retries,
+            "request_latency": self.request_latency.snapshot(),
+            "delivery_latency": self.delivery_latency.snapshot(),
+        }
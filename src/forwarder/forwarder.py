@@ -0,0 +1,77 @@
+import asyncio
+import logging
+from typing import Any, Dict, Iterable
+
+import httpx
+
+from models import WhatsAppWebhookPayload
+from .destination import Destination
+
+logger = logging.getLogger(__name__)
+
+
+class Forwarder:
+    """
+    Forwards webhook payloads to groups' forward URLs off the ingest path.
+
+    Each URL gets its own `Destination` (client, queue and workers), created on
+    first use, so a slow or failing endpoint only backs up its own queue.
+    Destinations listed in `batch_urls` receive JSON arrays of up to
+    `batch_size` payloads instead of one payload per request.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 4,
+        queue_size: int = 1000,
+        batch_size: int = 50,
+        batch_urls: Iterable[str] = (),
+        timeout: float = 30.0,
+        max_attempts: int = 5,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.batch_urls = frozenset(batch_urls)
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        # Overrides the destinations' network transport (tests use httpx.MockTransport)
+        self.transport = transport
+        self._destinations: Dict[str, Destination] = {}
+
+    def forward(self, url: str, payload: WhatsAppWebhookPayload) -> bool:
+        """
+        Queue a payload for delivery to `url` without waiting for it.
+        :param url: The destination forward URL
+        :param payload: The WhatsApp webhook payload to forward
+        :return: False if the destination's queue is full and the payload was dropped
+        """
+        destination = self._destinations.get(url)
+        if destination is None:
+            destination = self._destinations[url] = Destination(
+                url,
+                concurrency=self.concurrency,
+                queue_size=self.queue_size,
+                batch_size=self.batch_size if url in self.batch_urls else 1,
+                timeout=self.timeout,
+                max_attempts=self.max_attempts,
+                transport=self.transport,
+            )
+        return destination.enqueue(payload.model_dump(mode="json"))
+
+    async def stop(self, timeout: float = 10.0):
+        """Flush all destinations (up to `timeout` seconds) and close their clients"""
+        await asyncio.gather(
+            *(d.stop(timeout) for d in self._destinations.values()),
+            return_exceptions=True,
+        )
+        self._destinations.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "destinations": {
+                url: destination.stats()
+                for url, destination in self._destinations.items()
+            },
+        }
@@ -0,0 +1,76 @@
+import json
+
+import httpx
+import pytest
+from tenacity import wait_none
+
+from forwarder import Forwarder
+from forwarder import destination as destination_module
+from models import WhatsAppWebhookPayload
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(
+        destination_module, "wait_random_exponential", lambda **_: wait_none()
+    )
+
+
+def make_payload(text: str) -> WhatsAppWebhookPayload:
+    return WhatsAppWebhookPayload.model_validate(
+        {
+            "from": "1234567890@s.whatsapp.net in 123456789-123456@g.us",
+            "message": {"id": text, "text": text},
+            "timestamp": "2025-01-01T00:00:00Z",
+            "pushname": "Test",
+        }
+    )
+
+
+def with_responses(url: str, statuses: list[int], **kwargs):
+    """A forwarder answering requests with `statuses` in order, with a payload queued for `url`"""
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(json.loads(request.content))
+        return httpx.Response(statuses[min(len(requests), len(statuses)) - 1])
+
+    forwarder = Forwarder(transport=httpx.MockTransport(handler), **kwargs)
+    forwarder.forward(url, make_payload("warmup"))
+    return forwarder, requests, forwarder._destinations[url]
+
+
+@pytest.mark.asyncio
+async def test_retries_server_errors_until_delivered():
+    forwarder, requests, destination = with_responses("http://hook", [503, 503, 200])
+
+    await forwarder.stop()
+
+    assert len(requests) == 3
+    stats = destination.stats()
+    assert stats["sent"] == 1
+    assert stats["retries"] == 2
+
+
+@pytest.mark.asyncio
+async def test_client_errors_are_not_retried():
+    forwarder, requests, destination = with_responses("http://hook", [400])
+
+    await forwarder.stop()
+
+    assert len(requests) == 1
+    assert destination.stats()["failed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_batch_destinations_receive_arrays():
+    forwarder, requests, _ = with_responses(
+        "http://batch", [200], concurrency=1, batch_size=10, batch_urls=["http://batch"]
+    )
+    for i in range(3):
+        forwarder.forward("http://batch", make_payload(f"m{i}"))
+
+    await forwarder.stop()
+
+    assert [len(body) for body in requests] == [4]
+    assert requests[0][1]["message"]["text"] == "m0"
@@ -1,24 +1,31 @@
-import asyncio
 import logging
+from typing import TYPE_CHECKING
 
-import httpx
-from cachetools import TTLCache
 from sqlmodel.ext.asyncio.session import AsyncSession
 
+from dedupe import MemoryDedupe, MessageDedupe
+from forwarder import Forwarder
 from handler.whatsapp_group_link_spam import WhatsappGroupLinkSpamHandler
 from models import (
     WhatsAppWebhookPayload,
+    group_settings,
 )
 from whatsapp import WhatsAppClient
-from summarize_and_send_to_groups import send_immediate_summaries_to_monitor
+from summarize_and_send_to_groups import (
+    SummaryJobRunner,
+    send_immediate_summaries_to_monitor,
+)
 from config import Settings
 from .base_handler import BaseHandler
 
+if TYPE_CHECKING:
+    from ingest.writer import MessageWriter
+
 logger = logging.getLogger(__name__)
 
-# In-memory processing guard: 4 minutes TTL to prevent duplicate handling
-_processing_cache = TTLCache(maxsize=1000, ttl=4 * 60)
-_processing_lock = asyncio.Lock()
+# Fallback processing guard for handlers built without a configured dedupe backend
+_default_dedupe = MemoryDedupe()
+_default_forwarder = Forwarder()
 
 
 class MessageHandler(BaseHandler):
@@ -27,23 +34,32 @@ class MessageHandler(BaseHandler):
             session: AsyncSession,
             whatsapp: WhatsAppClient,
             settings: Settings,
+            writer: "MessageWriter | None" = None,
+            dedupe: MessageDedupe | None = None,
+            forwarder: Forwarder | None = None,
+            summary_jobs: SummaryJobRunner | None = None,
     ):
         self.whatsapp_group_link_spam = WhatsappGroupLinkSpamHandler(
-            session, whatsapp
+            session, whatsapp, writer
         )
         self.settings = settings
-        super().__init__(session, whatsapp)
+        self.dedupe = dedupe or _default_dedupe
+        self.forwarder = forwarder or _default_forwarder
+        self.summary_jobs = summary_jobs
+        super().__init__(session, whatsapp, writer)
 
     async def __call__(self, payload: WhatsAppWebhookPayload):
         message = await self.store_message(payload)
 
-        if (
-                message
-                and message.group
-                and message.group.managed
-                and message.group.forward_url
-        ):
-            await self.forward_message(payload, message.group.forward_url)
+        # Routing flags come from the settings cache, not a per-message group load
+        settings = (
+            await group_settings.get(self.session, message.group_jid)
+            if message and message.text and message.group_jid
+            else None
+        )
+
+        if settings and settings.managed and settings.forward_url:
+            await self.forward_message(payload, settings.forward_url)
 
         # ignore messages that don't exist or don't have text
         if not message or not message.text:
@@ -60,18 +76,16 @@ class MessageHandler(BaseHandler):
             )
 
         # ignore messages from unmanaged groups
-        if message and message.group and not message.group.managed:
+        if settings and not settings.managed:
             return
 
-        # In-memory dedupe: if this message is already being processed/recently processed, skip
+        # Dedupe: if this message is already being processed/recently processed, skip
         if message and message.message_id:
-            async with _processing_lock:
-                if message.message_id in _processing_cache:
-                    logging.info(
-                        f"Message {message.message_id} already in processing cache; skipping."
-                    )
-                    return
-                _processing_cache[message.message_id] = True
+            if not await self.dedupe.claim(message.message_id):
+                logging.info(
+                    f"Message {message.message_id} already claimed; skipping."
+                )
+                return
 
         # Check for secret word to trigger immediate summaries
         if (
@@ -83,20 +97,25 @@ class MessageHandler(BaseHandler):
         ):
             logging.info(f"Secret word detected from {message.sender_jid}, triggering immediate summaries")
             try:
-                await send_immediate_summaries_to_monitor(
-                    self.session,
-                    self.whatsapp,
-                    self.settings.monitor_phone,
-                    message.sender_jid
-                )
+                if self.summary_jobs is not None:
+                    # Summarized in the background; progress is at GET /jobs/{id}
+                    job = await self.summary_jobs.submit(message.sender_jid)
+                    logging.info(f"Immediate summaries running as job {job.id}")
+                else:
+                    await send_immediate_summaries_to_monitor(
+                        self.session,
+                        self.whatsapp,
+                        self.settings.monitor_phone,
+                        message.sender_jid
+                    )
             except Exception as e:
                 logging.error(f"Error sending immediate summaries: {e}")
 
         # Handle whatsapp links in group
         if (
-                message.group
-                and message.group.managed
-                and message.group.notify_on_spam
+                settings
+                and settings.managed
+                and settings.notify_on_spam
                 and "https://chat.whatsapp.com/" in message.text
         ):
             await self.whatsapp_group_link_spam(message)
@@ -105,7 +124,9 @@ class MessageHandler(BaseHandler):
             self, payload: WhatsAppWebhookPayload, forward_url: str
     ) -> None:
         """
-        Forward a message to the group's configured forward URL using HTTP POST.
+        Queue a message for forwarding to the group's configured forward URL.
+        Delivery (with retries) happens in the background, so a slow endpoint
+        doesn't hold up message processing.
 
         :param payload: The WhatsApp webhook payload to forward
         :param forward_url: The URL to forward the message to
@@ -114,21 +135,4 @@ class MessageHandler(BaseHandler):
         if not forward_url:
             return
 
-        try:
-            # Create an async HTTP client and forward the message
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    forward_url,
-                    json=payload.model_dump(
-                        mode="json"
-                    ),  # Convert Pydantic model to dict for JSON serialization
-                    headers={"Content-Type": "application/json"},
-                )
-                response.raise_for_status()
-
-        except httpx.HTTPError as exc:
-            # Log the error but don't raise it to avoid breaking message processing
-            logger.error(f"Failed to forward message to {forward_url}: {exc}")
-        except Exception as exc:
-            # Catch any other unexpected errors
-            logger.error(f"Unexpected error forwarding message to {forward_url}: {exc}")
+        self.forwarder.forward(forward_url, payload)
@@ -1,20 +1,26 @@
 import logging
+from typing import TYPE_CHECKING
 
+from sqlalchemy.exc import IntegrityError
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from models import (
     WhatsAppWebhookPayload,
-    BaseGroup,
-    BaseSender,
     Message,
     Sender,
     Group,
     BaseMessage,
+    OnConflict,
     upsert,
+    bulk_upsert,
+    known_jids,
 )
 from whatsapp import WhatsAppClient, SendMessageRequest
 from whatsapp.jid import normalize_jid
 
+if TYPE_CHECKING:
+    from ingest.writer import MessageWriter
+
 logger = logging.getLogger(__name__)
 
 
@@ -23,9 +29,11 @@ class BaseHandler:
         self,
         session: AsyncSession,
         whatsapp: WhatsAppClient,
+        writer: "MessageWriter | None" = None,
     ):
         self.session = session
         self.whatsapp = whatsapp
+        self.writer = writer
 
     async def store_message(
         self,
@@ -41,36 +49,67 @@ class BaseHandler:
         if isinstance(message, WhatsAppWebhookPayload):
             sender_pushname = message.pushname
             message = Message.from_webhook(message)
-        if isinstance(message, BaseMessage):
-            message = Message(**message.model_dump())
+        if isinstance(message, BaseMessage) and not isinstance(message, Message):
+            message = Message.from_base(message)
 
         if not message.text:
             return message  # Don't store messages without text
 
+        if self.writer is not None:
+            # Handed to the batched writer, committed in its own transaction
+            await self.writer.write(message, sender_pushname, wait=False)
+            return message
+
+        try:
+            return await self._insert_message(message, sender_pushname)
+        except IntegrityError:
+            # A cached sender/group may have been deleted since it was cached;
+            # forget it and retry once with the existence checks
+            known_jids.discard(
+                [message.sender_jid], [message.group_jid] if message.group_jid else []
+            )
+            return await self._insert_message(message, sender_pushname)
+
+    async def _insert_message(
+        self, message: Message, sender_pushname: str | None
+    ) -> Message | None:
         async with self.session.begin_nested():
             # Ensure sender exists and is committed
-            sender = await self.session.get(Sender, message.sender_jid)
-            if sender is None:
-                sender = Sender(
-                    **BaseSender(
-                        jid=message.sender_jid,  # Use normalized JID from message
-                        push_name=sender_pushname,
-                    ).model_dump()
-                )
-                await self.upsert(sender)
-                await (
-                    self.session.flush()
-                )  # Ensure sender is visible in this transaction
-
-            if message.group_jid:
+            if not known_jids.has_sender(message.sender_jid):
+                sender = await self.session.get(Sender, message.sender_jid)
+                if sender is None:
+                    sender = Sender.model_validate(
+                        {
+                            "jid": message.sender_jid,  # Use normalized JID from message
+                            "push_name": sender_pushname,
+                        }
+                    )
+                    # Only needs to exist; skip mapping it back to an instance
+                    await bulk_upsert(
+                        self.session, [sender], on_conflict=OnConflict.NOTHING
+                    )
+                    await (
+                        self.session.flush()
+                    )  # Ensure sender is visible in this transaction
+
+            if message.group_jid and not known_jids.has_group(message.group_jid):
                 group = await self.session.get(Group, message.group_jid)
                 if group is None:
-                    group = Group(**BaseGroup(group_jid=message.group_jid).model_dump())
-                    await self.upsert(group)
+                    group = Group.model_validate({"group_jid": message.group_jid})
+                    # Only needs to exist; skip mapping it back to an instance
+                    await bulk_upsert(
+                        self.session, [group], on_conflict=OnConflict.NOTHING
+                    )
                     await self.session.flush()
 
             # Finally add the message
-            return await self.upsert(message)
+            # Callers rarely need the sender and group; skip their selectin loads
+            stored = await self.upsert(message, load_relationships=False)
+
+        known_jids.add_senders([message.sender_jid])
+        if message.group_jid:
+            known_jids.add_groups([message.group_jid])
+        return stored
 
     async def send_message(
         self, to_jid: str, message: str, in_reply_to: str | None = None
@@ -94,14 +133,21 @@ class BaseHandler:
             )
         )
         my_number = await self.whatsapp.get_my_jid()
-        new_message = BaseMessage(
-            message_id=resp.results.message_id,
-            text=message,
-            sender_jid=my_number,
-            chat_jid=to_jid,
-            reply_to_id=in_reply_to,
+        new_message = Message.model_validate(
+            {
+                "message_id": resp.results.message_id,
+                "text": message,
+                "sender_jid": my_number,
+                "chat_jid": to_jid,
+                "reply_to_id": in_reply_to,
+            }
         )
-        return await self.store_message(Message(**new_message.model_dump()))
+        return await self.store_message(new_message)
 
-    async def upsert(self, model):
-        return await upsert(self.session, model)
+    async def upsert(
+        self,
+        model,
+        load_relationships: bool = True,
+        on_conflict: OnConflict = OnConflict.UPDATE_CHANGED,
+    ):
+        return await upsert(self.session, model, load_relationships, on_conflict)
@@ -3,9 +3,11 @@
 import logging
 from .base_handler import BaseHandler
 from pydantic_ai import Agent
+from pydantic_ai.models import Model
 from pydantic import BaseModel
 from sqlmodel import Field
-from models import Message
+from agents import Priority, agent_registry
+from models import Group, Message
 from whatsapp.jid import parse_jid
 
 # Creating an object
@@ -20,30 +22,28 @@ class WhatsappGroupLinkSpamHandler(BaseHandler):
         explanation: str = Field(max_length=100, description="Short explanation")
 
     async def __call__(self, message: Message):
-        agent = Agent(
-            model="anthropic:claude-4-sonnet-20250514",
-            system_prompt="""You are a spam whatsapp link spam detector. You are given a message and you need to return a score of 1-5 and a SHORT 7 words explanation of why you gave that score.
-            """,
-            output_type=self.SpamCheckResult,
-            output_retries=3,
-        )
+        group = await self.session.get(Group, message.group_jid)
+        if group is None:
+            raise ValueError(f"Group {message.group_jid} not found")
 
-        response = await agent.run(
+        response = await agent_registry.run(
+            "spam_check",
             (
                 f"@{parse_jid(message.sender_jid).user}:"
                 f"{message.text}"
-                f"The message is from a group chat. The group name is {message.group.group_name} and the group description is {message.group.group_topic}"
-            )
+                f"The message is from a group chat. The group name is {group.group_name} and the group description is {group.group_topic}"
+            ),
+            priority=Priority.SPAM,
         )
 
         spam_result = response.output
 
-        if message and message.group and not message.group.owner_jid:
+        if not group.owner_jid:
             raise ValueError("Group owner JID is required")
 
         # Construct message with validated data
         message_to_send = (
-            f"@{message.group.owner_jid.split('@')[0]} - A Whatsapp group link was shared in the group. "  # type: ignore
+            f"@{group.owner_jid.split('@')[0]} - A Whatsapp group link was shared in the group. "
             f"This might be a spam. Please check and remove if it is spam.\n\n"
             f"Spam Confidence Level: *{spam_result.score}*  (1 not spam - 5 spam) \n"
             f"Explanation: {spam_result.explanation}"
@@ -54,3 +54,18 @@ class WhatsappGroupLinkSpamHandler(BaseHandler):
             message_to_send,
             # message.message_id,
         )
+
+
+def _spam_check_agent(
+    model: Model,
+) -> Agent[None, WhatsappGroupLinkSpamHandler.SpamCheckResult]:
+    return Agent(
+        model,
+        system_prompt="""You are a spam whatsapp link spam detector. You are given a message and you need to return a score of 1-5 and a SHORT 7 words explanation of why you gave that score.
+            """,
+        output_type=WhatsappGroupLinkSpamHandler.SpamCheckResult,
+        output_retries=3,
+    )
+
+
+agent_registry.register("spam_check", _spam_check_agent)
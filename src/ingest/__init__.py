@@ -0,0 +1,72 @@
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from config import Settings
+from dedupe import MessageDedupe
+from forwarder import Forwarder
+from handler import MessageHandler
+from models import WhatsAppWebhookPayload
+from summarize_and_send_to_groups import SummaryJobRunner
+from whatsapp import WhatsAppClient
+from .batch import BatchParseError, iter_json_array, iter_ndjson
+from .queue import ADMIT_SHARE, IngestQueue, PayloadHandler, Priority
+from .triage import (
+    EventKind,
+    RELEVANT,
+    TriageStats,
+    VALIDATED,
+    prioritize,
+    triage,
+    triage_stats,
+)
+from .writer import MessageWriter
+
+
+def message_pipeline(
+    session_factory: async_sessionmaker,
+    whatsapp: WhatsAppClient,
+    settings: Settings,
+    writer: MessageWriter | None = None,
+    dedupe: MessageDedupe | None = None,
+    forwarder: Forwarder | None = None,
+    summary_jobs: SummaryJobRunner | None = None,
+) -> PayloadHandler:
+    """
+    Build the per-payload handler run by the ingest workers.
+    Each payload gets its own session, committed once the handler is done.
+    Messages are stored through `writer`, deduplicated with `dedupe`,
+    forwarded through `forwarder` and secret-word summaries run as
+    `summary_jobs` when given.
+    """
+
+    async def handle(payload: WhatsAppWebhookPayload) -> None:
+        async with session_factory() as session:
+            try:
+                await MessageHandler(
+                    session, whatsapp, settings, writer, dedupe, forwarder, summary_jobs
+                )(payload)
+                await session.commit()
+            except Exception:
+                await session.rollback()
+                raise
+
+    return handle
+
+
+__all__ = [
+    "ADMIT_SHARE",
+    "BatchParseError",
+    "EventKind",
+    "IngestQueue",
+    "MessageWriter",
+    "PayloadHandler",
+    "Priority",
+    "RELEVANT",
+    "TriageStats",
+    "VALIDATED",
+    "iter_json_array",
+    "iter_ndjson",
+    "message_pipeline",
+    "prioritize",
+    "triage",
+    "triage_stats",
+]
@@ -0,0 +1,107 @@
+import json
+from typing import Any, AsyncIterator
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\r\n"
+
+
+class BatchParseError(ValueError):
+    """The batch body is malformed; items before it were parsed fine"""
+
+
+async def iter_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[Any]:
+    """
+    Decode newline-delimited JSON as it streams in.
+    Yields the decoded value of each non-blank line, or the JSONDecodeError
+    for a line that isn't valid JSON (later lines are still read).
+    """
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield _decode_line(line)
+    if buffer.strip():
+        yield _decode_line(buffer)
+
+
+def _decode_line(line: bytes) -> Any:
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError as e:
+        return e
+
+
+async def iter_json_array(chunks: AsyncIterator[bytes]) -> AsyncIterator[Any]:
+    """
+    Decode the elements of a top-level JSON array as it streams in, without
+    holding the whole document in memory.
+    :raises BatchParseError: if the body is not a well-formed JSON array
+    """
+    buffer = ""
+    pos = 0
+    started = False
+    expect_value = True
+    count = 0
+    done = False
+    async for chunk in _utf8(chunks):
+        buffer = buffer[pos:] + chunk
+        pos = 0
+        while not done:
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                pos += 1
+            if pos == len(buffer):
+                break
+            char = buffer[pos]
+            if not started:
+                if char != "[":
+                    raise BatchParseError("Expected a JSON array")
+                started = True
+                pos += 1
+            elif char == "]" and (not expect_value or count == 0):
+                done = True
+                pos += 1
+            elif char == "," and not expect_value:
+                expect_value = True
+                pos += 1
+            elif expect_value:
+                try:
+                    value, end = _decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    break  # Incomplete value, wait for more input
+                if not isinstance(value, (dict, list, str)):
+                    # A number or literal is only complete once a delimiter follows it
+                    rest = buffer[end:].lstrip(_WHITESPACE)
+                    if not rest or rest[0] not in ",]":
+                        break
+                pos = end
+                expect_value = False
+                count += 1
+                yield value
+            else:
+                raise BatchParseError(f"Unexpected {char!r} in JSON array")
+
+    if not done:
+        raise BatchParseError(
+            f"Malformed or unterminated JSON array after {count} items"
+        )
+    if buffer[pos:].strip():
+        raise BatchParseError("Unexpected data after JSON array")
+
+
+async def _utf8(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    # Chunks may split a multi-byte character
+    pending = b""
+    async for chunk in chunks:
+        pending += chunk
+        try:
+            text = pending.decode()
+            pending = b""
+        except UnicodeDecodeError as e:
+            if e.end < len(pending):
+                raise BatchParseError("Body is not valid UTF-8") from e
+            text, pending = pending[: e.start].decode(), pending[e.start :]
+        yield text
+    if pending:
+        raise BatchParseError("Body is not valid UTF-8")
@@ -0,0 +1,154 @@
+import asyncio
+import itertools
+import logging
+import math
+import time
+from collections import Counter
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, Dict
+
+from models import WhatsAppWebhookPayload
+from utils.metrics import LatencyTracker
+
+logger = logging.getLogger(__name__)
+
+PayloadHandler = Callable[[WhatsAppWebhookPayload], Awaitable[None]]
+
+
+class Priority(IntEnum):
+    """Processing order of queued payloads, lowest value first"""
+
+    HIGH = 0  # Managed groups and secret-word requests
+    NORMAL = 1
+    LOW = 2  # Chatter in unmanaged groups
+
+
+# Share of the queue each priority may fill before it is shed, so a flood of
+# low-priority messages leaves room for the ones we care about
+ADMIT_SHARE = {Priority.HIGH: 1.0, Priority.NORMAL: 0.8, Priority.LOW: 0.5}
+
+
+class IngestQueue:
+    """
+    Bounded in-process priority queue between the webhook endpoint and message handling.
+
+    The webhook only validates and enqueues; a pool of worker tasks runs the
+    handler pipeline (storage, forwarding, spam checks, summaries) off the
+    request path, so the number of workers caps concurrent DB work. Payloads
+    are handled by priority, and each priority is only admitted while the
+    queue is below its ADMIT_SHARE of `maxsize`; beyond that it is shed.
+    """
+
+    def __init__(self, handle: PayloadHandler, workers: int = 4, maxsize: int = 1000):
+        self._handle = handle
+        self._worker_count = workers
+        self._queue: asyncio.PriorityQueue[
+            tuple[Priority, int, float, WhatsAppWebhookPayload]
+        ] = asyncio.PriorityQueue(maxsize=maxsize)
+        self._limits = {
+            priority: math.ceil(maxsize * share)
+            for priority, share in ADMIT_SHARE.items()
+        }
+        self._seq = itertools.count()  # FIFO within a priority
+        self._space = asyncio.Condition()
+        self._depth: Counter[Priority] = Counter()
+        self._workers: list[asyncio.Task] = []
+        self.latency = LatencyTracker()
+        self.enqueued = 0
+        self.processed = 0
+        self.failed = 0
+        self.shed: Counter[Priority] = Counter()
+
+    def start(self):
+        """Start the worker tasks"""
+        for i in range(self._worker_count):
+            self._workers.append(
+                asyncio.create_task(self._worker(), name=f"ingest-worker-{i}")
+            )
+        logger.info(f"Ingest queue started with {self._worker_count} workers")
+
+    async def stop(self, timeout: float = 10.0):
+        """Drain pending payloads (up to `timeout` seconds) and stop the workers"""
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(
+                f"Ingest queue stopped with {self._queue.qsize()} payloads still pending"
+            )
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers.clear()
+
+    def admits(self, priority: Priority) -> bool:
+        """Whether a payload of this priority would be accepted right now"""
+        return self._queue.qsize() < self._limits[priority]
+
+    def enqueue(
+        self, payload: WhatsAppWebhookPayload, priority: Priority = Priority.NORMAL
+    ) -> bool:
+        """
+        Queue a payload for processing without waiting for it.
+        :param payload: The webhook payload to process
+        :param priority: Processing priority, also deciding how full the queue may be
+        :return: False if the payload was shed because the queue is too full
+        """
+        if not self.admits(priority):
+            self.shed[priority] += 1
+            logger.warning(
+                f"Ingest queue at {self._queue.qsize()}/{self._queue.maxsize}, "
+                f"shedding {priority.name} payload from {payload.from_}"
+            )
+            return False
+        self._put(payload, priority)
+        return True
+
+    async def put(
+        self, payload: WhatsAppWebhookPayload, priority: Priority = Priority.NORMAL
+    ) -> None:
+        """
+        Queue a payload, waiting until the queue has room for its priority.
+        Used by batch ingest, where the caller should be slowed down rather than shed.
+        :param payload: The webhook payload to process
+        :param priority: Processing priority
+        """
+        async with self._space:
+            await self._space.wait_for(lambda: self.admits(priority))
+            self._put(payload, priority)
+
+    def _put(self, payload: WhatsAppWebhookPayload, priority: Priority):
+        self._queue.put_nowait(
+            (priority, next(self._seq), time.perf_counter(), payload)
+        )
+        self._depth[priority] += 1
+        self.enqueued += 1
+
+    async def _worker(self):
+        while True:
+            priority, _, enqueued_at, payload = await self._queue.get()
+            self._depth[priority] -= 1
+            async with self._space:
+                self._space.notify_all()
+            try:
+                await self._handle(payload)
+                self.processed += 1
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Error handling payload from {payload.from_}: {e}")
+            finally:
+                self.latency.since(enqueued_at)
+                self._queue.task_done()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "depth": self._queue.qsize(),
+            "max_depth": self._queue.maxsize,
+            "workers": len(self._workers),
+            "enqueued": self.enqueued,
+            "processed": self.processed,
+            "failed": self.failed,
+            "depth_by_priority": {p.name.lower(): self._depth[p] for p in Priority},
+            "shed": {p.name.lower(): self.shed[p] for p in Priority},
+            "dropped": sum(self.shed.values()),
+            "latency": self.latency.snapshot(),
+        }
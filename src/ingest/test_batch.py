@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+from ingest import BatchParseError, iter_json_array, iter_ndjson
+
+TEXT = {
+    "from": "1234567890@s.whatsapp.net in 123456789-123456@g.us",
+    "timestamp": "2025-01-01T00:00:00Z",
+    "message": {"id": "m1", "text": "שלום"},
+}
+REACTION = {**TEXT, "message": {"id": "m2"}, "reaction": {"id": "m1", "message": "👍"}}
+
+
+async def chunked(data: bytes, size: int):
+    for i in range(0, len(data), size):
+        yield data[i : i + size]
+
+
+async def collect(events):
+    return [event async for event in events]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("size", [1, 3, 64, 1 << 16])
+async def test_json_array_items_span_chunks(size: int):
+    items = [TEXT, REACTION, 12.5, "x"]
+    body = json.dumps(items, ensure_ascii=False).encode()
+
+    assert await collect(iter_json_array(chunked(body, size))) == items
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("body", [b"{}", b"[1 2]", b"[1,", b"[1] [2]"])
+async def test_malformed_json_array_raises(body: bytes):
+    with pytest.raises(BatchParseError):
+        await collect(iter_json_array(chunked(body, 2)))
+
+
+@pytest.mark.asyncio
+async def test_ndjson_reports_bad_lines_and_continues():
+    body = b'{"a": 1}\n\nnot json\n{"b": 2}'
+
+    events = await collect(iter_ndjson(chunked(body, 4)))
+
+    assert events[0] == {"a": 1}
+    assert isinstance(events[1], json.JSONDecodeError)
+    assert events[2] == {"b": 2}
@@ -0,0 +1,110 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+from ingest import IngestQueue, Priority
+from models import WhatsAppWebhookPayload
+
+
+def make_payload(message_id: str) -> WhatsAppWebhookPayload:
+    return WhatsAppWebhookPayload(
+        from_="1234567890@s.whatsapp.net in 123456789-123456@g.us",
+        timestamp=datetime.now(timezone.utc),
+        message={"id": message_id, "text": "hello"},
+    )
+
+
+@pytest.mark.asyncio
+async def test_enqueue_returns_before_handling():
+    release = asyncio.Event()
+    handled = []
+
+    async def handle(payload):
+        await release.wait()
+        handled.append(payload.message.id)
+
+    queue = IngestQueue(handle, workers=1, maxsize=10)
+    queue.start()
+
+    assert queue.enqueue(make_payload("m1"))
+    await asyncio.sleep(0)
+    assert handled == []
+
+    release.set()
+    await queue.stop()
+    assert handled == ["m1"]
+    assert queue.stats()["processed"] == 1
+    assert queue.stats()["latency"]["count"] == 1
+
+
+@pytest.mark.asyncio
+async def test_full_queue_drops_payloads():
+    async def handle(payload):
+        pass
+
+    # No workers started, so nothing drains the queue
+    queue = IngestQueue(handle, workers=1, maxsize=2)
+    assert queue.enqueue(make_payload("m1"))
+    assert queue.enqueue(make_payload("m2"))
+    assert not queue.enqueue(make_payload("m3"))
+
+    stats = queue.stats()
+    assert stats["depth"] == 2
+    assert stats["dropped"] == 1
+
+
+@pytest.mark.asyncio
+async def test_higher_priority_is_handled_first():
+    handled = []
+
+    async def handle(payload):
+        handled.append(payload.message.id)
+
+    queue = IngestQueue(handle, workers=1, maxsize=10)
+    queue.enqueue(make_payload("low"), Priority.LOW)
+    queue.enqueue(make_payload("normal"))
+    queue.enqueue(make_payload("high-1"), Priority.HIGH)
+    queue.enqueue(make_payload("high-2"), Priority.HIGH)
+    queue.start()
+    await queue.stop()
+
+    assert handled == ["high-1", "high-2", "normal", "low"]
+
+
+@pytest.mark.asyncio
+async def test_put_waits_for_room_instead_of_shedding():
+    async def handle(payload):
+        pass
+
+    queue = IngestQueue(handle, workers=1, maxsize=2)
+    await queue.put(make_payload("m1"))
+    await queue.put(make_payload("m2"))
+    waiting = asyncio.create_task(queue.put(make_payload("m3")))
+    await asyncio.sleep(0)
+    assert not waiting.done()
+
+    queue.start()
+    await asyncio.wait_for(waiting, timeout=1)
+    await queue.stop()
+    assert queue.stats()["processed"] == 3
+    assert queue.stats()["dropped"] == 0
+
+
+@pytest.mark.asyncio
+async def test_handler_errors_do_not_stop_workers():
+    handled = []
+
+    async def handle(payload):
+        if payload.message.id == "bad":
+            raise RuntimeError("boom")
+        handled.append(payload.message.id)
+
+    queue = IngestQueue(handle, workers=2, maxsize=10)
+    queue.start()
+    queue.enqueue(make_payload("bad"))
+    queue.enqueue(make_payload("good"))
+    await queue.stop()
+
+    assert handled == ["good"]
+    assert queue.stats()["failed"] == 1
@@ -0,0 +1,99 @@
+import pytest
+from pydantic import ValidationError
+
+from ingest import RELEVANT, EventKind, Priority, prioritize, triage
+from models import Message, WhatsAppWebhookPayload
+from test_utils.benchmark import benchmark  # noqa
+
+FROM = "1234567890@s.whatsapp.net in 123456789-123456@g.us"
+TS = "2025-01-01T00:00:00Z"
+
+EVENTS = {
+    EventKind.TEXT: {
+        "from": FROM,
+        "timestamp": TS,
+        "pushname": "John",
+        "message": {
+            "id": "m1",
+            "text": "hello",
+            "replied_id": "",
+            "quoted_message": "",
+        },
+    },
+    EventKind.CAPTIONED: {
+        "from": FROM,
+        "timestamp": TS,
+        "message": {"id": "m2"},
+        "image": {
+            "media_path": "/m/1.jpg",
+            "mime_type": "image/jpeg",
+            "caption": "look",
+        },
+    },
+    EventKind.MEDIA: {
+        "from": FROM,
+        "timestamp": TS,
+        "message": {"id": "m3"},
+        "sticker": {
+            "media_path": "/m/1.webp",
+            "mime_type": "image/webp",
+            "caption": "",
+        },
+    },
+    EventKind.REACTION: {
+        "from": FROM,
+        "timestamp": TS,
+        "message": {"id": "m4"},
+        "reaction": {"id": "m1", "message": "👍"},
+    },
+    EventKind.NO_SENDER: {"event": "message.ack", "timestamp": TS, "ids": ["m1", "m2"]},
+    EventKind.OTHER: {
+        "from": FROM,
+        "timestamp": TS,
+        "message": {"id": "m5"},
+        "view_once": True,
+    },
+}
+
+
+@pytest.mark.parametrize("kind", list(EVENTS))
+def test_triage_matches_full_validation(kind: EventKind):
+    event = EVENTS[kind]
+
+    assert triage(event) == kind
+    if event.get("from"):
+        # Irrelevant exactly when the full model yields no text to store
+        payload = WhatsAppWebhookPayload.model_validate(event)
+        has_text = Message._extract_message_text(payload) is not None
+        assert (kind in RELEVANT) == has_text
+
+
+@pytest.mark.parametrize(
+    "event",
+    [
+        {**EVENTS[EventKind.TEXT], "from": 123},
+        {**EVENTS[EventKind.TEXT], "message": {"id": "m1", "text": 5}},
+        {**EVENTS[EventKind.TEXT], "message": "hello"},
+        {**EVENTS[EventKind.CAPTIONED], "image": {"caption": ["look"]}},
+    ],
+)
+def test_malformed_fields_are_left_to_validation(event):
+    assert triage(event) == EventKind.MALFORMED
+    assert prioritize(event, secret_word="summary") == Priority.NORMAL
+    with pytest.raises(ValidationError):
+        WhatsAppWebhookPayload.model_validate(event)
+
+
+def validate(event: dict) -> WhatsAppWebhookPayload | ValidationError:
+    """Full validation as /webhook did it for every event, rejections included"""
+    try:
+        return WhatsAppWebhookPayload.model_validate(event)
+    except ValidationError as e:
+        return e
+
+
+@pytest.mark.parametrize("path", [triage, validate], ids=["triage", "validate"])
+@pytest.mark.parametrize("kind", list(EVENTS))
+def test_parse_cost_per_event_kind(benchmark, kind: EventKind, path):
+    # Report only (run with -s); JSON decoding is shared by both paths
+    benchmark(path, EVENTS[kind])
@@ -0,0 +1,142 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+
+from ingest import IngestQueue, Priority
+from ingest import writer as writer_module
+from ingest.writer import MessageWriter
+from models import BaseMessage, Message
+from test_utils.mock_session import mock_session  # noqa
+
+
+def make_message(message_id: str, sender: str = "1234567890") -> Message:
+    return Message(
+        **BaseMessage(
+            message_id=message_id,
+            text="hello",
+            chat_jid="123456789-123456@g.us",
+            sender_jid=f"{sender}@s.whatsapp.net",
+        ).model_dump()
+    )
+
+
+@pytest.fixture
+def written(monkeypatch: pytest.MonkeyPatch):
+    calls = []
+
+    async def fake_bulk_upsert(session, entities, on_conflict=None):
+        calls.append(entities)
+
+    monkeypatch.setattr(writer_module, "bulk_upsert", fake_bulk_upsert)
+    return calls
+
+
+def session_factory_for(session):
+    @asynccontextmanager
+    async def factory():
+        yield session
+
+    return factory
+
+
+@pytest.mark.asyncio
+async def test_concurrent_writes_share_one_flush(mock_session, written):
+    writer = MessageWriter(
+        session_factory_for(mock_session), batch_size=10, flush_interval=0.05
+    )
+    writer.start()
+
+    await asyncio.gather(
+        *(writer.write(make_message(f"m{i}", sender=str(i % 2))) for i in range(5))
+    )
+    await writer.stop()
+
+    senders, groups, messages = written
+    assert len(senders) == 2
+    assert len(groups) == 1
+    assert [m.message_id for m in messages] == [f"m{i}" for i in range(5)]
+    assert writer.stats()["flushes"] == 1
+    mock_session.commit.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_duplicate_deliveries_in_a_batch_are_collapsed(mock_session, written):
+    writer = MessageWriter(
+        session_factory_for(mock_session), batch_size=10, flush_interval=0.05
+    )
+    writer.start()
+
+    await asyncio.gather(
+        writer.write(make_message("m1")), writer.write(make_message("m1"))
+    )
+    await writer.stop()
+
+    assert len(written[-1]) == 1
+    assert writer.stats()["rows_written"] == 1
+
+
+@pytest.mark.asyncio
+async def test_full_batch_flushes_without_waiting(mock_session, written):
+    writer = MessageWriter(
+        session_factory_for(mock_session), batch_size=2, flush_interval=60
+    )
+    writer.start()
+
+    await asyncio.wait_for(
+        asyncio.gather(
+            writer.write(make_message("m1")), writer.write(make_message("m2"))
+        ),
+        timeout=1,
+    )
+    await writer.stop()
+
+
+@pytest.mark.asyncio
+async def test_handed_off_rows_fill_whole_batches(mock_session, monkeypatch):
+    flushes = []
+
+    async def slow_bulk_upsert(session, entities, on_conflict=None):
+        if entities and isinstance(entities[0], Message):
+            flushes.append(len(entities))
+        await asyncio.sleep(0.002)  # a DB round trip
+
+    monkeypatch.setattr(writer_module, "bulk_upsert", slow_bulk_upsert)
+    # Waiting out the interval on every batch would take 100 x 60s
+    writer = MessageWriter(
+        session_factory_for(mock_session), batch_size=200, flush_interval=60
+    )
+    writer.start()
+
+    async def handle(message_id):
+        await writer.write(make_message(message_id), wait=False)
+
+    queue = IngestQueue(handle, workers=4, maxsize=1000)
+    queue.start()
+    for i in range(400):
+        queue.enqueue(f"m{i}", Priority.NORMAL)
+    await asyncio.wait_for(queue.stop(), timeout=5)
+    await writer.stop()
+
+    assert sum(flushes) == 400
+    # Workers hand rows off, so they pile up into full batches while one is written
+    assert max(flushes) == 200 and len(flushes) <= 10
+    assert queue.stats()["processed"] == 400
+
+
+@pytest.mark.asyncio
+async def test_stop_writes_messages_taken_off_the_queue(mock_session, written):
+    writer = MessageWriter(
+        session_factory_for(mock_session), batch_size=10, flush_interval=60
+    )
+    writer.start()
+    writes = [
+        asyncio.create_task(writer.write(make_message(f"m{i}"))) for i in range(3)
+    ]
+    await asyncio.sleep(0)  # queued
+    await asyncio.sleep(0)  # taken by the collecting loop
+
+    await writer.stop()
+    await asyncio.wait_for(asyncio.gather(*writes), timeout=1)
+
+    assert sorted(m.message_id for m in written[-1]) == ["m0", "m1", "m2"]
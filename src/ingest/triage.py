@@ -0,0 +1,126 @@
+from collections import Counter
+from enum import Enum
+from typing import Any, Dict
+
+from models import group_settings
+from .queue import Priority
+
+# Fields that give an event text, mirroring Message._extract_message_text
+_CAPTION_FIELDS = {
+    "image": "caption",
+    "video": "caption",
+    "audio": "caption",
+    "document": "caption",
+    "sticker": "caption",
+    "contact": "displayName",
+    "location": "name",
+    "list": "title",
+    "order": "message",
+}
+_MEDIA_FIELDS = ("image", "video", "audio", "document", "sticker")
+
+
+class EventKind(str, Enum):
+    TEXT = "text"
+    CAPTIONED = "captioned"
+    MEDIA = "media"
+    REACTION = "reaction"
+    NO_SENDER = "no_sender"
+    OTHER = "other"
+    MALFORMED = "malformed"
+
+
+# Only these kinds produce a stored message; everything else is a no-op downstream
+RELEVANT = frozenset({EventKind.TEXT, EventKind.CAPTIONED})
+# Validated too, so the sender gets the 422 explaining what is wrong
+VALIDATED = RELEVANT | {EventKind.MALFORMED}
+
+
+def triage(event: Any) -> EventKind:
+    """
+    Classify a raw (JSON-decoded) webhook event by looking at a handful of keys,
+    without building the full WhatsAppWebhookPayload.
+    :param event: The decoded request body
+    :return: The event kind; see VALIDATED for the kinds worth validating
+    """
+    if not isinstance(event, dict) or not event.get("from"):
+        return EventKind.NO_SENDER
+    if not isinstance(event["from"], str):
+        return EventKind.MALFORMED
+
+    message = event.get("message")
+    if message is not None and not isinstance(message, dict):
+        return EventKind.MALFORMED
+    if message and message.get("text"):
+        if not isinstance(message["text"], str):
+            return EventKind.MALFORMED
+        return EventKind.TEXT
+
+    for field, caption in _CAPTION_FIELDS.items():
+        content = event.get(field)
+        if isinstance(content, dict) and content.get(caption):
+            if not isinstance(content[caption], str):
+                return EventKind.MALFORMED
+            return EventKind.CAPTIONED
+
+    if event.get("reaction"):
+        return EventKind.REACTION
+    if any(event.get(field) for field in _MEDIA_FIELDS):
+        return EventKind.MEDIA
+    return EventKind.OTHER
+
+
+def prioritize(event: Dict[str, Any], secret_word: str | None = None) -> Priority:
+    """
+    Pick the processing priority of a relevant raw webhook event.
+    Secret-word requests and managed groups go first, chatter in unmanaged groups
+    last. Uses only cached group settings, so groups not seen yet get NORMAL.
+    :param event: The decoded request body, already triaged as worth validating
+    :param secret_word: The configured secret word [Optional]
+    """
+    message = event.get("message")
+    text = message.get("text") if isinstance(message, dict) else None
+    if (
+        secret_word
+        and isinstance(text, str)
+        and text.strip().lower() == secret_word.lower()
+    ):
+        return Priority.HIGH
+
+    sender = event.get("from")
+    if not isinstance(sender, str):
+        # Left to validation to reject
+        return Priority.NORMAL
+    _, _, chat_jid = sender.partition(" in ")
+    if not chat_jid.endswith("@g.us"):
+        return Priority.NORMAL
+    settings = group_settings.peek(chat_jid)
+    if settings is None:
+        return Priority.NORMAL
+    return Priority.HIGH if settings.managed else Priority.LOW
+
+
+class TriageStats:
+    """Counts webhook events per kind, and how many were skipped before validation"""
+
+    def __init__(self):
+        self.kinds: Counter[EventKind] = Counter()
+        self.skipped = 0
+
+    def record(self, kind: EventKind) -> bool:
+        """Count an event and return whether it needs validating"""
+        self.kinds[kind] += 1
+        if kind in VALIDATED:
+            return True
+        self.skipped += 1
+        return False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "events": {kind.value: count for kind, count in self.kinds.items()},
+            "skipped": self.skipped,
+        }
+
+
+# Shared across requests
+triage_stats = TriageStats()
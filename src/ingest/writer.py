@@ -0,0 +1,226 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from models import (
+    Group,
+    Message,
+    OnConflict,
+    Sender,
+    bulk_upsert,
+    known_jids,
+)
+from utils.metrics import LatencyTracker
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _PendingWrite:
+    message: Message
+    sender_pushname: str | None
+    # None when the caller didn't wait for the write
+    done: asyncio.Future | None
+
+    def unsettled(self) -> bool:
+        return self.done is None or not self.done.done()
+
+    def settle(self, error: Exception | None = None) -> None:
+        if self.done is None or self.done.done():
+            return
+        if error is None:
+            self.done.set_result(None)
+        else:
+            self.done.set_exception(error)
+
+
+class MessageWriter:
+    """
+    Group-commit writer for incoming messages.
+
+    Callers hand over a message, and either wait until it is committed or (the
+    ingest path) move on right away. The writer takes every message queued
+    while the previous batch was being written, and keeps taking new ones as
+    long as they keep arriving (up to `flush_interval` seconds or `batch_size`
+    rows). It then writes the senders and groups not known to exist yet and all
+    messages with `bulk_upsert` in a single transaction. Waiting callers are
+    released once their row is committed (or with the error that prevented it);
+    failures of handed-off rows are only logged.
+
+    Handed-off rows pile up while a batch is written, so batches fill up to
+    `batch_size` under load. At most `4 * batch_size` rows wait to be written;
+    beyond that, callers wait for room.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker,
+        batch_size: int = 200,
+        flush_interval: float = 0.05,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: asyncio.Queue[_PendingWrite] = asyncio.Queue(
+            maxsize=4 * batch_size
+        )
+        self._task: asyncio.Task | None = None
+        # Taken off the queue but not yet written, flushed by stop() if cancelled
+        self._batch: List[_PendingWrite] = []
+        self.flush_latency = LatencyTracker()
+        self.rows_written = 0
+        self.flushes = 0
+        self.failed = 0
+        self._flush_seconds = 0.0
+
+    def start(self):
+        """Start the background flush loop"""
+        self._task = asyncio.create_task(self._run(), name="message-writer")
+        logger.info(
+            f"Message writer started (batch_size={self.batch_size}, flush_interval={self.flush_interval}s)"
+        )
+
+    async def stop(self):
+        """Stop the flush loop and write whatever is still pending"""
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        batch, self._batch = self._batch, []
+        await self._flush([p for p in batch if p.unsettled()])
+        while not self._queue.empty():
+            await self._flush(self._drain(self.batch_size))
+
+    async def write(
+        self,
+        message: Message,
+        sender_pushname: str | None = None,
+        wait: bool = True,
+    ) -> None:
+        """
+        Queue a message for the next batch.
+        :param message: The message to store
+        :param sender_pushname: Pushname of the sender, used if the sender is new [Optional]
+        :param wait: Wait until the message is durable, rather than only until it is queued
+        """
+        done = asyncio.get_running_loop().create_future() if wait else None
+        await self._queue.put(_PendingWrite(message, sender_pushname, done))
+        if done is not None:
+            await done
+
+    def _drain(self, limit: int) -> List[_PendingWrite]:
+        batch = []
+        while len(batch) < limit and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _collect(self) -> List[_PendingWrite]:
+        self._batch = [await self._queue.get()]
+        deadline = time.perf_counter() + self.flush_interval
+        while len(self._batch) < self.batch_size:
+            self._batch.extend(self._drain(self.batch_size - len(self._batch)))
+            if time.perf_counter() >= deadline:
+                break
+            # Let callers that are about to queue a message do so
+            await asyncio.sleep(0)
+            if self._queue.empty():
+                break
+        return self._batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            await self._flush(batch)
+            self._batch = []
+
+    async def _flush(self, batch: List[_PendingWrite], retry: bool = True):
+        if not batch:
+            return
+
+        started = time.perf_counter()
+        try:
+            rows = await self._write_batch(batch)
+        except Exception as e:
+            # A cached sender/group may be gone; make the retry insert them again
+            known_jids.discard(
+                [p.message.sender_jid for p in batch],
+                [p.message.group_jid for p in batch if p.message.group_jid],
+            )
+            if not retry:
+                self.failed += 1
+                logger.error(
+                    f"Error writing message {batch[0].message.message_id}: {e}"
+                )
+                batch[0].settle(e)
+                return
+            # Retry row by row so one bad message only fails its own caller
+            logger.warning(
+                f"Batch write of {len(batch)} messages failed, retrying individually: {e}"
+            )
+            for pending in batch:
+                await self._flush([pending], retry=False)
+            return
+
+        elapsed = self.flush_latency.since(started)
+        self._flush_seconds += elapsed
+        self.rows_written += rows
+        self.flushes += 1
+        for pending in batch:
+            pending.settle()
+
+    async def _write_batch(self, batch: List[_PendingWrite]) -> int:
+        # Last write wins for duplicate deliveries within the same batch
+        messages: Dict[str, Message] = {p.message.message_id: p.message for p in batch}
+        pushnames: Dict[str, str | None] = {}
+        for p in batch:
+            if not pushnames.get(p.message.sender_jid):
+                pushnames[p.message.sender_jid] = p.sender_pushname
+        group_jids = {m.group_jid for m in messages.values() if m.group_jid}
+
+        new_senders = [jid for jid in pushnames if not known_jids.has_sender(jid)]
+        new_groups = [jid for jid in group_jids if not known_jids.has_group(jid)]
+
+        async with self.session_factory() as session:
+            try:
+                # Existing senders and groups are left untouched
+                await bulk_upsert(
+                    session,
+                    [
+                        Sender.model_validate({"jid": jid, "push_name": pushnames[jid]})
+                        for jid in new_senders
+                    ],
+                    OnConflict.NOTHING,
+                )
+                await bulk_upsert(
+                    session,
+                    [Group.model_validate({"group_jid": jid}) for jid in new_groups],
+                    OnConflict.NOTHING,
+                )
+                await bulk_upsert(session, list(messages.values()))
+                await session.commit()
+            except Exception:
+                await session.rollback()
+                raise
+
+        known_jids.add_senders(new_senders)
+        known_jids.add_groups(new_groups)
+        return len(messages)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": self._queue.qsize(),
+            "rows_written": self.rows_written,
+            "flushes": self.flushes,
+            "failed": self.failed,
+            "avg_batch_size": round(self.rows_written / self.flushes, 2)
+            if self.flushes
+            else 0,
+            "rows_per_sec": round(self.rows_written / self._flush_seconds, 1)
+            if self._flush_seconds
+            else 0,
+            "flush_latency": self.flush_latency.snapshot(),
+        }
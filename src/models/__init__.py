@@ -1,7 +1,17 @@
 from .group import Group, BaseGroup
+from .group_settings import GroupSettings, GroupSettingsCache, group_settings
+from .known_jids import KnownJIDCache, known_jids
 from .message import Message, BaseMessage
+from .partial_summary import PartialSummary
 from .sender import Sender, BaseSender
-from .upsert import upsert, bulk_upsert
+from .summary_job import SummaryJob, SummaryJobStatus
+from .transcript import (
+    TranscriptLine,
+    stream_transcript,
+    transcript_fingerprint_query,
+    transcript_query,
+)
+from .upsert import upsert, bulk_upsert, OnConflict, UpsertResult, upsert_stats
 from .webhook import WhatsAppWebhookPayload
 
 __all__ = [
@@ -9,9 +19,24 @@ __all__ = [
     "BaseGroup",
     "Message",
     "BaseMessage",
+    "PartialSummary",
     "Sender",
     "BaseSender",
+    "SummaryJob",
+    "SummaryJobStatus",
+    "TranscriptLine",
+    "stream_transcript",
+    "transcript_query",
+    "transcript_fingerprint_query",
     "WhatsAppWebhookPayload",
+    "GroupSettings",
+    "GroupSettingsCache",
+    "group_settings",
+    "KnownJIDCache",
+    "known_jids",
     "upsert",
     "bulk_upsert",
+    "OnConflict",
+    "UpsertResult",
+    "upsert_stats",
 ]
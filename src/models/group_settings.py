@@ -0,0 +1,150 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict
+
+import asyncpg
+from cachetools import TTLCache
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from .group import Group
+
+logger = logging.getLogger(__name__)
+
+# Channel notified by the group_settings_changed trigger, payload is the group_jid
+NOTIFY_CHANNEL = "group_settings_changed"
+
+
+@dataclass(frozen=True, slots=True)
+class GroupSettings:
+    """The per-group flags that decide how incoming messages are routed"""
+
+    managed: bool
+    forward_url: str | None
+    notify_on_spam: bool
+
+
+class GroupSettingsCache:
+    """
+    In-process cache of group routing settings.
+
+    Entries are invalidated through Postgres LISTEN/NOTIFY, so flags changed by
+    hand in the database take effect within seconds. The TTL bounds staleness
+    while the listener is (re)connecting.
+    """
+
+    def __init__(self, ttl: float = 300, heartbeat: float = 30):
+        self.configure(ttl)
+        self.heartbeat = heartbeat
+        self.listening = False
+        self._task: asyncio.Task | None = None
+
+    def configure(self, ttl: float) -> None:
+        """Change the entry TTL, dropping all entries"""
+        self._settings: TTLCache = TTLCache(maxsize=10_000, ttl=ttl)
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._generation = 0
+
+    async def get(self, session: AsyncSession, group_jid: str) -> GroupSettings | None:
+        """
+        Get the settings of a group, loading them on a cache miss.
+        :param session: Session used to load missing entries
+        :param group_jid: The group to look up
+        :return: The group settings, or None if the group does not exist
+        """
+        settings = self._settings.get(group_jid)
+        if settings is not None:
+            self.hits += 1
+            return settings
+
+        self.misses += 1
+        generation = self._generation
+        row = (
+            await session.exec(
+                select(Group.managed, Group.forward_url, Group.notify_on_spam).where(
+                    Group.group_jid == group_jid
+                )
+            )
+        ).first()
+        if row is None:
+            return None
+
+        settings = GroupSettings(*row)
+        # Don't cache a row that was invalidated while we were loading it
+        if generation == self._generation:
+            self._settings[group_jid] = settings
+        return settings
+
+    def peek(self, group_jid: str) -> GroupSettings | None:
+        """Cached settings of a group, without loading them or counting a lookup"""
+        return self._settings.get(group_jid)
+
+    def invalidate(self, group_jid: str | None = None) -> None:
+        """Drop one group's settings, or all of them"""
+        self.invalidations += 1
+        self._generation += 1
+        if group_jid is None:
+            self._settings.clear()
+        else:
+            self._settings.pop(group_jid, None)
+
+    def _on_notify(self, connection, pid, channel, payload):
+        self.invalidate(payload or None)
+
+    def start(self, dsn: str):
+        """Start listening for group setting changes on a dedicated connection"""
+        self._task = asyncio.create_task(
+            self._listen(dsn), name="group-settings-listener"
+        )
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _listen(self, dsn: str):
+        while True:
+            try:
+                conn = await asyncpg.connect(dsn)
+                try:
+                    await conn.add_listener(NOTIFY_CHANNEL, self._on_notify)
+                    # Anything cached before we started listening may be stale
+                    self.invalidate()
+                    self.listening = True
+                    logger.info(
+                        f"Listening for group setting changes on {NOTIFY_CHANNEL}"
+                    )
+                    while True:
+                        await asyncio.sleep(self.heartbeat)
+                        await asyncio.wait_for(
+                            conn.fetchval("SELECT 1"), self.heartbeat
+                        )
+                finally:
+                    self.listening = False
+                    await conn.close(timeout=5)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Group settings listener disconnected: {e}")
+            # Notifications may have been missed while disconnected
+            self.invalidate()
+            await asyncio.sleep(5)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._settings),
+            "listening": self.listening,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0,
+            "invalidations": self.invalidations,
+        }
+
+
+# Shared across requests and ingest workers
+group_settings = GroupSettingsCache()
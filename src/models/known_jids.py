@@ -0,0 +1,71 @@
+from typing import Any, Dict, Iterable
+
+from cachetools import LRUCache
+
+
+class KnownJIDCache:
+    """
+    Bounded LRU of sender and group JIDs known to exist in the database.
+
+    Lets message storage skip the foreign-key existence checks for senders and
+    groups it has already seen. Entries are only hints: when a cached row turns
+    out to be gone (the insert fails on its foreign key), callers discard the
+    JIDs and fall back to checking the database.
+    """
+
+    def __init__(self, maxsize: int = 10_000):
+        self.configure(maxsize)
+
+    def configure(self, maxsize: int) -> None:
+        """Resize the cache, dropping all entries"""
+        self._senders: LRUCache = LRUCache(maxsize=maxsize)
+        self._groups: LRUCache = LRUCache(maxsize=maxsize)
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, cache: LRUCache, jid: str) -> bool:
+        # get() (unlike `in`) refreshes the entry's LRU position
+        if cache.get(jid):
+            self.hits += 1
+            return True
+        self.misses += 1
+        return False
+
+    def has_sender(self, jid: str) -> bool:
+        return self._lookup(self._senders, jid)
+
+    def has_group(self, jid: str) -> bool:
+        return self._lookup(self._groups, jid)
+
+    def add_senders(self, jids: Iterable[str]) -> None:
+        for jid in jids:
+            self._senders[jid] = True
+
+    def add_groups(self, jids: Iterable[str]) -> None:
+        for jid in jids:
+            self._groups[jid] = True
+
+    def discard(self, sender_jids: Iterable[str], group_jids: Iterable[str]) -> None:
+        for jid in sender_jids:
+            self._senders.pop(jid, None)
+        for jid in group_jids:
+            self._groups.pop(jid, None)
+
+    def clear(self) -> None:
+        self._senders.clear()
+        self._groups.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "senders": len(self._senders),
+            "groups": len(self._groups),
+            "max_size": self._senders.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0,
+        }
+
+
+# Shared across requests and ingest workers
+known_jids = KnownJIDCache()
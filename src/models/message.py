@@ -2,6 +2,7 @@ from datetime import datetime, timezone
 from typing import TYPE_CHECKING, List, Optional
 
 from pydantic import field_validator, model_validator
+from sqlalchemy import Index
 from sqlmodel import Field, Relationship, SQLModel, Column, DateTime
 
 from whatsapp.jid import normalize_jid, parse_jid, JID
@@ -37,11 +38,12 @@ class BaseMessage(SQLModel):
             return data
 
         jid = parse_jid(data["chat_jid"])
+        chat_jid = normalize_jid(jid)
 
         if jid.is_group():
-            data["group_jid"] = str(jid.to_non_ad())
+            data["group_jid"] = chat_jid
 
-        data["chat_jid"] = str(jid.to_non_ad())
+        data["chat_jid"] = chat_jid
         return data
 
     @field_validator("group_jid", "sender_jid", mode="before")
@@ -57,6 +59,11 @@ class BaseMessage(SQLModel):
 
 
 class Message(BaseMessage, table=True):
+    __table_args__ = (
+        Index("idx_message_group_jid_timestamp", "group_jid", "timestamp"),
+        Index("idx_message_timestamp_brin", "timestamp", postgresql_using="brin"),
+    )
+
     sender: Optional["Sender"] = Relationship(
         back_populates="messages", sa_relationship_kwargs={"lazy": "selectin"}
     )
@@ -71,6 +78,11 @@ class Message(BaseMessage, table=True):
         }
     )
 
+    @classmethod
+    def from_base(cls, message: BaseMessage) -> "Message":
+        """Table model from an already validated BaseMessage, without validating again."""
+        return cls(**dict(message))
+
     @classmethod
     def from_webhook(cls, payload: WhatsAppWebhookPayload) -> "Message":
         """Create Message instance from WhatsApp webhook payload."""
@@ -86,16 +98,17 @@ class Message(BaseMessage, table=True):
         else:
             sender_jid = chat_jid = payload.from_
 
-        return cls(
-            **BaseMessage(
-                message_id=payload.message.id,
-                text=cls._extract_message_text(payload),
-                chat_jid=chat_jid,
-                sender_jid=sender_jid,
-                timestamp=payload.timestamp,
-                reply_to_id=payload.message.replied_id,
-                media_url=cls._extract_media_url(payload),
-            ).model_dump()
+        # Validate straight into the table model, once
+        return cls.model_validate(
+            {
+                "message_id": payload.message.id,
+                "text": cls._extract_message_text(payload),
+                "chat_jid": chat_jid,
+                "sender_jid": sender_jid,
+                "timestamp": payload.timestamp,
+                "reply_to_id": payload.message.replied_id,
+                "media_url": cls._extract_media_url(payload),
+            }
         )
 
     @staticmethod
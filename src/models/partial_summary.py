@@ -0,0 +1,37 @@
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import UniqueConstraint
+from sqlmodel import Column, DateTime, Field, SQLModel
+
+
+class PartialSummary(SQLModel, table=True):
+    """
+    Summary notes on a group's messages in the window [start_time, end_time).
+
+    Windows are rolled up periodically, each starting where the previous one
+    ended, so a final summary only merges these notes and the messages after
+    the newest window instead of re-reading everything.
+    """
+
+    __tablename__ = "partial_summary"
+    __table_args__ = (
+        UniqueConstraint(
+            "group_jid", "start_time", name="uq_partial_summary_group_jid_start_time"
+        ),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    group_jid: str = Field(max_length=255, foreign_key="group.group_jid")
+    start_time: datetime = Field(
+        sa_column=Column(DateTime(timezone=True), nullable=False)
+    )
+    end_time: datetime = Field(
+        sa_column=Column(DateTime(timezone=True), nullable=False)
+    )
+    message_count: int
+    text: str
+    created_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_column=Column(DateTime(timezone=True), nullable=False),
+    )
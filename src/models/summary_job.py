@@ -0,0 +1,51 @@
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Optional
+
+from sqlmodel import Column, DateTime, Field, Index, SQLModel, text
+
+
+class SummaryJobStatus(str, Enum):
+    pending = "pending"
+    running = "running"
+    succeeded = "succeeded"
+    failed = "failed"
+
+
+# At most one pending or running job of a kind, so concurrent triggers share it
+ACTIVE_JOB = text("status IN ('pending', 'running')")
+
+
+class SummaryJob(SQLModel, table=True):
+    """A background summary run, with its progress, for status queries"""
+
+    __tablename__ = "summary_job"
+    __table_args__ = (
+        Index(
+            "ux_summary_job_active_kind",
+            "kind",
+            unique=True,
+            postgresql_where=ACTIVE_JOB,
+        ),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    kind: str = Field(default="immediate", max_length=32)
+    status: str = Field(
+        default=SummaryJobStatus.pending.value, max_length=16, index=True
+    )
+    requested_by: Optional[str] = Field(default=None, max_length=255)
+    groups_total: int = Field(default=0)
+    groups_done: int = Field(default=0)
+    groups_summarized: int = Field(default=0)
+    error: Optional[str] = Field(default=None)
+    created_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_column=Column(DateTime(timezone=True), nullable=False),
+    )
+    started_at: Optional[datetime] = Field(
+        default=None, sa_column=Column(DateTime(timezone=True), nullable=True)
+    )
+    finished_at: Optional[datetime] = Field(
+        default=None, sa_column=Column(DateTime(timezone=True), nullable=True)
+    )
@@ -0,0 +1,35 @@
+from models import KnownJIDCache
+
+
+def test_lookups_count_hits_and_misses():
+    cache = KnownJIDCache(maxsize=10)
+    assert not cache.has_sender("1234567890@s.whatsapp.net")
+
+    cache.add_senders(["1234567890@s.whatsapp.net"])
+    cache.add_groups(["123456789-123456@g.us"])
+    assert cache.has_sender("1234567890@s.whatsapp.net")
+    assert cache.has_group("123456789-123456@g.us")
+
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = KnownJIDCache(maxsize=2)
+    cache.add_senders(["a@s.whatsapp.net", "b@s.whatsapp.net"])
+    assert cache.has_sender("a@s.whatsapp.net")  # refreshes "a"
+
+    cache.add_senders(["c@s.whatsapp.net"])
+    assert cache.has_sender("a@s.whatsapp.net")
+    assert not cache.has_sender("b@s.whatsapp.net")
+
+
+def test_discard_forgets_deleted_rows():
+    cache = KnownJIDCache()
+    cache.add_senders(["a@s.whatsapp.net"])
+    cache.add_groups(["123456789-123456@g.us"])
+
+    cache.discard(["a@s.whatsapp.net"], ["123456789-123456@g.us"])
+    assert not cache.has_sender("a@s.whatsapp.net")
+    assert not cache.has_group("123456789-123456@g.us")
@@ -2,8 +2,9 @@ from datetime import datetime, timezone
 
 import pytest
 
-from models import Message
+from models import BaseMessage, Message
 from models.webhook import WhatsAppWebhookPayload, ExtractedMedia
+from test_utils.benchmark import allocations, benchmark  # noqa
 from test_utils.mock_session import mock_session  # noqa
 
 
@@ -61,3 +62,59 @@ async def test_message_with_image(mock_session):
 
     message = Message.from_webhook(payload)
     assert message.text == "[[Attached Image]] This is an image"
+
+
+def _webhook_payload() -> WhatsAppWebhookPayload:
+    return WhatsAppWebhookPayload(
+        from_="972501234567.0:3@s.whatsapp.net in 120363000000-1600000000@g.us",
+        timestamp=datetime.now(timezone.utc),
+        pushname="Test User",
+        message={"id": "bench", "text": "hello", "replied_id": "prev"},
+    )
+
+
+def _from_webhook_via_dump(payload: WhatsAppWebhookPayload) -> Message:
+    """The previous construction path: validate a BaseMessage, dump it, build a Message"""
+    sender_jid, chat_jid = payload.from_.split(" in ")
+    return Message(
+        **BaseMessage(
+            message_id=payload.message.id,
+            text=Message._extract_message_text(payload),
+            chat_jid=chat_jid,
+            sender_jid=sender_jid,
+            timestamp=payload.timestamp,
+            reply_to_id=payload.message.replied_id,
+            media_url=Message._extract_media_url(payload),
+        ).model_dump()
+    )
+
+
+def test_from_webhook_matches_previous_path():
+    payload = _webhook_payload()
+
+    assert (
+        Message.from_webhook(payload).model_dump()
+        == _from_webhook_via_dump(payload).model_dump()
+    )
+
+
+@pytest.mark.parametrize(
+    "path",
+    [
+        pytest.param(_from_webhook_via_dump, id="before"),
+        pytest.param(Message.from_webhook, id="after"),
+    ],
+)
+def test_from_webhook_benchmark(benchmark, path):
+    message = benchmark(path, _webhook_payload())
+
+    assert message.group_jid == "120363000000-1600000000@g.us"
+    assert message.sender_jid == "972501234567@s.whatsapp.net"
+
+
+def test_from_webhook_allocates_less_than_dump_round_trip():
+    payload = _webhook_payload()
+
+    after = allocations(Message.from_webhook, payload)
+    before = allocations(_from_webhook_via_dump, payload)
+    assert after["peak_bytes"] < before["peak_bytes"]
@@ -0,0 +1,96 @@
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from models import transcript_query
+
+
+def test_transcript_query_selects_only_needed_columns():
+    sql = str(
+        transcript_query(
+            "123456789-123456@g.us",
+            datetime(2025, 1, 1, tzinfo=timezone.utc),
+            "bot@s.whatsapp.net",
+        ).compile(dialect=postgresql.dialect())
+    )
+
+    columns = sql.split("FROM")[0]
+    assert columns.strip() == (
+        "SELECT message.timestamp, message.sender_jid, message.text"
+    )
+    assert "JOIN" not in sql
+    assert "ORDER BY message.timestamp DESC" in sql
+
+
+# A Postgres database migrated to head; the test seeds it inside a rolled-back transaction
+TEST_DB_URI = os.environ.get("TEST_DB_URI", "")
+
+
+def plan_nodes(plan: dict):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not TEST_DB_URI, reason="TEST_DB_URI is not set")
+async def test_transcript_query_avoids_seq_scan_on_large_table():
+    engine = create_async_engine(
+        TEST_DB_URI.replace("postgresql://", "postgresql+asyncpg://", 1)
+    )
+    try:
+        async with engine.connect() as conn:
+            transaction = await conn.begin()
+            try:
+                # 200k messages over 200 days in 100 groups from 50 senders
+                await conn.execute(
+                    text(
+                        "INSERT INTO sender (jid) SELECT 'seed' || i || '@s.whatsapp.net' "
+                        "FROM generate_series(0, 49) i ON CONFLICT DO NOTHING"
+                    )
+                )
+                await conn.execute(
+                    text(
+                        'INSERT INTO "group" (group_jid, managed, notify_on_spam, last_summary_sync) '
+                        "SELECT 'seed' || i || '@g.us', true, false, now() "
+                        "FROM generate_series(0, 99) i ON CONFLICT DO NOTHING"
+                    )
+                )
+                await conn.execute(
+                    text(
+                        "INSERT INTO message (message_id, timestamp, text, chat_jid, sender_jid, group_jid) "
+                        "SELECT 'seed' || i, now() - (200000 - i) * interval '86 seconds', 'hello', "
+                        "'seed' || (i % 100) || '@g.us', 'seed' || (i % 50) || '@s.whatsapp.net', "
+                        "'seed' || (i % 100) || '@g.us' FROM generate_series(1, 200000) i"
+                    )
+                )
+                await conn.execute(text("ANALYZE message"))
+
+                query = transcript_query(
+                    "seed7@g.us",
+                    datetime.now(timezone.utc) - timedelta(days=1),
+                    "seed0@s.whatsapp.net",
+                )
+                sql = query.compile(
+                    dialect=postgresql.dialect(),
+                    compile_kwargs={"literal_binds": True},
+                )
+                plan = (
+                    await conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"))
+                ).scalar()
+            finally:
+                await transaction.rollback()
+    finally:
+        await engine.dispose()
+
+    scans = [
+        node["Node Type"]
+        for node in plan_nodes(plan[0]["Plan"])
+        if node.get("Relation Name") == "message"
+    ]
+    assert scans, plan
+    assert "Seq Scan" not in scans, plan
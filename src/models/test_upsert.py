@@ -0,0 +1,71 @@
+import pytest
+from sqlalchemy import inspect
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import insert
+
+from handler.base_handler import BaseHandler
+from models import Message, Sender
+from models.upsert import OnConflict, _on_conflict, upsert, upsert_stats
+from test_utils.database import db_session  # noqa
+
+
+def compile_for(on_conflict: OnConflict) -> str:
+    stmt = insert(Sender).values(jid="1234567890@s.whatsapp.net", push_name="Test")
+    stmt = _on_conflict(stmt, Sender, ["jid"], ["push_name"], on_conflict)
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+
+def test_update_rewrites_unconditionally():
+    sql = compile_for(OnConflict.UPDATE)
+    assert "DO UPDATE SET push_name = excluded.push_name" in sql
+    assert "WHERE" not in sql
+
+
+def test_update_changed_skips_identical_rows():
+    sql = compile_for(OnConflict.UPDATE_CHANGED)
+    assert "DO UPDATE SET push_name = excluded.push_name" in sql
+    assert "WHERE sender.push_name IS DISTINCT FROM excluded.push_name" in sql
+
+
+def test_nothing_keeps_stored_row():
+    assert "ON CONFLICT (jid) DO NOTHING" in compile_for(OnConflict.NOTHING)
+
+
+@pytest.mark.asyncio
+async def test_upsert_reports_inserted_updated_and_unchanged_rows(db_session):
+    jid = "972500000099@s.whatsapp.net"
+    before = dict(upsert_stats.stats().get("sender", {}))
+
+    def delta(outcome: str) -> int:
+        return upsert_stats.stats()["sender"][outcome] - before.get(outcome, 0)
+
+    stored = await upsert(db_session, Sender(jid=jid, push_name="Dana"))
+    assert (stored.push_name, delta("inserted")) == ("Dana", 1)
+
+    # IS DISTINCT FROM leaves an identical row alone; it's read back instead
+    stored = await upsert(db_session, Sender(jid=jid, push_name="Dana"))
+    assert (stored.push_name, delta("unchanged")) == ("Dana", 1)
+
+    stored = await upsert(db_session, Sender(jid=jid, push_name="Dana L"))
+    assert (stored.push_name, delta("updated")) == ("Dana L", 1)
+
+
+@pytest.mark.asyncio
+async def test_stored_message_loads_its_relationships_on_access(db_session):
+    handler = BaseHandler(db_session, whatsapp=None)
+    message = Message.model_validate(
+        {
+            "message_id": "upsert-relationships",
+            "text": "hello",
+            "chat_jid": "120363000000-1600000099@g.us",
+            "sender_jid": "972500000098@s.whatsapp.net",
+        }
+    )
+
+    stored = await handler.store_message(message, sender_pushname="Noa")
+
+    # Not loaded eagerly, but not blocked from loading either
+    assert {"sender", "group"} <= inspect(stored).unloaded
+    await db_session.refresh(stored, ["sender", "group"])
+    assert stored.sender.push_name == "Noa"
+    assert stored.group.group_jid == "120363000000-1600000099@g.us"
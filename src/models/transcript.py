@@ -0,0 +1,106 @@
+from datetime import datetime
+from typing import AsyncIterator, NamedTuple
+
+from sqlalchemy import func
+from sqlmodel import desc, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from .message import Message
+
+
+class TranscriptLine(NamedTuple):
+    """The only message columns a chat transcript needs"""
+
+    timestamp: datetime
+    sender_jid: str
+    text: str | None
+
+
+def _in_transcript(
+    query,
+    group_jid: str,
+    since: datetime,
+    exclude_sender_jid: str,
+    until: datetime | None,
+):
+    query = (
+        query.where(Message.group_jid == group_jid)
+        .where(Message.timestamp >= since)
+        .where(Message.sender_jid != exclude_sender_jid)
+    )
+    if until is not None:
+        query = query.where(Message.timestamp < until)
+    return query
+
+
+def transcript_query(
+    group_jid: str,
+    since: datetime,
+    exclude_sender_jid: str,
+    until: datetime | None = None,
+):
+    """Column-only select of a group's messages since `since` (and before `until`), newest first"""
+    return _in_transcript(
+        select(Message.timestamp, Message.sender_jid, Message.text),
+        group_jid,
+        since,
+        exclude_sender_jid,
+        until,
+    ).order_by(desc(Message.timestamp))
+
+
+def transcript_fingerprint_query(
+    group_jid: str,
+    since: datetime,
+    exclude_sender_jid: str,
+    until: datetime | None,
+    split: datetime,
+):
+    """
+    A single row identifying the messages `transcript_query` would return:
+    the newest message ID, the number of messages, and how many of them are
+    at or after `split`. No row if there are no messages.
+    """
+    return (
+        _in_transcript(
+            select(
+                Message.message_id,
+                func.count().over(),
+                func.count().filter(Message.timestamp >= split).over(),
+            ),
+            group_jid,
+            since,
+            exclude_sender_jid,
+            until,
+        )
+        .order_by(desc(Message.timestamp))
+        .limit(1)
+    )
+
+
+async def stream_transcript(
+    session: AsyncSession,
+    group_jid: str,
+    since: datetime,
+    exclude_sender_jid: str,
+    until: datetime | None = None,
+    batch_size: int = 1000,
+) -> AsyncIterator[TranscriptLine]:
+    """
+    Stream a group's transcript lines through a server-side cursor.
+    No ORM entities or relationship loads are involved, and at most
+    `batch_size` rows are buffered at a time however long the transcript is.
+    :param session: Session to read with
+    :param group_jid: The group to read
+    :param since: Only messages at or after this time
+    :param exclude_sender_jid: Sender to leave out (the bot itself)
+    :param until: Only messages before this time [Optional]
+    :param batch_size: Rows fetched per round trip
+    """
+    result = await session.stream(
+        transcript_query(group_jid, since, exclude_sender_jid, until).execution_options(
+            yield_per=batch_size
+        )
+    )
+    async for row in result:
+        yield TranscriptLine(*row)
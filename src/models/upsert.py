@@ -1,44 +1,144 @@
-from typing import List
-
-from sqlalchemy.dialects.postgresql import insert
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from enum import Enum
+from typing import Any, Dict, List
+
+from sqlalchemy import Boolean, literal_column, or_
+from sqlalchemy.dialects.postgresql import Insert, insert
+from sqlalchemy.orm import lazyload
 from sqlmodel import SQLModel, select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 
-async def upsert(session: AsyncSession, entity: SQLModel):
-    # Split fields into primary keys and values
-    pkeys, vals = {}, {}
-    for f in entity.__table__.columns:
-        (pkeys if f.primary_key else vals)[f.name] = getattr(entity, f.name)
+class OnConflict(str, Enum):
+    """What to do when the primary key already exists"""
+
+    # Rewrite every non-key column, even if nothing changed
+    UPDATE = "update"
+    # Rewrite only when at least one column IS DISTINCT FROM the stored value
+    UPDATE_CHANGED = "update_changed"
+    # Keep the stored row as is
+    NOTHING = "nothing"
+
+
+@dataclass
+class UpsertResult:
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+
+    def add(self, other: "UpsertResult") -> None:
+        self.inserted += other.inserted
+        self.updated += other.updated
+        self.unchanged += other.unchanged
+
+
+class UpsertStats:
+    """Running totals of upsert outcomes per table"""
+
+    def __init__(self):
+        self._tables: Dict[str, UpsertResult] = defaultdict(UpsertResult)
+
+    def record(self, table: str, result: UpsertResult) -> None:
+        self._tables[table].add(result)
+
+    def stats(self) -> Dict[str, Any]:
+        return {table: asdict(result) for table, result in self._tables.items()}
+
+
+upsert_stats = UpsertStats()
+
+# True when RETURNING reports a freshly inserted row, False for an updated one
+_inserted = literal_column("xmax = 0", Boolean).label("inserted")
+
 
-    # Create insert statement
-    stmt = insert(entity.__class__).values(**{**pkeys, **vals})
+def _on_conflict(stmt: Insert, model, pkeys, vals, on_conflict: OnConflict) -> Insert:
+    if on_conflict == OnConflict.NOTHING or not vals:
+        return stmt.on_conflict_do_nothing(index_elements=list(pkeys))
 
-    # Create on_conflict_do_update statement
-    stmt = stmt.on_conflict_do_update(
-        index_elements=list(pkeys.keys()),  # Convert keys to list
+    where = None
+    if on_conflict == OnConflict.UPDATE_CHANGED:
+        table = model.__table__
+        where = or_(*[table.c[k].is_distinct_from(stmt.excluded[k]) for k in vals])
+
+    return stmt.on_conflict_do_update(
+        index_elements=list(pkeys),
         set_={
             k: stmt.excluded[k]  # Use excluded to reference values from INSERT
-            for k in vals.keys()  # Only update non-primary key columns
+            for k in vals  # Only update non-primary key columns
         },
+        where=where,
     )
 
-    await session.exec(stmt)
 
-    # Query for the updated instance
-    select_stmt = select(entity.__class__).where(
-        *[getattr(entity.__class__, k) == v for k, v in pkeys.items()]
-    )
-    db_instance = await session.exec(select_stmt)
-    result = db_instance.first()
+async def upsert(
+    session: AsyncSession,
+    entity: SQLModel,
+    load_relationships: bool = True,
+    on_conflict: OnConflict = OnConflict.UPDATE_CHANGED,
+):
+    """
+    Insert or update an entity and return the stored row.
+    The row comes back via RETURNING in the same round trip; only when the
+    conflict left the row untouched is it read back separately.
+    :param session: The session to execute in
+    :param entity: The entity to upsert
+    :param load_relationships: Whether to eagerly load the model's relationships
+        on the returned instance; with False they are left to load on access
+    :param on_conflict: How to handle an existing row with the same primary key
+    :return: The persisted instance
+    """
+    model = entity.__class__
 
-    # Merge the instance into the session
-    return result
+    # Split fields into primary keys and values
+    pkeys, vals = {}, {}
+    for f in entity.__table__.columns:
+        (pkeys if f.primary_key else vals)[f.name] = getattr(entity, f.name)
 
+    # Create insert statement, returning the resulting row
+    stmt = insert(model).values(**{**pkeys, **vals})
+    stmt = _on_conflict(stmt, model, pkeys, vals, on_conflict).returning(
+        model, _inserted
+    )
 
-async def bulk_upsert(session: AsyncSession, entities: List[SQLModel]):
+    options = [] if load_relationships else [lazyload("*")]
+    query = (
+        select(model, _inserted)
+        .from_statement(stmt)
+        .options(*options)
+        .execution_options(populate_existing=True)
+    )
+    row = (await session.exec(query)).first()
+
+    if row is None:
+        upsert_stats.record(model.__tablename__, UpsertResult(unchanged=1))
+        key = tuple(pkeys.values())
+        return await session.get(
+            model, key[0] if len(key) == 1 else key, options=options
+        )
+
+    instance, inserted = row
+    upsert_stats.record(
+        model.__tablename__,
+        UpsertResult(inserted=1) if inserted else UpsertResult(updated=1),
+    )
+    return instance
+
+
+async def bulk_upsert(
+    session: AsyncSession,
+    entities: List[SQLModel],
+    on_conflict: OnConflict = OnConflict.UPDATE_CHANGED,
+) -> UpsertResult:
+    """
+    Insert or update many entities of the same model in one statement.
+    :param session: The session to execute in
+    :param entities: The entities to upsert; primary keys must be unique
+    :param on_conflict: How to handle existing rows with the same primary key
+    :return: How many rows were inserted, updated or left unchanged
+    """
     if not entities:
-        return None
+        return UpsertResult()
 
     # Get the first entity to determine the model class and structure
     entity_class = entities[0].__class__
@@ -47,7 +147,8 @@ async def bulk_upsert(session: AsyncSession, entities: List[SQLModel]):
     values_list = []
     # Get structure from first entity
     first_entity = entities[0]
-    pkeys = {f.name for f in first_entity.__table__.columns if f.primary_key}
+    pkeys = [f.name for f in first_entity.__table__.columns if f.primary_key]
+    vals = [f.name for f in first_entity.__table__.columns if not f.primary_key]
 
     for entity in entities:
         row_data = {}
@@ -57,15 +158,16 @@ async def bulk_upsert(session: AsyncSession, entities: List[SQLModel]):
 
     # Create bulk insert statement
     stmt = insert(entity_class).values(values_list)
-
-    # Create on_conflict_do_update statement
-    stmt = stmt.on_conflict_do_update(
-        index_elements=list(pkeys),
-        set_={
-            col.name: stmt.excluded[col.name]
-            for col in entity_class.__table__.columns
-            if not col.primary_key
-        },
+    stmt = _on_conflict(stmt, entity_class, pkeys, vals, on_conflict).returning(
+        _inserted
     )
 
-    return await session.exec(stmt)
+    returned = (await session.exec(stmt)).scalars().all()
+    inserted = sum(1 for was_inserted in returned if was_inserted)
+    result = UpsertResult(
+        inserted=inserted,
+        updated=len(returned) - inserted,
+        unchanged=len(values_list) - len(returned),
+    )
+    upsert_stats.record(entity_class.__tablename__, result)
+    return result
@@ -3,31 +3,66 @@ import logging
 from datetime import datetime, time
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from summarize_and_send_to_groups import send_daily_summaries_to_monitor
+from summarize_and_send_to_groups import (
+    roll_up_partials,
+    send_daily_summaries_to_monitor,
+)
 from whatsapp import WhatsAppClient
 
 logger = logging.getLogger(__name__)
 
 
 class DailySummaryScheduler:
-    def __init__(self, session_factory, whatsapp: WhatsAppClient, monitor_phone: str):
+    def __init__(
+        self,
+        session_factory,
+        whatsapp: WhatsAppClient,
+        monitor_phone: str,
+        concurrency: int = 4,
+        partial_interval: float = 60,
+        partial_min_messages: int = 50,
+    ):
         self.session_factory = session_factory
         self.whatsapp = whatsapp
         self.monitor_phone = monitor_phone
+        self.concurrency = concurrency
+        self.partial_interval = partial_interval
+        self.partial_min_messages = partial_min_messages
         self.scheduler = AsyncIOScheduler()
+        self.last_run: dict | None = None
+        self.last_roll_up: dict | None = None
 
     async def send_daily_summaries_job(self):
         """Job function that gets executed daily at 22:00"""
         logger.info("Starting daily summary job")
         try:
-            async with self.session_factory() as session:
-                await send_daily_summaries_to_monitor(session, self.whatsapp, self.monitor_phone)
+            self.last_run = await send_daily_summaries_to_monitor(
+                self.session_factory,
+                self.whatsapp,
+                self.monitor_phone,
+                self.concurrency,
+            )
+            self.last_run["finished_at"] = datetime.now().isoformat()
             logger.info("Daily summary job completed successfully")
         except Exception as e:
             logger.error(f"Error in daily summary job: {e}")
 
+    async def roll_up_partials_job(self):
+        """Job function that extends the partial summaries of managed groups"""
+        try:
+            self.last_roll_up = await roll_up_partials(
+                self.session_factory,
+                self.whatsapp,
+                self.partial_min_messages,
+                self.concurrency,
+            )
+            self.last_roll_up["finished_at"] = datetime.now().isoformat()
+        except Exception as e:
+            logger.error(f"Error in partial summary job: {e}")
+
     def start(self):
         """Start the scheduler with daily job at 22:00"""
         self.scheduler.add_job(
@@ -37,6 +72,16 @@ class DailySummaryScheduler:
             name='Daily Group Summaries',
             replace_existing=True
         )
+        if self.partial_interval > 0:
+            self.scheduler.add_job(
+                self.roll_up_partials_job,
+                IntervalTrigger(minutes=self.partial_interval),
+                id="partial_summaries",
+                name="Partial Group Summaries",
+                replace_existing=True,
+                max_instances=1,
+                coalesce=True,
+            )
         self.scheduler.start()
         logger.info("Daily summary scheduler started - will run at 22:00 every day")
 
@@ -45,6 +90,13 @@ class DailySummaryScheduler:
         self.scheduler.shutdown()
         logger.info("Daily summary scheduler stopped")
 
+    def stats(self) -> dict:
+        return {
+            "concurrency": self.concurrency,
+            "last_run": self.last_run,
+            "last_roll_up": self.last_roll_up,
+        }
+
     async def trigger_manual_summary(self):
         """Manually trigger the daily summary (for testing or manual execution)"""
         logger.info("Manually triggering daily summary")
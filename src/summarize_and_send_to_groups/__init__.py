@@ -1,91 +1,147 @@
 import asyncio
 import logging
-from datetime import datetime
+import time
 
-from pydantic_ai import Agent
-from pydantic_ai.agent import AgentRunResult
-from sqlmodel import select, desc
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlmodel import select, update
 from sqlmodel.ext.asyncio.session import AsyncSession
-from tenacity import (
-    retry,
-    wait_random_exponential,
-    stop_after_attempt,
-    before_sleep_log,
-)
-
-from models import Group, Message
-from utils.chat_text import chat2text
+
+from models import Group
 from whatsapp import WhatsAppClient, SendMessageRequest
+from .batching import SummaryBatcher, summary_batcher
+from .cache import SummaryCache, summary_cache
+from .immediate import immediate_message, immediate_summary
+from .jobs import SummaryJobRunner
+from .llm import summarize
+from .partials import roll_up_partials, summarize_current_window, summarize_window
+from .pipeline import SummaryPipeline, summary_pipeline
+from .single_flight import SingleFlight, summary_flights
 
 logger = logging.getLogger(__name__)
 
-
-@retry(
-    wait=wait_random_exponential(min=1, max=30),
-    stop=stop_after_attempt(6),
-    before_sleep=before_sleep_log(logger, logging.DEBUG),
-    reraise=True,
-)
-async def summarize(group_name: str, messages: list[Message]) -> AgentRunResult[str]:
-    agent = Agent(
-        model="anthropic:claude-4-sonnet-20250514",
-        system_prompt=f""""
-        Write a quick summary of what happened in the chat group since the last summary.
-        
-        - Start by stating this is a quick summary of what happened in "{group_name}" group recently.
-        - Use a casual conversational writing style.
-        - Keep it short and sweet.
-        - Write in the same language as the chat group. You MUST use the same language as the chat group!
-        - Please do tag users while talking about them (e.g., @972536150150). ONLY answer with the new phrased query, no other text.
-        """,
-        output_type=str,
-    )
-
-    return await agent.run(chat2text(messages))
-
-
-async def summarize_group(session, whatsapp: WhatsAppClient, group: Group) -> str | None:
+__all__ = [
+    "SingleFlight",
+    "SummaryBatcher",
+    "SummaryCache",
+    "SummaryJobRunner",
+    "SummaryPipeline",
+    "roll_up_partials",
+    "send_daily_summaries_to_monitor",
+    "send_immediate_summaries_to_monitor",
+    "summarize",
+    "summarize_and_send_to_groups",
+    "summarize_group",
+    "summarize_groups",
+    "summarize_window",
+    "summary_batcher",
+    "summary_cache",
+    "summary_flights",
+    "summary_pipeline",
+]
+
+
+async def summarize_group(
+    session, whatsapp: WhatsAppClient, group: Group
+) -> str | None:
     """Generate summary for a single group"""
-    resp = await session.exec(
-        select(Message)
-        .where(Message.group_jid == group.group_jid)
-        .where(Message.timestamp >= group.last_summary_sync)
-        .where(Message.sender_jid != (await whatsapp.get_my_jid()).normalize_str())
-        .order_by(desc(Message.timestamp))
-    )
-    messages: list[Message] = resp.all()
-
-    if len(messages) < 15:
-        logging.info("Not enough messages to summarize in group %s", group.group_name)
-        return None
-
     try:
-        response = await summarize(group.group_name or "group", messages)
-
-        # Update the group with the new last_summary_sync
-        group.last_summary_sync = datetime.now()
-        session.add(group)
-        await session.commit()
-
-        return f"📱 *{group.group_name or 'Unknown Group'}*\n{response.data}\n\n"
+        return await _summarize_group(session, whatsapp, group)
     except Exception as e:
         logging.error("Error summarizing group %s: %s", group.group_name, e)
         return None
 
 
-async def send_daily_summaries_to_monitor(session, whatsapp: WhatsAppClient, monitor_phone: str):
-    """Send all group summaries to a single monitoring phone number"""
-    groups = await session.exec(select(Group).where(Group.managed == True))  # noqa: E712
+async def _summarize_group(
+    session, whatsapp: WhatsAppClient, group: Group
+) -> str | None:
+    window = await summarize_current_window(
+        session, group, (await whatsapp.get_my_jid()).normalize_str(), min_messages=15
+    )
+    if window is None:
+        logging.info("Group %s was summarized by another worker", group.group_name)
+        return None
+    run = window.run
+    if run is None:
+        logging.info("Not enough messages to summarize in group %s", group.group_name)
+        return None
 
-    summaries = []
-    for group in list(groups.all()):
-        summary = await summarize_group(session, whatsapp, group)
-        if summary:
-            summaries.append(summary)
+    # Update the group with the new last_summary_sync (naive local time)
+    group.last_summary_sync = window.until.replace(tzinfo=None)
+    await session.exec(
+        update(Group)
+        .where(Group.group_jid == group.group_jid)
+        .values(last_summary_sync=group.last_summary_sync)
+    )
+    await session.commit()
+
+    return f"📱 *{group.group_name or 'Unknown Group'}*\n{run.text}\n\n"
+
+
+async def summarize_groups(
+    session_factory: async_sessionmaker,
+    whatsapp: WhatsAppClient,
+    groups: list[Group],
+    concurrency: int = 4,
+) -> list[str]:
+    """
+    Summarize groups concurrently, at most `concurrency` at a time.
+    Each group uses its own session and commits its own last_summary_sync, so a
+    failing group doesn't affect the others.
+    :return: The summaries generated, in the order of `groups`
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def summarize_one(group: Group) -> str | None:
+        async with semaphore, session_factory() as session:
+            try:
+                return await summarize_group(session, whatsapp, group)
+            except Exception as e:
+                logging.error("Error summarizing group %s: %s", group.group_name, e)
+                return None
+
+    results = await asyncio.gather(*(summarize_one(group) for group in groups))
+    return [summary for summary in results if summary]
+
+
+async def send_daily_summaries_to_monitor(
+    session_factory: async_sessionmaker,
+    whatsapp: WhatsAppClient,
+    monitor_phone: str,
+    concurrency: int = 4,
+) -> dict:
+    """
+    Send all group summaries to a single monitoring phone number
+    :return: Run stats: groups, summaries, LLM calls saved by batching small groups and wall-clock seconds
+    """
+    started = time.perf_counter()
+    calls_saved = summary_batcher.calls_saved
+    async with session_factory() as session:
+        groups = (
+            await session.exec(select(Group).where(Group.managed == True))  # noqa: E712
+        ).all()
+
+    summaries = await summarize_groups(
+        session_factory, whatsapp, list(groups), concurrency
+    )
+
+    run = {
+        "groups": len(groups),
+        "summaries": len(summaries),
+        "calls_saved": summary_batcher.calls_saved - calls_saved,
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+    logging.info(
+        "Summarized %d of %d groups in %.1fs (concurrency %d, %d LLM calls saved by batching)",
+        run["summaries"],
+        run["groups"],
+        run["seconds"],
+        concurrency,
+        run["calls_saved"],
+    )
 
     if not summaries:
         logging.info("No summaries generated for any groups")
-        return
+        return run
 
     full_message = "🌟 *Daily Group Summaries*\n\n" + "\n".join(summaries)
 
@@ -96,44 +152,33 @@ async def send_daily_summaries_to_monitor(session, whatsapp: WhatsAppClient, mon
         logging.info(f"Daily summaries sent to {monitor_phone}")
     except Exception as e:
         logging.error(f"Error sending daily summaries to {monitor_phone}: {e}")
+    return run
 
 
-async def send_immediate_summaries_to_monitor(session, whatsapp: WhatsAppClient, monitor_phone: str, requesting_jid: str):
+async def send_immediate_summaries_to_monitor(
+    session, whatsapp: WhatsAppClient, monitor_phone: str, requesting_jid: str
+):
     """Send immediate summaries triggered by secret word"""
     groups = await session.exec(select(Group).where(Group.managed == True))  # noqa: E712
 
+    my_jid = (await whatsapp.get_my_jid()).normalize_str()
+
     summaries = []
     for group in list(groups.all()):
         # For immediate summaries, don't update last_summary_sync - just generate summary
-        resp = await session.exec(
-            select(Message)
-            .where(Message.group_jid == group.group_jid)
-            .where(Message.timestamp >= group.last_summary_sync)
-            .where(Message.sender_jid != (await whatsapp.get_my_jid()).normalize_str())
-            .order_by(desc(Message.timestamp))
-        )
-        messages: list[Message] = resp.all()
-
-        if len(messages) < 5:  # Lower threshold for immediate summaries
-            logging.info("Not enough messages for immediate summary in group %s", group.group_name)
-            continue
-
-        try:
-            response = await summarize(group.group_name or "group", messages)
-            summaries.append(f"📱 *{group.group_name or 'Unknown Group'}*\n{response.data}\n\n")
-        except Exception as e:
-            logging.error("Error generating immediate summary for group %s: %s", group.group_name, e)
+        summary = await immediate_summary(session, group, my_jid)
+        if summary:
+            summaries.append(summary)
 
-    if not summaries:
-        message = "📋 *Immediate Summary Request*\n\nNo new messages found in any managed groups since last daily summary."
-    else:
-        message = "📋 *Immediate Summary Request*\n\n" + "\n".join(summaries)
+    message = immediate_message(summaries)
 
     try:
         await whatsapp.send_message(
             SendMessageRequest(phone=monitor_phone, message=message)
         )
-        logging.info(f"Immediate summaries sent to {monitor_phone} (requested by {requesting_jid})")
+        logging.info(
+            f"Immediate summaries sent to {monitor_phone} (requested by {requesting_jid})"
+        )
     except Exception as e:
         logging.error(f"Error sending immediate summaries to {monitor_phone}: {e}")
 
@@ -142,4 +187,6 @@ async def send_immediate_summaries_to_monitor(session, whatsapp: WhatsAppClient,
 async def summarize_and_send_to_groups(session: AsyncSession, whatsapp: WhatsAppClient):
     """Legacy function - now used for manual triggering of daily summaries"""
     # This would need the monitor phone to be configured
-    logging.warning("summarize_and_send_to_groups called - consider using send_daily_summaries_to_monitor instead")
+    logging.warning(
+        "summarize_and_send_to_groups called - consider using send_daily_summaries_to_monitor instead"
+    )
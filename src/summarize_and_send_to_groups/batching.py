@@ -0,0 +1,218 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
+
+from pydantic_ai.usage import Usage
+
+from agents import Priority, current_priority, llm_priority
+from utils.metrics import LatencyTracker
+from utils.tokens import estimate_tokens
+from . import llm
+
+logger = logging.getLogger(__name__)
+
+# A transcript larger than this share of the budget is summarized on its own
+MAX_SHARE = 0.25
+
+
+@dataclass
+class BatchedSummary:
+    """One group's summary out of a batched call, with its share of the call's tokens"""
+
+    output: str
+    request_tokens: int
+    response_tokens: int
+
+    def usage(self) -> Usage:
+        return Usage(
+            requests=0,
+            request_tokens=self.request_tokens,
+            response_tokens=self.response_tokens,
+        )
+
+
+@dataclass
+class _PendingSummary:
+    group_jid: str
+    group_name: str
+    transcript: str
+    tokens: int
+    done: asyncio.Future = field(repr=False)
+
+
+def pack_groups(
+    pending: List[_PendingSummary], max_tokens: int
+) -> List[List[_PendingSummary]]:
+    """First-fit decreasing bins of at most `max_tokens`, one transcript per group each"""
+    bins: List[List[_PendingSummary]] = []
+    for summary in sorted(pending, key=lambda p: p.tokens, reverse=True):
+        for candidate in bins:
+            if sum(p.tokens for p in candidate) + summary.tokens <= max_tokens and all(
+                p.group_jid != summary.group_jid for p in candidate
+            ):
+                candidate.append(summary)
+                break
+        else:
+            bins.append([summary])
+    return bins
+
+
+class SummaryBatcher:
+    """
+    Packs the transcripts of small groups into shared summary calls.
+
+    Callers hand over a transcript that fits a single prompt and wait; the
+    batcher collects transcripts for up to `wait` seconds (or until `max_tokens`
+    are pending), packs them into as few prompts of at most `max_tokens` as it
+    can, and summarizes each prompt in one structured call returning a summary
+    per group JID. Large transcripts, and groups left alone in a bin, are
+    summarized on their own. Groups the model leaves out of a batched answer
+    fall back to a call of their own.
+
+    Transcripts are only binned with others of the same `llm_priority`, and
+    each bin is summarized at that priority, so they never wait in a call of a
+    lower class. Secret-word (INTERACTIVE) summaries are not batched at all:
+    they are requested one group at a time, so no other group could join them
+    before the wait runs out. A bin can only hold groups being summarized at
+    the same time: the daily run summarizes SUMMARY_CONCURRENCY groups at once,
+    so that also caps the groups per batched call.
+    """
+
+    def __init__(self, max_tokens: int = 20_000, wait: float = 0.5):
+        self.configure(max_tokens, wait)
+
+    def configure(self, max_tokens: int, wait: float) -> None:
+        """
+        :param max_tokens: Estimated tokens per batched prompt, 0 to summarize every group on its own
+        :param wait: Seconds to collect transcripts before summarizing them
+        """
+        self.max_tokens = max_tokens
+        self.wait = wait
+        self._pending: Dict[Priority, List[_PendingSummary]] = {}
+        self._timers: Dict[Priority, asyncio.Task] = {}
+        self._bins: set[asyncio.Task] = set()
+        self.batches = 0
+        self.batched_groups = 0
+        self.single_calls = 0
+        self.fallbacks = 0
+        self.batch_latency = LatencyTracker()
+
+    @property
+    def calls_saved(self) -> int:
+        return self.batched_groups - self.batches
+
+    async def summarize(self, group_jid: str, group_name: str, transcript: str):
+        """
+        Summarize a group's transcript, possibly together with other groups.
+        :return: An `AgentRunResult`, or a `BatchedSummary` with the same output and usage()
+        """
+        tokens = estimate_tokens(transcript)
+        priority = current_priority()
+        if (
+            not self.max_tokens
+            or tokens > self.max_tokens * MAX_SHARE
+            or priority == Priority.INTERACTIVE
+        ):
+            self.single_calls += 1
+            return await llm.summarize(group_name, transcript)
+
+        done = asyncio.get_running_loop().create_future()
+        pending = self._pending.setdefault(priority, [])
+        pending.append(_PendingSummary(group_jid, group_name, transcript, tokens, done))
+        if sum(p.tokens for p in pending) >= self.max_tokens:
+            self._flush(priority)
+        elif priority not in self._timers:
+            self._timers[priority] = asyncio.create_task(self._flush_later(priority))
+        return await done
+
+    async def _flush_later(self, priority: Priority):
+        await asyncio.sleep(self.wait)
+        del self._timers[priority]
+        self._flush(priority)
+
+    def _flush(self, priority: Priority):
+        timer = self._timers.pop(priority, None)
+        if timer is not None:
+            timer.cancel()
+        for group in pack_groups(self._pending.pop(priority, []), self.max_tokens):
+            # The bin finishes even if its callers give up
+            task = asyncio.create_task(self._summarize_bin(group, priority))
+            self._bins.add(task)
+            task.add_done_callback(self._bins.discard)
+
+    async def _summarize_bin(self, group: List[_PendingSummary], priority: Priority):
+        # Not the priority of whichever caller happened to start the timer
+        with llm_priority(priority):
+            await self._run_bin(group)
+
+    async def _run_bin(self, group: List[_PendingSummary]):
+        if len(group) == 1:
+            self.single_calls += 1
+            await self._summarize_alone(group[0])
+            return
+
+        started = time.perf_counter()
+        try:
+            result = await llm.summarize_batch(
+                [(p.group_jid, p.group_name, p.transcript) for p in group]
+            )
+        except Exception as e:
+            logger.warning(
+                f"Batched summary of {len(group)} groups failed, summarizing them one by one: {e}"
+            )
+            self.fallbacks += len(group)
+            await asyncio.gather(*(self._summarize_alone(p) for p in group))
+            return
+        self.batch_latency.since(started)
+        self.batches += 1
+        self.batched_groups += len(group)
+
+        summaries = {s.group_jid: s.summary for s in result.output}
+        usage = result.usage()
+        input_total = sum(p.tokens for p in group)
+        output_total = sum(len(s) for s in summaries.values()) or 1
+        missing = [p for p in group if p.group_jid not in summaries]
+        self.fallbacks += len(missing)
+        for p in group:
+            summary = summaries.get(p.group_jid)
+            if summary is None or p.done.done():
+                continue
+            p.done.set_result(
+                BatchedSummary(
+                    summary,
+                    round((usage.request_tokens or 0) * p.tokens / input_total),
+                    round((usage.response_tokens or 0) * len(summary) / output_total),
+                )
+            )
+        await asyncio.gather(*(self._summarize_alone(p) for p in missing))
+
+    async def _summarize_alone(self, pending: _PendingSummary):
+        try:
+            result = await llm.summarize(pending.group_name, pending.transcript)
+        except Exception as e:
+            if not pending.done.done():
+                pending.done.set_exception(e)
+            return
+        if not pending.done.done():
+            pending.done.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_tokens": self.max_tokens,
+            "pending": sum(len(pending) for pending in self._pending.values()),
+            "batches": self.batches,
+            "batched_groups": self.batched_groups,
+            "avg_batch_size": round(self.batched_groups / self.batches, 2)
+            if self.batches
+            else 0,
+            "calls_saved": self.calls_saved,
+            "single_calls": self.single_calls,
+            "fallbacks": self.fallbacks,
+            "batch_latency": self.batch_latency.snapshot(),
+        }
+
+
+# Shared by the daily job and immediate summaries
+summary_batcher = SummaryBatcher()
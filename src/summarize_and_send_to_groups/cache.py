@@ -0,0 +1,158 @@
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict
+
+from cachetools import LRUCache
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from models import Group, stream_transcript, transcript_fingerprint_query
+from .partials import summarize_current_window, summary_since
+from .pipeline import SummaryRun, summary_pipeline
+from .single_flight import summary_flights
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class CachedSummary:
+    """A summary of a group's messages in [since, until)"""
+
+    since: datetime
+    until: datetime
+    newest_message_id: str
+    messages: int
+    text: str
+    tokens: int  # spent producing the summary, including the summaries it extends
+
+
+def run_tokens(run: SummaryRun) -> int:
+    return sum(stage.input_tokens + stage.output_tokens for stage in run.stages)
+
+
+class SummaryCache:
+    """
+    Last immediate summary of each group, keyed on its window start, newest
+    message ID and message count.
+
+    A repeated trigger with no new messages reuses the summary as is. When
+    only newer messages were added, just those are summarized and merged with
+    the previous summary. Anything else (a new summary window, edits to older
+    messages) summarizes the group from scratch.
+    """
+
+    def __init__(self, maxsize: int = 1000):
+        self.configure(maxsize)
+
+    def configure(self, maxsize: int) -> None:
+        """Resize the cache, dropping all entries"""
+        self._summaries: LRUCache = LRUCache(maxsize=maxsize)
+        self.hits = 0
+        self.deltas = 0
+        self.misses = 0
+        self.tokens_saved = 0
+        self.messages_skipped = 0
+
+    async def summarize(
+        self,
+        session: AsyncSession,
+        group: Group,
+        my_jid: str,
+        min_messages: int,
+    ) -> str | None:
+        """
+        Summarize a group since its last summary, reusing its cached summary where possible.
+        :param session: Session to read with
+        :param group: The group to summarize
+        :param my_jid: The bot's JID, whose messages are left out
+        :param min_messages: Don't summarize fewer messages than this
+        :return: The summary, or None if there were too few messages
+        """
+        since = summary_since(group)
+        until = datetime.now(timezone.utc)
+        cached: CachedSummary | None = self._summaries.get(group.group_jid)
+        if cached is not None and cached.since != since:
+            cached = None
+
+        row = (
+            await session.exec(
+                transcript_fingerprint_query(
+                    group.group_jid,
+                    since,
+                    my_jid,
+                    until,
+                    cached.until if cached else until,
+                )
+            )
+        ).first()
+        if row is None or row[1] < min_messages:
+            return None
+        newest_message_id, messages, new_messages = row
+
+        if cached is not None and (cached.newest_message_id, cached.messages) == (
+            newest_message_id,
+            messages,
+        ):
+            self.hits += 1
+            self.tokens_saved += cached.tokens
+            return cached.text
+
+        if (
+            cached is not None
+            and new_messages
+            and messages - new_messages == cached.messages
+        ):
+            # Nothing changed before the cached summary's cutoff
+            self.deltas += 1
+            self.messages_skipped += cached.messages
+            # Secret words typed at the same time share one summary
+            run = await summary_flights.do(
+                f"summary:{group.group_jid}:{since.isoformat()}"
+                f"+{cached.until.isoformat()}",
+                session,
+                lambda run_session: summary_pipeline.summarize(
+                    group.group_name or "group",
+                    stream_transcript(
+                        run_session, group.group_jid, cached.until, my_jid, until
+                    ),
+                    notes=[cached.text],
+                    noted_messages=cached.messages,
+                ),
+            )
+            tokens = cached.tokens + run_tokens(run) if run else 0
+        else:
+            self.misses += 1
+            # Shared with the daily run or other triggers summarizing this window
+            window = await summarize_current_window(
+                session, group, my_jid, min_messages
+            )
+            if window is None or window.run is None:
+                return None
+            run = window.run
+            tokens = run_tokens(run)
+            if window.until < until:
+                # Joined an earlier run that doesn't cover the messages counted above
+                return run.text
+
+        if run is None:
+            return None
+        self._summaries[group.group_jid] = CachedSummary(
+            since, until, newest_message_id, messages, run.text, tokens
+        )
+        return run.text
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.deltas + self.misses
+        return {
+            "size": len(self._summaries),
+            "hits": self.hits,
+            "deltas": self.deltas,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0,
+            "tokens_saved": self.tokens_saved,
+            "messages_skipped": self.messages_skipped,
+        }
+
+
+# Shared by all secret-word triggers
+summary_cache = SummaryCache()
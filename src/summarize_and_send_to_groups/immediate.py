@@ -0,0 +1,45 @@
+import logging
+from typing import List
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from agents import Priority, llm_priority
+from models import Group
+from .cache import summary_cache
+
+# Lower threshold than the daily summary
+IMMEDIATE_MIN_MESSAGES = 5
+
+
+async def immediate_summary(
+    session: AsyncSession, group: Group, my_jid: str
+) -> str | None:
+    """
+    Summarize a group since its last daily summary, without advancing last_summary_sync.
+    :return: The formatted summary, or None if there is nothing to summarize or it failed
+    """
+    try:
+        # Someone is waiting for these, ahead of spam checks and the daily batch
+        with llm_priority(Priority.INTERACTIVE):
+            summary = await summary_cache.summarize(
+                session, group, my_jid, min_messages=IMMEDIATE_MIN_MESSAGES
+            )
+    except Exception as e:
+        logging.error(
+            "Error generating immediate summary for group %s: %s",
+            group.group_name,
+            e,
+        )
+        return None
+    if summary is None:
+        logging.info(
+            "Not enough messages for immediate summary in group %s", group.group_name
+        )
+        return None
+    return f"📱 *{group.group_name or 'Unknown Group'}*\n{summary}\n\n"
+
+
+def immediate_message(summaries: List[str]) -> str:
+    if not summaries:
+        return "📋 *Immediate Summary Request*\n\nNo new messages found in any managed groups since last daily summary."
+    return "📋 *Immediate Summary Request*\n\n" + "\n".join(summaries)
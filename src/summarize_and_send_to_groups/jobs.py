@@ -0,0 +1,224 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import select, update
+
+from models import Group, SummaryJob, SummaryJobStatus
+from models.summary_job import ACTIVE_JOB
+from utils.metrics import LatencyTracker
+from whatsapp import SendMessageRequest, WhatsAppClient
+from .immediate import immediate_message, immediate_summary
+
+logger = logging.getLogger(__name__)
+
+# A pending or running job older than this was lost (e.g. to a crash of
+# another worker) and no longer absorbs new triggers
+STALE_AFTER = timedelta(minutes=30)
+
+_ACTIVE = [SummaryJobStatus.pending.value, SummaryJobStatus.running.value]
+
+
+class SummaryJobRunner:
+    """
+    Runs secret-word summaries in the background.
+
+    A trigger stores a `SummaryJob` row and returns at once; a worker then
+    summarizes the managed groups, at most `concurrency` at a time and each
+    with its own session, recording progress on the row as groups finish, and
+    sends the result to the monitor phone. Triggers arriving while a job is
+    still pending or running get that job instead of a new one; a partial
+    unique index keeps concurrent triggers from creating two.
+
+    Queued job IDs only live in memory, so jobs this runner can no longer run
+    are marked failed: on stop, and on start for those left by a previous run.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker,
+        whatsapp: WhatsAppClient,
+        monitor_phone: str,
+        concurrency: int = 4,
+    ):
+        self.session_factory = session_factory
+        self.whatsapp = whatsapp
+        self.monitor_phone = monitor_phone
+        self.concurrency = concurrency
+        self._queue: asyncio.Queue[int] = asyncio.Queue()
+        self._task: asyncio.Task | None = None
+        self._current: int | None = None
+        self._started_at = datetime.now(timezone.utc)
+        self.run_latency = LatencyTracker()
+        self.submitted = 0
+        self.reused = 0
+        self.succeeded = 0
+        self.failed = 0
+
+    def start(self):
+        self._started_at = datetime.now(timezone.utc)
+        self._task = asyncio.create_task(self._run(), name="summary-jobs")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        interrupted = [self._current] if self._current is not None else []
+        while not self._queue.empty():
+            interrupted.append(self._queue.get_nowait())
+        self._current = None
+        if interrupted:
+            await self._fail(SummaryJob.id.in_(interrupted), "Interrupted by shutdown")
+            logger.warning(f"Summary jobs {interrupted} interrupted by shutdown")
+
+    async def submit(self, requested_by: str | None = None) -> SummaryJob:
+        """
+        Queue an immediate summary of all managed groups.
+        :param requested_by: JID of whoever triggered it [Optional]
+        :return: The new job, or the one already pending or running
+        """
+        await self._fail(
+            SummaryJob.created_at <= datetime.now(timezone.utc) - STALE_AFTER,
+            "Lost (no progress within the stale period)",
+        )
+        values = SummaryJob.model_validate({"requested_by": requested_by}).model_dump(
+            exclude={"id"}
+        )
+        while True:
+            async with self.session_factory() as session:
+                job = (
+                    await session.exec(
+                        insert(SummaryJob)
+                        .values(**values)
+                        .on_conflict_do_nothing(
+                            index_elements=["kind"], index_where=ACTIVE_JOB
+                        )
+                        .returning(SummaryJob)
+                    )
+                ).scalar()
+                if job is None:
+                    active = (
+                        await session.exec(
+                            select(SummaryJob)
+                            .where(SummaryJob.kind == values["kind"])
+                            .where(SummaryJob.status.in_(_ACTIVE))
+                        )
+                    ).first()
+                await session.commit()
+            if job is not None:
+                break
+            if active is not None:
+                self.reused += 1
+                return active
+            # The active job finished in between; try again
+
+        self.submitted += 1
+        self._queue.put_nowait(job.id)
+        logger.info(f"Queued summary job {job.id} (requested by {requested_by})")
+        return job
+
+    async def _fail(self, where, error: str) -> None:
+        """Mark the active jobs matching `where` failed"""
+        async with self.session_factory() as session:
+            await session.exec(
+                update(SummaryJob)
+                .where(SummaryJob.status.in_(_ACTIVE))
+                .where(where)
+                .values(
+                    status=SummaryJobStatus.failed.value,
+                    error=error,
+                    finished_at=datetime.now(timezone.utc),
+                )
+            )
+            await session.commit()
+
+    async def _run(self):
+        try:
+            # Jobs queued by a previous run of the app are gone from memory
+            await self._fail(
+                SummaryJob.created_at < self._started_at, "Interrupted by restart"
+            )
+        except Exception as e:
+            logger.error(f"Could not fail orphaned summary jobs: {e}")
+        while True:
+            job_id = await self._queue.get()
+            self._current = job_id
+            started = time.perf_counter()
+            try:
+                await self.run_job(job_id)
+                self.succeeded += 1
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Summary job {job_id} failed: {e}")
+                await self._update(
+                    job_id,
+                    status=SummaryJobStatus.failed.value,
+                    error=str(e),
+                    finished_at=datetime.now(timezone.utc),
+                )
+            self._current = None
+            self.run_latency.since(started)
+
+    async def run_job(self, job_id: int) -> None:
+        """Run a queued job to completion (normally done by the worker)"""
+        async with self.session_factory() as session:
+            groups = (
+                await session.exec(select(Group).where(Group.managed == True))  # noqa: E712
+            ).all()
+        await self._update(
+            job_id,
+            status=SummaryJobStatus.running.value,
+            groups_total=len(groups),
+            started_at=datetime.now(timezone.utc),
+        )
+
+        my_jid = (await self.whatsapp.get_my_jid()).normalize_str()
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def summarize_one(group: Group) -> str | None:
+            async with semaphore:
+                async with self.session_factory() as session:
+                    summary = await immediate_summary(session, group, my_jid)
+                await self._update(
+                    job_id,
+                    groups_done=SummaryJob.groups_done + 1,
+                    groups_summarized=SummaryJob.groups_summarized
+                    + (1 if summary else 0),
+                )
+                return summary
+
+        results = await asyncio.gather(*(summarize_one(group) for group in groups))
+        await self.whatsapp.send_message(
+            SendMessageRequest(
+                phone=self.monitor_phone,
+                message=immediate_message([summary for summary in results if summary]),
+            )
+        )
+        await self._update(
+            job_id,
+            status=SummaryJobStatus.succeeded.value,
+            finished_at=datetime.now(timezone.utc),
+        )
+        logger.info(f"Summary job {job_id} sent to {self.monitor_phone}")
+
+    async def _update(self, job_id: int, **values) -> None:
+        async with self.session_factory() as session:
+            await session.exec(
+                update(SummaryJob).where(SummaryJob.id == job_id).values(**values)
+            )
+            await session.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self._queue.qsize(),
+            "submitted": self.submitted,
+            "reused": self.reused,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "run_latency": self.run_latency.snapshot(),
+        }
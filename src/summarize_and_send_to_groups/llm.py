@@ -0,0 +1,181 @@
+import logging
+from typing import List, Sequence, Tuple
+
+from pydantic import BaseModel
+from pydantic_ai import Agent, ModelRetry, RunContext
+from pydantic_ai.agent import AgentRunResult
+from pydantic_ai.models import Model
+from tenacity import (
+    retry,
+    wait_random_exponential,
+    stop_after_attempt,
+    before_sleep_log,
+)
+
+from agents import agent_registry
+
+logger = logging.getLogger(__name__)
+
+llm_retry = retry(
+    wait=wait_random_exponential(min=1, max=30),
+    stop=stop_after_attempt(6),
+    before_sleep=before_sleep_log(logger, logging.DEBUG),
+    reraise=True,
+)
+
+
+def summary_instructions(group_name: str) -> str:
+    return f"""
+        - Start by stating this is a quick summary of what happened in "{group_name}" group recently.
+        - Use a casual conversational writing style.
+        - Keep it short and sweet.
+        - Write in the same language as the chat group. You MUST use the same language as the chat group!
+        - Please do tag users while talking about them (e.g., @972536150150). ONLY answer with the new phrased query, no other text.
+        """
+
+
+# How utils.chat_text.CompactTranscript lays out transcripts
+TRANSCRIPT_FORMAT = """
+        The transcript is oldest first. Its first line maps each sender's short alias (A, B, ...) to their number:
+        tag people by number, never by alias. A turn starts with its time (HH:MM) when a new 10-minute window
+        begins, and indented lines continue the previous sender's turn.
+        """
+
+
+# The agents are built once and shared; the group name is passed as deps
+def _summary_agent(model: Model) -> Agent[str, str]:
+    def instructions(ctx: RunContext[str]) -> str:
+        return f""""
+        Write a quick summary of what happened in the chat group since the last summary.
+        {summary_instructions(ctx.deps)}{TRANSCRIPT_FORMAT}"""
+
+    return Agent(model, deps_type=str, instructions=instructions, output_type=str)
+
+
+def _part_agent(model: Model) -> Agent[str, str]:
+    def instructions(ctx: RunContext[str]) -> str:
+        return f"""
+        You are given one part of a longer chat transcript from the "{ctx.deps}" group.
+        List the topics discussed, decisions made and open questions in this part.
+
+        - Be factual and concise; another step will merge your notes with those of the other parts.
+        - Write in the same language as the chat group. You MUST use the same language as the chat group!
+        - Tag users by their number (e.g., @972536150150).
+        - ONLY answer with the notes, no other text.
+        {TRANSCRIPT_FORMAT}"""
+
+    return Agent(model, deps_type=str, instructions=instructions, output_type=str)
+
+
+def _combine_agent(final: bool):
+    def factory(model: Model) -> Agent[str, str]:
+        def instructions(ctx: RunContext[str]) -> str:
+            if final:
+                task = f"""
+        Write a quick summary of what happened in the chat group since the last summary.
+        {summary_instructions(ctx.deps)}"""
+            else:
+                task = """
+        Merge them into a single set of notes, keeping every topic, decision and open question.
+        - Write in the same language as the notes. Keep the user tags (e.g., @972536150150).
+        - ONLY answer with the merged notes, no other text.
+        """
+            return f"""
+        You are given notes on consecutive parts of a chat in the "{ctx.deps}" group, most recent part first.
+        {task}"""
+
+        return Agent(model, deps_type=str, instructions=instructions, output_type=str)
+
+    return factory
+
+
+class GroupSummary(BaseModel):
+    group_jid: str
+    summary: str
+
+
+def _batch_agent(model: Model) -> Agent[List[str], List[GroupSummary]]:
+    """Summarizes several groups in one call; deps are the group JIDs expected back"""
+    agent = Agent(
+        model,
+        deps_type=List[str],
+        system_prompt="""
+        You are given the transcripts of several chat groups, each in its own <group jid="..." name="..."> block.
+        Write a quick summary of what happened in every group since the last summary, one per group and
+        only from that group's own transcript, returned with the group's jid.
+
+        For each summary:
+        - Start by stating this is a quick summary of what happened in the group (use its name) recently.
+        - Use a casual conversational writing style.
+        - Keep it short and sweet.
+        - Write in the same language as that chat group. You MUST use the same language as the chat group!
+        - Please do tag users while talking about them (e.g., @972536150150).
+
+        Each transcript has its own sender aliases.
+        """
+        + TRANSCRIPT_FORMAT,
+        output_type=List[GroupSummary],
+        output_retries=2,
+    )
+
+    @agent.output_validator
+    def every_group(
+        ctx: RunContext[List[str]], output: List[GroupSummary]
+    ) -> List[GroupSummary]:
+        missing = set(ctx.deps) - {s.group_jid for s in output}
+        if missing:
+            raise ModelRetry(
+                f"Missing summaries for groups: {', '.join(sorted(missing))}"
+            )
+        return output
+
+    return agent
+
+
+agent_registry.register("summarize", _summary_agent)
+agent_registry.register("summarize_batch", _batch_agent)
+agent_registry.register("summarize_part", _part_agent)
+agent_registry.register("combine_notes", _combine_agent(final=False))
+agent_registry.register("combine_summary", _combine_agent(final=True))
+
+
+@llm_retry
+async def summarize(group_name: str, transcript: str) -> AgentRunResult[str]:
+    return await agent_registry.run("summarize", transcript, deps=group_name)
+
+
+@llm_retry
+async def summarize_batch(
+    groups: Sequence[Tuple[str, str, str]],
+) -> AgentRunResult[List[GroupSummary]]:
+    """
+    Summarize several small groups in one call.
+    :param groups: (group JID, group name, transcript) of each group
+    """
+    prompt = "\n\n".join(
+        f'<group jid="{jid}" name="{name}">\n{transcript}\n</group>'
+        for jid, name, transcript in groups
+    )
+    return await agent_registry.run(
+        "summarize_batch", prompt, deps=[jid for jid, _, _ in groups]
+    )
+
+
+@llm_retry
+async def summarize_part(group_name: str, transcript: str) -> AgentRunResult[str]:
+    """Summarize one part of a transcript too long for a single prompt"""
+    return await agent_registry.run("summarize_part", transcript, deps=group_name)
+
+
+@llm_retry
+async def combine_summaries(
+    group_name: str, partials: str, final: bool
+) -> AgentRunResult[str]:
+    """
+    Merge notes of consecutive transcript parts.
+    :param group_name: The group the notes are about
+    :param partials: The notes, most recent part first
+    :param final: Whether to write the summary itself, or notes for a further merge
+    """
+    name = "combine_summary" if final else "combine_notes"
+    return await agent_registry.run(name, partials, deps=group_name)
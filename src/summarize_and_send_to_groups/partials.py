@@ -0,0 +1,252 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from models import Group, PartialSummary, stream_transcript
+from whatsapp import WhatsAppClient
+from .pipeline import SummaryRun, summary_pipeline
+from .single_flight import summary_flights
+
+logger = logging.getLogger(__name__)
+
+# Messages younger than this are left to the tail, in case some arrive late
+SETTLE_TIME = timedelta(minutes=5)
+
+
+def summary_since(group: Group) -> datetime:
+    """Start of the group's current summary window (last_summary_sync is naive local time)"""
+    since = group.last_summary_sync
+    return since if since.tzinfo else since.astimezone()
+
+
+async def load_partials(
+    session: AsyncSession, group_jid: str, since: datetime
+) -> List[PartialSummary]:
+    """
+    The chain of partial summaries covering a group's messages from `since` without gaps.
+    :return: The partials, oldest first
+    """
+    partials = (
+        await session.exec(
+            select(PartialSummary)
+            .where(PartialSummary.group_jid == group_jid)
+            .where(PartialSummary.start_time >= since)
+            .order_by(PartialSummary.start_time)
+        )
+    ).all()
+
+    chain: List[PartialSummary] = []
+    cursor = since
+    for partial in partials:
+        if partial.start_time != cursor:
+            break
+        chain.append(partial)
+        cursor = partial.end_time
+    return chain
+
+
+async def summarize_window(
+    session: AsyncSession,
+    group: Group,
+    my_jid: str,
+    until: datetime | None,
+    min_messages: int,
+) -> SummaryRun | None:
+    """
+    Summarize a group since its last summary, merging the stored partial
+    summaries with only the messages after them.
+    :param session: Session to read with
+    :param group: The group to summarize
+    :param my_jid: The bot's JID, whose messages are left out
+    :param until: Only messages before this time [Optional]
+    :param min_messages: Don't summarize fewer messages than this
+    """
+    since = summary_since(group)
+    chain = await load_partials(session, group.group_jid, since)
+    return await summary_pipeline.summarize(
+        group.group_name or "group",
+        stream_transcript(
+            session,
+            group.group_jid,
+            chain[-1].end_time if chain else since,
+            my_jid,
+            until,
+        ),
+        min_messages,
+        notes=[partial.text for partial in reversed(chain)],
+        noted_messages=sum(partial.message_count for partial in chain),
+        group_jid=group.group_jid,
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class WindowSummary:
+    """A summary of a group's current window up to `until`"""
+
+    until: datetime
+    # None if the window had fewer than `min_messages` messages
+    run: SummaryRun | None
+    min_messages: int
+
+
+async def summarize_current_window(
+    session: AsyncSession,
+    group: Group,
+    my_jid: str,
+    min_messages: int,
+) -> WindowSummary | None:
+    """
+    Summarize a group's current window up to now. The daily run and secret-word
+    triggers for the same group and window share one run.
+    :param session: Session to read with
+    :param group: The group to summarize
+    :param my_jid: The bot's JID, whose messages are left out
+    :param min_messages: Don't summarize fewer messages than this
+    :return: The summary, or None if another worker closed the window meanwhile
+    """
+    since = group.last_summary_sync
+    window = await summary_flights.do(
+        f"summary:{group.group_jid}:{summary_since(group).isoformat()}",
+        session,
+        lambda run_session: _summarize_current_window(
+            run_session, group, since, my_jid, min_messages
+        ),
+    )
+    if window is not None and window.run is None and window.min_messages > min_messages:
+        # The shared run needed more messages than this caller does
+        window = await _summarize_current_window(
+            session, group, since, my_jid, min_messages
+        )
+    return window
+
+
+async def _summarize_current_window(
+    session: AsyncSession,
+    group: Group,
+    since: datetime,
+    my_jid: str,
+    min_messages: int,
+) -> WindowSummary | None:
+    # A run that waited for another worker's finds the window already closed
+    synced = (
+        await session.exec(
+            select(Group.last_summary_sync).where(Group.group_jid == group.group_jid)
+        )
+    ).one()
+    if synced != since:
+        return None
+    # Messages arriving while we summarize go into the next window
+    until = datetime.now().astimezone()
+    run = await summarize_window(session, group, my_jid, until, min_messages)
+    return WindowSummary(until, run, min_messages)
+
+
+async def roll_up_group(
+    session: AsyncSession,
+    group: Group,
+    my_jid: str,
+    until: datetime,
+    min_messages: int,
+) -> PartialSummary | None:
+    """
+    Take notes on a group's messages from the end of its partial summary chain until `until`.
+    :return: The new partial summary, or None if there were fewer than `min_messages`
+    """
+    # A roll-up that waited for another worker's finds the chain already extended
+    return await summary_flights.do(
+        f"roll_up:{group.group_jid}",
+        session,
+        lambda run_session: _roll_up_group(
+            run_session, group, my_jid, until, min_messages
+        ),
+    )
+
+
+async def _roll_up_group(
+    session: AsyncSession,
+    group: Group,
+    my_jid: str,
+    until: datetime,
+    min_messages: int,
+) -> PartialSummary | None:
+    since = summary_since(group)
+    chain = await load_partials(session, group.group_jid, since)
+    start = chain[-1].end_time if chain else since
+    if start >= until:
+        return None
+
+    run = await summary_pipeline.take_notes(
+        group.group_name or "group",
+        stream_transcript(session, group.group_jid, start, my_jid, until),
+        min_messages,
+    )
+    if run is None:
+        return None
+
+    partial = PartialSummary.model_validate(
+        {
+            "group_jid": group.group_jid,
+            "start_time": start,
+            "end_time": until,
+            "message_count": run.messages,
+            "text": run.text,
+        }
+    )
+    session.add(partial)
+    await session.commit()
+    return partial
+
+
+async def roll_up_partials(
+    session_factory: async_sessionmaker,
+    whatsapp: WhatsAppClient,
+    min_messages: int = 50,
+    concurrency: int = 4,
+) -> dict:
+    """
+    Extend the partial summaries of all managed groups, and drop the ones
+    already covered by a final summary.
+    :return: Run stats: groups, partials created and partials purged
+    """
+    until = datetime.now(timezone.utc) - SETTLE_TIME
+    my_jid = (await whatsapp.get_my_jid()).normalize_str()
+    async with session_factory() as session:
+        groups = (
+            await session.exec(select(Group).where(Group.managed == True))  # noqa: E712
+        ).all()
+        purged = await session.exec(
+            delete(PartialSummary)
+            .where(PartialSummary.group_jid == Group.group_jid)
+            .where(PartialSummary.end_time <= Group.last_summary_sync)
+        )
+        await session.commit()
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def roll_up_one(group: Group) -> PartialSummary | None:
+        async with semaphore, session_factory() as session:
+            try:
+                return await roll_up_group(session, group, my_jid, until, min_messages)
+            except IntegrityError:
+                # Another replica rolled up the same window
+                return None
+            except Exception as e:
+                logger.error("Error rolling up group %s: %s", group.group_name, e)
+                return None
+
+    created = await asyncio.gather(*(roll_up_one(group) for group in groups))
+    run = {
+        "groups": len(groups),
+        "created": sum(1 for partial in created if partial),
+        "purged": purged.rowcount,
+    }
+    logger.info("Rolled up partial summaries: %s", run)
+    return run
@@ -0,0 +1,316 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import (
+    Any,
+    AsyncIterable,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Sequence,
+    Tuple,
+)
+
+from pydantic_ai.agent import AgentRunResult
+
+from models import TranscriptLine
+from utils.chat_text import CompactTranscript
+from utils.metrics import LatencyTracker
+from utils.tokens import estimate_tokens
+from . import llm
+from .batching import summary_batcher
+
+logger = logging.getLogger(__name__)
+
+# A quiet gap only ends a chunk once it is at least this full, so bursts of
+# chat separated by pauses are not summarized one tiny chunk at a time
+MIN_GAP_SPLIT_FILL = 0.5
+
+PART_SEPARATOR = "\n\n---\n\n"
+
+
+async def chunk_transcript(
+    history: AsyncIterable[TranscriptLine],
+    chunk_tokens: int,
+    overlap: int = 20,
+    gap: timedelta = timedelta(hours=2),
+) -> Tuple[List[str], int]:
+    """
+    Render a streamed transcript as compact chunks of at most `chunk_tokens` estimated tokens.
+    Like `utils.importing_wa.split_chats`, a chunk ends early at a quiet gap of
+    at least `gap` once it is reasonably full, and a chunk cut mid-conversation
+    repeats the last `overlap` lines of the previous one.
+    :return: The chunk texts, in transcript order, and the number of messages
+    """
+    chunks: List[str] = []
+    chunk = CompactTranscript()
+    count = 0
+    previous = None
+    async for message in history:
+        at_gap = (
+            previous is not None
+            and abs(message.timestamp - previous) >= gap
+            and chunk.tokens >= chunk_tokens * MIN_GAP_SPLIT_FILL
+        )
+        if chunk.lines and (
+            at_gap or chunk.tokens + chunk.cost(message) > chunk_tokens
+        ):
+            chunks.append(chunk.render())
+            carried = (
+                [] if at_gap else _overlap(chunk.lines, overlap, chunk_tokens // 4)
+            )
+            chunk = CompactTranscript()
+            for line in carried:
+                chunk.add(line)
+        chunk.add(message)
+        previous = message.timestamp
+        count += 1
+    if count:
+        chunks.append(chunk.render())
+    return chunks, count
+
+
+def _overlap(lines: List[TranscriptLine], overlap: int, max_tokens: int):
+    # Never carry over so much that the next chunk can't make progress
+    carried: List[TranscriptLine] = []
+    tokens = 0
+    for line in reversed(lines[-overlap:] if overlap else []):
+        line_tokens = CompactTranscript.line_tokens(line)
+        if tokens + line_tokens > max_tokens:
+            break
+        carried.append(line)
+        tokens += line_tokens
+    return carried[::-1]
+
+
+def pack_parts(parts: List[str], max_tokens: int) -> List[str]:
+    """
+    Join consecutive parts into as few prompts of at most `max_tokens` as possible.
+    Each prompt takes at least two parts, so every reduce level shrinks.
+    """
+    batches: List[List[str]] = []
+    tokens = 0
+    for part in parts:
+        part_tokens = estimate_tokens(part + PART_SEPARATOR)
+        if batches and (len(batches[-1]) < 2 or tokens + part_tokens <= max_tokens):
+            batches[-1].append(part)
+            tokens += part_tokens
+        else:
+            batches.append([part])
+            tokens = part_tokens
+    if len(batches) > 1 and len(batches[-1]) == 1:
+        batches[-2].extend(batches.pop())
+    return [PART_SEPARATOR.join(batch) for batch in batches]
+
+
+@dataclass
+class StageRun:
+    """Tokens and wall-clock time of one stage of a summary run"""
+
+    name: str
+    calls: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    seconds: float = 0.0
+
+
+@dataclass
+class SummaryRun:
+    text: str = ""
+    messages: int = 0
+    chunks: int = 0
+    stages: List[StageRun] = field(default_factory=list)
+
+
+class SummaryPipeline:
+    """
+    Summarizes transcripts of any length.
+
+    A transcript that fits in one prompt is summarized directly. A longer one is
+    split into chunks that are summarized in parallel (map), and the partial
+    summaries are merged, in as many levels as needed to fit a prompt, into the
+    final summary (reduce). Notes taken earlier with `take_notes` join the
+    partial summaries in the reduce stage.
+    """
+
+    def __init__(
+        self,
+        chunk_tokens: int = 30_000,
+        overlap: int = 20,
+        fan_out: int = 4,
+    ):
+        self.configure(chunk_tokens, overlap, fan_out)
+
+    def configure(self, chunk_tokens: int, overlap: int, fan_out: int) -> None:
+        """
+        :param chunk_tokens: Estimated tokens per prompt
+        :param overlap: Messages repeated at the start of a chunk cut mid-conversation
+        :param fan_out: Prompts of the same group in flight at once
+        """
+        self.chunk_tokens = chunk_tokens
+        self.overlap = overlap
+        self.fan_out = fan_out
+        self.runs = 0
+        self._stages: Dict[str, Dict[str, Any]] = {}
+
+    async def summarize(
+        self,
+        group_name: str,
+        history: AsyncIterable[TranscriptLine],
+        min_messages: int = 1,
+        notes: Sequence[str] = (),
+        noted_messages: int = 0,
+        group_jid: str | None = None,
+    ) -> SummaryRun | None:
+        """
+        Summarize a streamed transcript, together with notes already taken on earlier messages.
+        :param group_name: The group the transcript is from
+        :param history: The transcript lines not covered by `notes`
+        :param min_messages: Don't summarize fewer messages than this
+        :param notes: Notes on earlier messages, most recent first [Optional]
+        :param noted_messages: The number of messages `notes` cover
+        :param group_jid: The group's JID; lets a short transcript share a call with other groups [Optional]
+        :return: The summary and per-stage stats, or None if there were too few messages
+        """
+        chunks, count = await chunk_transcript(history, self.chunk_tokens, self.overlap)
+        if count + noted_messages < min_messages:
+            return None
+
+        run = SummaryRun(messages=count + noted_messages, chunks=len(chunks))
+        if len(chunks) == 1 and not notes:
+            [run.text] = await self._stage(
+                run,
+                "summarize",
+                chunks,
+                lambda text: (
+                    summary_batcher.summarize(group_jid, group_name, text)
+                    if group_jid
+                    else llm.summarize(group_name, text)
+                ),
+            )
+        else:
+            parts = await self._map(run, group_name, chunks) + list(notes)
+            run.text = await self._reduce(run, group_name, parts, final=True)
+        self._log(run, group_name)
+        return run
+
+    async def take_notes(
+        self,
+        group_name: str,
+        history: AsyncIterable[TranscriptLine],
+        min_messages: int = 1,
+    ) -> SummaryRun | None:
+        """
+        Condense a streamed transcript into notes, to be merged into a later summary.
+        :return: The notes and per-stage stats, or None if there were too few messages
+        """
+        chunks, count = await chunk_transcript(history, self.chunk_tokens, self.overlap)
+        if count < min_messages:
+            return None
+
+        run = SummaryRun(messages=count, chunks=len(chunks))
+        parts = await self._map(run, group_name, chunks)
+        run.text = (
+            parts[0]
+            if len(parts) == 1
+            else await self._reduce(run, group_name, parts, final=False)
+        )
+        self._log(run, group_name)
+        return run
+
+    async def _map(
+        self, run: SummaryRun, group_name: str, chunks: List[str]
+    ) -> List[str]:
+        if not chunks:
+            return []
+        return await self._stage(
+            run, "map", chunks, lambda text: llm.summarize_part(group_name, text)
+        )
+
+    async def _reduce(
+        self, run: SummaryRun, group_name: str, parts: List[str], final: bool
+    ) -> str:
+        # Merge level by level until the notes fit in a single prompt
+        while True:
+            batches = pack_parts(parts, self.chunk_tokens)
+            last = len(batches) == 1
+            parts = await self._stage(
+                run,
+                "reduce",
+                batches,
+                lambda text, last=last: llm.combine_summaries(
+                    group_name, text, final and last
+                ),
+            )
+            if last:
+                return parts[0]
+
+    def _log(self, run: SummaryRun, group_name: str) -> None:
+        self.runs += 1
+        logger.info(
+            "Summarized %d messages of %s in %d chunks: %s",
+            run.messages,
+            group_name,
+            run.chunks,
+            ", ".join(
+                f"{s.name} {s.calls}x {s.input_tokens}->{s.output_tokens} tokens {s.seconds:.1f}s"
+                for s in run.stages
+            ),
+        )
+
+    async def _stage(
+        self,
+        run: SummaryRun,
+        name: str,
+        prompts: List[str],
+        call: Callable[[str], Awaitable[AgentRunResult[str]]],
+    ) -> List[str]:
+        semaphore = asyncio.Semaphore(self.fan_out)
+        stage = StageRun(name, calls=len(prompts))
+        totals = self._stages.setdefault(
+            name,
+            {
+                "calls": 0,
+                "input_tokens": 0,
+                "output_tokens": 0,
+                "latency": LatencyTracker(),
+            },
+        )
+
+        async def one(prompt: str) -> str:
+            async with semaphore:
+                started = time.perf_counter()
+                result = await call(prompt)
+                totals["latency"].since(started)
+            usage, output = result.usage(), result.output
+            stage.input_tokens += usage.request_tokens or estimate_tokens(prompt)
+            stage.output_tokens += usage.response_tokens or estimate_tokens(output)
+            return output
+
+        started = time.perf_counter()
+        outputs = await asyncio.gather(*(one(prompt) for prompt in prompts))
+        stage.seconds = time.perf_counter() - started
+        run.stages.append(stage)
+
+        totals["calls"] += stage.calls
+        totals["input_tokens"] += stage.input_tokens
+        totals["output_tokens"] += stage.output_tokens
+        return list(outputs)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "chunk_tokens": self.chunk_tokens,
+            "fan_out": self.fan_out,
+            "runs": self.runs,
+            "stages": {
+                name: {**totals, "latency": totals["latency"].snapshot()}
+                for name, totals in self._stages.items()
+            },
+        }
+
+
+# Shared by the daily job and immediate summaries
+summary_pipeline = SummaryPipeline()
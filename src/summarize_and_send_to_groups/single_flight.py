@@ -0,0 +1,153 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, TypeVar
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, create_async_engine
+from sqlalchemy.pool import NullPool
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_TRY_LOCK = text("SELECT pg_try_advisory_lock(hashtext(:key))")
+_UNLOCK = text("SELECT pg_advisory_unlock(hashtext(:key))")
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent summary runs with the same key.
+
+    Within the process, callers that arrive while a run for their key is in
+    flight wait for it and share its result. The run gets its own session, so
+    it doesn't depend on any one caller (who may be cancelled) staying around.
+
+    With an engine configured, the run also holds a Postgres advisory lock on
+    the key, so runs for the same key on other workers or replicas wait for it
+    to finish instead of overlapping. They then run themselves; callers re-read
+    the state they depend on (e.g. last_summary_sync) to find their work
+    already done. The locks of all runs are held on one dedicated connection,
+    outside the engine's pool, so a run doesn't keep a pooled connection
+    checked out for the length of its LLM calls.
+    """
+
+    def __init__(self, engine: AsyncEngine | None = None, poll_interval: float = 1.0):
+        self.configure(engine, poll_interval)
+
+    def configure(self, engine: AsyncEngine | None, poll_interval: float = 1.0) -> None:
+        """
+        Use Postgres advisory locks through `engine`, or process-local coalescing only if None.
+        :param poll_interval: Seconds between attempts to take a lock held by another worker
+        """
+        self.engine = engine
+        self.poll_interval = poll_interval
+        self._lock_engine = (
+            create_async_engine(engine.url, poolclass=NullPool)
+            if engine is not None
+            else None
+        )
+        self._lock_conn: AsyncConnection | None = None
+        # The lock connection runs one statement at a time
+        self._lock_guard = asyncio.Lock()
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self.runs = 0
+        self.shared = 0
+        self.lock_waits = 0
+
+    async def do(
+        self,
+        key: str,
+        session: AsyncSession,
+        fn: Callable[[AsyncSession], Awaitable[T]],
+    ) -> T:
+        """
+        Run `fn`, unless a run for `key` is already in flight, then share its result.
+        :param key: Identifies the work, e.g. the kind of summary, group and window
+        :param session: The caller's session; the run gets a new one on the same bind
+        :param fn: Produces the result, given the run's session
+        """
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.shared += 1
+        else:
+            self.runs += 1
+            task = asyncio.create_task(
+                self._run(key, session.bind, fn), name=f"single-flight {key}"
+            )
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        # A cancelled caller must not cancel the run the others are waiting for
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+
+    async def _run(
+        self, key: str, bind: Any, fn: Callable[[AsyncSession], Awaitable[T]]
+    ) -> T:
+        if self.engine is not None and not await self._try_lock(key):
+            self.lock_waits += 1
+            logger.info(f"Waiting for {key} to finish on another worker")
+            while not await self._try_lock(key):
+                await asyncio.sleep(self.poll_interval)
+        try:
+            # Savepoints keep the run inside a caller's open transaction (in tests)
+            async with AsyncSession(
+                bind=bind,
+                join_transaction_mode="create_savepoint",
+                expire_on_commit=False,
+            ) as session:
+                return await fn(session)
+        finally:
+            if self.engine is not None:
+                await self._unlock(key)
+
+    async def _try_lock(self, key: str) -> bool:
+        return bool(await self._execute(_TRY_LOCK, key))
+
+    async def _unlock(self, key: str) -> None:
+        try:
+            await self._execute(_UNLOCK, key)
+        except Exception as e:
+            # Don't lose the run's result; a broken connection released the lock anyway
+            logger.warning(f"Failed to release the lock on {key}: {e}")
+
+    async def _execute(self, statement, key: str) -> Any:
+        assert self._lock_engine is not None
+        async with self._lock_guard:
+            if self._lock_conn is None or self._lock_conn.closed:
+                self._lock_conn = await self._lock_engine.connect()
+                await self._lock_conn.execution_options(isolation_level="AUTOCOMMIT")
+            try:
+                return (await self._lock_conn.execute(statement, {"key": key})).scalar()
+            except Exception:
+                # Postgres released the connection's locks with it; start afresh
+                await self._close_lock_conn()
+                raise
+
+    async def _close_lock_conn(self) -> None:
+        if self._lock_conn is not None:
+            conn, self._lock_conn = self._lock_conn, None
+            await conn.close()
+
+    async def close(self) -> None:
+        """Close the lock connection, releasing any locks still held"""
+        async with self._lock_guard:
+            await self._close_lock_conn()
+        if self._lock_engine is not None:
+            await self._lock_engine.dispose()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "postgres" if self.engine is not None else "memory",
+            "in_flight": len(self._in_flight),
+            "runs": self.runs,
+            "shared": self.shared,
+            "lock_waits": self.lock_waits,
+        }
+
+
+# Shared by the daily job, roll-ups and secret-word triggers
+summary_flights = SingleFlight()
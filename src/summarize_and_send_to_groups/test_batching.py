@@ -0,0 +1,180 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from pydantic_ai.exceptions import UnexpectedModelBehavior
+from pydantic_ai.models.test import TestModel
+
+from agents import Priority, agent_registry, current_priority, llm_priority
+from summarize_and_send_to_groups import llm
+from summarize_and_send_to_groups.batching import SummaryBatcher
+from summarize_and_send_to_groups.test_partials import result
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    calls = SimpleNamespace(single=[], batched=[], priorities=[], fail_batches=False)
+
+    async def fake_summarize(group_name, transcript):
+        calls.single.append(group_name)
+        return result(f"summary of {group_name}")
+
+    async def fake_summarize_batch(groups):
+        calls.batched.append([name for _, name, _ in groups])
+        calls.priorities.append(current_priority())
+        if calls.fail_batches:
+            raise RuntimeError("provider error")
+        usage = SimpleNamespace(request_tokens=1000, response_tokens=100)
+        return SimpleNamespace(
+            output=[
+                llm.GroupSummary(group_jid=jid, summary=f"summary of {name}")
+                for jid, name, _ in groups
+            ],
+            usage=lambda: usage,
+        )
+
+    monkeypatch.setattr(llm, "summarize", fake_summarize)
+    monkeypatch.setattr(llm, "summarize_batch", fake_summarize_batch)
+    return calls
+
+
+def transcript(tokens: int) -> str:
+    return "x" * tokens * 3
+
+
+@pytest.mark.asyncio
+async def test_small_groups_share_one_call(fake_llm):
+    batcher = SummaryBatcher(max_tokens=1000, wait=0.01)
+
+    results = await asyncio.gather(
+        batcher.summarize("a@g.us", "A", transcript(100)),
+        batcher.summarize("b@g.us", "B", transcript(100)),
+        batcher.summarize("c@g.us", "C", transcript(200)),
+    )
+
+    assert [r.output for r in results] == [
+        "summary of A",
+        "summary of B",
+        "summary of C",
+    ]
+    assert fake_llm.batched == [["C", "A", "B"]] and not fake_llm.single
+    # The call's tokens are split by transcript size
+    assert [r.usage().request_tokens for r in results] == [250, 250, 500]
+    assert batcher.stats()["calls_saved"] == 2
+
+
+@pytest.mark.asyncio
+async def test_large_groups_and_leftovers_get_their_own_call(fake_llm):
+    batcher = SummaryBatcher(max_tokens=1000, wait=0.01)
+
+    await asyncio.gather(
+        batcher.summarize("big@g.us", "Big", transcript(600)),
+        batcher.summarize("a@g.us", "A", transcript(240)),
+        batcher.summarize("b@g.us", "B", transcript(240)),
+        batcher.summarize("c@g.us", "C", transcript(240)),
+        batcher.summarize("d@g.us", "D", transcript(240)),
+        # The same group twice (e.g. daily and secret-word) never shares a prompt
+        batcher.summarize("a@g.us", "A again", transcript(10)),
+    )
+
+    assert fake_llm.batched == [["A", "B", "C", "D"]]
+    assert sorted(fake_llm.single) == ["A again", "Big"]
+    assert batcher.stats()["single_calls"] == 2
+
+
+@pytest.mark.asyncio
+async def test_groups_are_only_batched_with_the_same_priority(fake_llm):
+    batcher = SummaryBatcher(max_tokens=1000, wait=0.01)
+
+    async def summarize(jid: str, priority: Priority):
+        with llm_priority(priority):
+            return await batcher.summarize(jid, jid, transcript(100))
+
+    # The daily run starts the timer, then spam checks arrive
+    await asyncio.gather(
+        summarize("daily-1", Priority.BATCH),
+        summarize("spam-1", Priority.SPAM),
+        summarize("daily-2", Priority.BATCH),
+        summarize("spam-2", Priority.SPAM),
+    )
+
+    assert sorted(zip(fake_llm.priorities, fake_llm.batched)) == [
+        (Priority.SPAM, ["spam-1", "spam-2"]),
+        (Priority.BATCH, ["daily-1", "daily-2"]),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_interactive_summaries_skip_the_batch_wait(fake_llm):
+    # Long enough that waiting it out would time the test out
+    batcher = SummaryBatcher(max_tokens=1000, wait=60)
+
+    with llm_priority(Priority.INTERACTIVE):
+        summary = await asyncio.wait_for(
+            batcher.summarize("now@g.us", "Now", transcript(100)), timeout=1
+        )
+
+    assert summary.output == "summary of Now"
+    assert fake_llm.single == ["Now"] and not fake_llm.batched
+    assert batcher.stats()["single_calls"] == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_falls_back_to_one_call_per_group(fake_llm):
+    fake_llm.fail_batches = True
+    batcher = SummaryBatcher(max_tokens=1000, wait=0.01)
+
+    results = await asyncio.gather(
+        batcher.summarize("a@g.us", "A", transcript(100)),
+        batcher.summarize("b@g.us", "B", transcript(100)),
+    )
+
+    assert [r.output for r in results] == ["summary of A", "summary of B"]
+    assert sorted(fake_llm.single) == ["A", "B"]
+    assert batcher.stats()["fallbacks"] == 2
+    assert batcher.stats()["calls_saved"] == 0
+
+
+@pytest.mark.asyncio
+async def test_batching_can_be_disabled(fake_llm):
+    batcher = SummaryBatcher(max_tokens=0)
+
+    await asyncio.gather(
+        batcher.summarize("a@g.us", "A", transcript(10)),
+        batcher.summarize("b@g.us", "B", transcript(10)),
+    )
+
+    assert sorted(fake_llm.single) == ["A", "B"] and not fake_llm.batched
+
+
+@pytest.fixture
+def test_model():
+    def configure(output):
+        model = TestModel(custom_output_args=output)
+        agent_registry.configure(model)
+        return model
+
+    yield configure
+    agent_registry.configure()
+
+
+@pytest.mark.asyncio
+async def test_batched_answer_must_cover_every_group(test_model):
+    groups = [("a@g.us", "A", "hi"), ("b@g.us", "B", "yo")]
+    test_model([{"group_jid": "a@g.us", "summary": "about A"}])
+    with pytest.raises(UnexpectedModelBehavior):
+        await agent_registry.run(
+            "summarize_batch", "transcripts", deps=["a@g.us", "b@g.us"]
+        )
+
+    test_model(
+        [
+            {"group_jid": "a@g.us", "summary": "about A"},
+            {"group_jid": "b@g.us", "summary": "about B"},
+        ]
+    )
+    result = await llm.summarize_batch(groups)
+    assert {s.group_jid: s.summary for s in result.output} == {
+        "a@g.us": "about A",
+        "b@g.us": "about B",
+    }
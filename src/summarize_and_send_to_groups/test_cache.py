@@ -0,0 +1,95 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+
+from models import Group
+from summarize_and_send_to_groups import llm, summarize_group
+from summarize_and_send_to_groups.cache import SummaryCache
+from summarize_and_send_to_groups.test_partials import (  # noqa
+    BOT_JID,
+    GROUP_JID,
+    fake_llm,
+    seeded_messages,
+)
+from test_utils.database import db_session, seed_group_messages  # noqa
+
+
+@pytest.mark.asyncio
+async def test_repeat_triggers_reuse_or_extend_the_cached_summary(db_session, fake_llm):
+    now = datetime.now(timezone.utc)
+    since = now - timedelta(hours=2)
+    await seed_group_messages(db_session, GROUP_JID, since, now, range(31, 91))
+    group = await db_session.get(Group, GROUP_JID)
+    cache = SummaryCache()
+
+    first = await cache.summarize(db_session, group, BOT_JID, 5)
+    assert first == "summary of 60 messages"
+
+    # Nothing new: no LLM call at all
+    assert await cache.summarize(db_session, group, BOT_JID, 5) == first
+    assert len(fake_llm.whole) == 1 and not fake_llm.parts
+
+    # Only the new messages are summarized, and merged with the previous summary
+    await asyncio.sleep(0.05)
+    await seed_group_messages(
+        db_session,
+        GROUP_JID,
+        since,
+        datetime.now(timezone.utc),
+        range(5),
+        step=timedelta(milliseconds=1),
+        prefix="late",
+    )
+    second = await cache.summarize(db_session, group, BOT_JID, 5)
+    assert second != first
+    assert len(fake_llm.whole) == 1
+    assert [seeded_messages(part) for part in fake_llm.parts] == [5]
+    assert fake_llm.combined[-1].split("\n\n---\n\n") == ["notes on 5 messages", first]
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["deltas"], stats["misses"]) == (1, 1, 1)
+    assert stats["tokens_saved"] > 0
+    assert stats["messages_skipped"] == 60
+
+
+@pytest.mark.asyncio
+async def test_secret_word_during_the_daily_run_shares_its_summary(
+    db_session, fake_llm, monkeypatch
+):
+    now = datetime.now(timezone.utc)
+    await seed_group_messages(
+        db_session, GROUP_JID, now - timedelta(hours=2), now, range(31, 91)
+    )
+    group = await db_session.get(Group, GROUP_JID)
+    started, release = asyncio.Event(), asyncio.Event()
+
+    def gated(fn):
+        async def call(*args):
+            started.set()
+            await release.wait()
+            return await fn(*args)
+
+        return call
+
+    monkeypatch.setattr(llm, "summarize", gated(llm.summarize))
+    monkeypatch.setattr(llm, "summarize_batch", gated(llm.summarize_batch))
+    whatsapp = SimpleNamespace(
+        get_my_jid=AsyncMock(
+            return_value=SimpleNamespace(normalize_str=lambda: BOT_JID)
+        )
+    )
+
+    daily = asyncio.create_task(summarize_group(db_session, whatsapp, group))
+    await started.wait()
+    immediate = asyncio.create_task(
+        SummaryCache().summarize(db_session, group, BOT_JID, 5)
+    )
+    await asyncio.sleep(0.05)  # joins the daily run
+    release.set()
+
+    assert await immediate == "summary of 60 messages"
+    assert "summary of 60 messages" in await daily
+    assert len(fake_llm.whole) + len(fake_llm.batched) == 1
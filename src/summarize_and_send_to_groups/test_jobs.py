@@ -0,0 +1,129 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import asyncio
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlmodel import func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from models import SummaryJob
+from summarize_and_send_to_groups.jobs import SummaryJobRunner
+from summarize_and_send_to_groups.test_partials import BOT_JID, GROUP_JID, fake_llm  # noqa
+from test_utils.database import TEST_DB_URI, db_session, seed_group_messages  # noqa
+
+
+class FakeWhatsApp:
+    def __init__(self):
+        self.sent = []
+
+    async def get_my_jid(self):
+        return SimpleNamespace(normalize_str=lambda: BOT_JID)
+
+    async def send_message(self, request):
+        self.sent.append(request)
+
+
+@pytest.mark.asyncio
+async def test_secret_word_job_reports_progress(db_session, fake_llm):
+    now = datetime.now(timezone.utc)
+    await seed_group_messages(
+        db_session, GROUP_JID, now - timedelta(hours=2), now, range(1, 21)
+    )
+
+    def session_factory():
+        # Sessions on the test's connection, so they see its uncommitted rows
+        return AsyncSession(
+            bind=db_session.bind,
+            join_transaction_mode="create_savepoint",
+            expire_on_commit=False,
+        )
+
+    whatsapp = FakeWhatsApp()
+    runner = SummaryJobRunner(session_factory, whatsapp, "972500000099", concurrency=1)
+
+    job = await runner.submit("972500000002@s.whatsapp.net")
+    assert job.status == "pending"
+    # A second trigger while the first is pending gets the same job
+    assert (await runner.submit("972500000003@s.whatsapp.net")).id == job.id
+
+    await runner.run_job(job.id)
+
+    db_session.expunge_all()
+    job = await db_session.get(SummaryJob, job.id)
+    assert job.status == "succeeded"
+    assert job.groups_total >= 1
+    assert job.groups_done == job.groups_total
+    assert job.groups_summarized >= 1
+    assert job.finished_at is not None
+    [sent] = whatsapp.sent
+    assert "summary of 20 messages" in sent.message
+    assert runner.stats()["reused"] == 1
+
+
+@pytest_asyncio.fixture(loop_scope="function")
+async def committing_session_factory():
+    """Sessions that really commit, for runners racing on separate connections"""
+    if not TEST_DB_URI:
+        pytest.skip("TEST_DB_URI is not set")
+    engine = create_async_engine(
+        TEST_DB_URI.replace("postgresql://", "postgresql+asyncpg://", 1)
+    )
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with factory() as session:
+        first_id = (await session.exec(select(func.max(SummaryJob.id)))).one() or 0
+    try:
+        yield factory
+    finally:
+        async with factory() as session:
+            await session.exec(delete(SummaryJob).where(SummaryJob.id > first_id))
+            await session.commit()
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_triggers_create_one_job(committing_session_factory):
+    runners = [
+        SummaryJobRunner(committing_session_factory, FakeWhatsApp(), "972500000099")
+        for _ in range(5)
+    ]
+
+    jobs = await asyncio.gather(*(runner.submit() for runner in runners))
+
+    assert len({job.id for job in jobs}) == 1
+    assert sum(runner.stats()["submitted"] for runner in runners) == 1
+
+
+@pytest.mark.asyncio
+async def test_unrunnable_jobs_are_failed(committing_session_factory):
+    factory = committing_session_factory
+    previous = SummaryJobRunner(factory, FakeWhatsApp(), "972500000099")
+    orphan = await previous.submit()
+
+    # A restarted app fails the job its previous run had queued
+    runner = SummaryJobRunner(factory, FakeWhatsApp(), "972500000099")
+    runner.start()
+    try:
+        for _ in range(100):
+            async with factory() as session:
+                if (await session.get(SummaryJob, orphan.id)).status == "failed":
+                    break
+            await asyncio.sleep(0.02)
+    finally:
+        await runner.stop()
+
+    # Stopping fails the jobs still queued, so the next trigger gets a new one
+    queued = await previous.submit()
+    assert queued.id != orphan.id
+    await previous.stop()
+    async with factory() as session:
+        for job_id, error in [
+            (orphan.id, "Interrupted by restart"),
+            (queued.id, "Interrupted by shutdown"),
+        ]:
+            job = await session.get(SummaryJob, job_id)
+            assert (job.status, job.error) == ("failed", error)
+    assert (await previous.submit()).id not in (orphan.id, queued.id)
@@ -0,0 +1,96 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from models import Group
+from summarize_and_send_to_groups import llm
+from summarize_and_send_to_groups.batching import summary_batcher
+from summarize_and_send_to_groups.partials import (
+    load_partials,
+    roll_up_group,
+    summarize_window,
+)
+from test_utils.database import db_session, seed_group_messages  # noqa
+
+GROUP_JID = "120363000000000001@g.us"
+BOT_JID = "972500000000@s.whatsapp.net"
+
+
+def seeded_messages(transcript: str) -> int:
+    return transcript.count("hello ")
+
+
+def result(data: str):
+    usage = SimpleNamespace(request_tokens=None, response_tokens=None)
+    return SimpleNamespace(output=data, usage=lambda: usage)
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    calls = SimpleNamespace(whole=[], parts=[], combined=[], batched=[])
+
+    async def fake_summarize(group_name, transcript):
+        calls.whole.append(transcript)
+        return result(f"summary of {seeded_messages(transcript)} messages")
+
+    async def fake_summarize_part(group_name, transcript):
+        calls.parts.append(transcript)
+        return result(f"notes on {seeded_messages(transcript)} messages")
+
+    async def fake_combine(group_name, partials, final):
+        calls.combined.append(partials)
+        return result(f"summary {len(calls.combined)}")
+
+    async def fake_summarize_batch(groups):
+        calls.batched.append(groups)
+        output = [
+            llm.GroupSummary(
+                group_jid=jid,
+                summary=f"summary of {seeded_messages(transcript)} messages",
+            )
+            for jid, _, transcript in groups
+        ]
+        return SimpleNamespace(output=output, usage=result("").usage)
+
+    monkeypatch.setattr(llm, "summarize", fake_summarize)
+    monkeypatch.setattr(llm, "summarize_part", fake_summarize_part)
+    monkeypatch.setattr(llm, "combine_summaries", fake_combine)
+    monkeypatch.setattr(llm, "summarize_batch", fake_summarize_batch)
+    summary_batcher.configure(max_tokens=20_000, wait=0.01)
+    yield calls
+    summary_batcher.configure(max_tokens=20_000, wait=0.5)
+
+
+@pytest.mark.asyncio
+async def test_summary_merges_partials_with_unsummarized_tail(db_session, fake_llm):
+    now = datetime.now(timezone.utc)
+    # One message a minute from 90 to 31 minutes ago
+    await seed_group_messages(
+        db_session, GROUP_JID, now - timedelta(hours=2), now, range(31, 91)
+    )
+    group = await db_session.get(Group, GROUP_JID)
+
+    partial = await roll_up_group(
+        db_session, group, BOT_JID, now - timedelta(minutes=60), 10
+    )
+    assert partial.message_count == 30
+    assert partial.start_time == group.last_summary_sync.astimezone()
+    # Nothing new before the cutoff
+    assert (
+        await roll_up_group(db_session, group, BOT_JID, now - timedelta(minutes=60), 10)
+        is None
+    )
+    chain = await load_partials(db_session, GROUP_JID, partial.start_time)
+    assert [p.id for p in chain] == [partial.id]
+
+    fake_llm.parts.clear()
+    run = await summarize_window(db_session, group, BOT_JID, None, 15)
+
+    assert run.messages == 60
+    # Only the 30 messages after the partial were read and summarized again
+    assert [seeded_messages(part) for part in fake_llm.parts] == [30]
+    assert fake_llm.combined[-1].split("\n\n---\n\n") == [
+        "notes on 30 messages",
+        partial.text,
+    ]
@@ -0,0 +1,169 @@
+import asyncio
+import re
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from models import TranscriptLine
+from summarize_and_send_to_groups import llm
+from summarize_and_send_to_groups.pipeline import (
+    SummaryPipeline,
+    chunk_transcript,
+    estimate_tokens,
+    pack_parts,
+)
+
+START = datetime(2025, 1, 1, 12, tzinfo=timezone.utc)
+
+
+async def transcript(times: list[datetime], text: str = "x" * 30):
+    for i, timestamp in enumerate(times):
+        yield TranscriptLine(
+            timestamp, f"97250000{i:04d}@s.whatsapp.net", f"#{i} {text}"
+        )
+
+
+def message_ids(chunk: str) -> list[str]:
+    return re.findall(r"#(\d+) ", chunk)
+
+
+def minutes(n: int) -> list[datetime]:
+    return [START + timedelta(minutes=i) for i in range(n)]
+
+
+def result(data: str, request_tokens: int | None = None):
+    usage = SimpleNamespace(request_tokens=request_tokens, response_tokens=None)
+    return SimpleNamespace(output=data, usage=lambda: usage)
+
+
+@pytest.mark.asyncio
+async def test_chunks_respect_token_budget_and_overlap():
+    chunks, count = await chunk_transcript(transcript(minutes(100)), 500, overlap=3)
+
+    assert count == 100
+    assert len(chunks) > 1
+    assert all(estimate_tokens(chunk) <= 500 for chunk in chunks)
+    # A chunk cut mid-conversation repeats the previous chunk's last messages
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert message_ids(chunk)[:3] == message_ids(previous)[-3:]
+
+
+@pytest.mark.asyncio
+async def test_chunks_split_at_quiet_gaps_without_overlap():
+    times = minutes(20) + [START + timedelta(hours=5, minutes=i) for i in range(20)]
+
+    chunks, count = await chunk_transcript(transcript(times), 800, overlap=3)
+
+    assert count == 40
+    assert [len(message_ids(chunk)) for chunk in chunks] == [20, 20]
+
+
+@pytest.mark.asyncio
+async def test_small_gaps_do_not_fragment_chunks():
+    times = [START + timedelta(hours=3 * i) for i in range(10)]
+
+    chunks, _ = await chunk_transcript(transcript(times), 1000)
+
+    assert len(chunks) == 1
+
+
+def test_pack_parts_always_shrinks():
+    parts = ["y" * 3000] * 5  # each part alone exceeds the budget
+
+    batches = pack_parts(parts, 100)
+
+    assert 1 < len(batches) < len(parts)
+    assert sum(batch.count("y" * 3000) for batch in batches) == 5
+
+
+@pytest.mark.asyncio
+async def test_short_transcript_is_summarized_in_one_call(monkeypatch):
+    calls = []
+
+    async def fake_summarize(group_name, text):
+        calls.append(text)
+        return result("summary", request_tokens=42)
+
+    monkeypatch.setattr(llm, "summarize", fake_summarize)
+    pipeline = SummaryPipeline(chunk_tokens=10_000)
+
+    run = await pipeline.summarize("group", transcript(minutes(20)), min_messages=15)
+
+    assert run.text == "summary"
+    assert len(calls) == 1
+    assert [(s.name, s.calls, s.input_tokens) for s in run.stages] == [
+        ("summarize", 1, 42)
+    ]
+    assert (
+        await pipeline.summarize("group", transcript(minutes(10)), min_messages=15)
+        is None
+    )
+
+
+@pytest.mark.asyncio
+async def test_long_transcript_is_mapped_in_parallel_then_reduced(monkeypatch):
+    running = 0
+    peak = 0
+    reduced = []
+
+    async def fake_summarize_part(group_name, text):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return result("p" * 300)
+
+    async def fake_combine(group_name, partials, final):
+        reduced.append(final)
+        return result("final" if final else "m" * 300)
+
+    monkeypatch.setattr(llm, "summarize_part", fake_summarize_part)
+    monkeypatch.setattr(llm, "combine_summaries", fake_combine)
+    pipeline = SummaryPipeline(chunk_tokens=300, overlap=0, fan_out=3)
+
+    run = await pipeline.summarize("group", transcript(minutes(200)))
+
+    assert run.text == "final"
+    assert run.messages == 200
+    assert peak == 3
+    assert run.stages[0].name == "map" and run.stages[0].calls == run.chunks
+    # Partials too long for one prompt are merged over several levels
+    levels = run.stages[1:]
+    assert [s.name for s in levels] == ["reduce"] * len(levels) and len(levels) > 1
+    assert sum(s.calls for s in levels) == len(reduced)
+    assert levels[-1].calls == 1 and reduced[-1] and not any(reduced[:-1])
+    assert pipeline.stats()["stages"]["map"]["calls"] == run.chunks
+
+
+@pytest.mark.asyncio
+async def test_notes_are_merged_without_rereading_messages(monkeypatch):
+    combined = []
+
+    async def fake_summarize_part(group_name, text):
+        return result(f"notes on {len(message_ids(text))}")
+
+    async def fake_combine(group_name, partials, final):
+        combined.append((partials, final))
+        return result("final")
+
+    monkeypatch.setattr(llm, "summarize_part", fake_summarize_part)
+    monkeypatch.setattr(llm, "combine_summaries", fake_combine)
+    pipeline = SummaryPipeline(chunk_tokens=10_000)
+
+    notes = await pipeline.take_notes("group", transcript(minutes(40)), min_messages=15)
+    assert notes.text == "notes on 40"
+    assert [s.name for s in notes.stages] == ["map"]
+
+    # Too few new messages alone, but enough with the noted ones
+    run = await pipeline.summarize(
+        "group",
+        transcript(minutes(5)),
+        min_messages=15,
+        notes=[notes.text],
+        noted_messages=notes.messages,
+    )
+    assert run.text == "final"
+    assert run.messages == 45
+    assert combined == [("notes on 5\n\n---\n\nnotes on 40", True)]
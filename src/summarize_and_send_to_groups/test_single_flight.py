@@ -0,0 +1,109 @@
+import asyncio
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from summarize_and_send_to_groups.single_flight import SingleFlight
+from test_utils.database import TEST_DB_URI
+
+
+def unconnected_session() -> AsyncSession:
+    # Runs that don't query never connect
+    return AsyncSession(create_async_engine("postgresql+asyncpg://"))
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_with_the_same_key_share_one_run():
+    flights = SingleFlight()
+    calls = []
+
+    async def summarize(key):
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        return f"summary of {key}"
+
+    session = unconnected_session()
+    results = await asyncio.gather(
+        *(flights.do("group-a", session, lambda _: summarize("a")) for _ in range(5)),
+        flights.do("group-b", session, lambda _: summarize("b")),
+    )
+
+    assert results == ["summary of a"] * 5 + ["summary of b"]
+    assert sorted(calls) == ["a", "b"]
+    assert flights.stats()["shared"] == 4
+    assert flights.stats()["in_flight"] == 0
+
+    # Once finished, the next call runs again
+    await flights.do("group-a", session, lambda _: summarize("a"))
+    assert calls.count("a") == 2
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_the_shared_run():
+    flights = SingleFlight()
+    release = asyncio.Event()
+
+    first_session = unconnected_session()
+    run_sessions = []
+
+    async def summarize(session):
+        run_sessions.append(session)
+        await release.wait()
+        return "summary"
+
+    first = asyncio.create_task(flights.do("group", first_session, summarize))
+    second = asyncio.create_task(flights.do("group", unconnected_session(), summarize))
+    await asyncio.sleep(0)
+    first.cancel()
+    release.set()
+
+    assert await second == "summary"
+    with pytest.raises(asyncio.CancelledError):
+        await first
+    # The run didn't use the session of the caller that went away
+    assert len(run_sessions) == 1
+    assert run_sessions[0] is not first_session
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not TEST_DB_URI, reason="TEST_DB_URI is not set")
+async def test_advisory_lock_serializes_runs_across_workers():
+    engine = create_async_engine(
+        TEST_DB_URI.replace("postgresql://", "postgresql+asyncpg://", 1)
+    )
+    # Two workers, each with its own process-local state
+    workers = [
+        SingleFlight(engine, poll_interval=0.01),
+        SingleFlight(engine, poll_interval=0.01),
+    ]
+    running = 0
+    overlapped = False
+    pooled = []
+
+    async def summarize(session):
+        nonlocal running, overlapped
+        running += 1
+        overlapped |= running > 1
+        # The lock isn't holding a connection from the pool
+        pooled.append(engine.pool.checkedout())
+        await asyncio.sleep(0.05)
+        running -= 1
+        return "summary"
+
+    try:
+        results = await asyncio.gather(
+            *(
+                worker.do("daily:group", AsyncSession(engine), summarize)
+                for worker in workers
+            )
+        )
+    finally:
+        for worker in workers:
+            await worker.close()
+        await engine.dispose()
+
+    assert results == ["summary", "summary"]
+    assert not overlapped
+    assert pooled == [0, 0]
+    assert sum(worker.lock_waits for worker in workers) == 1
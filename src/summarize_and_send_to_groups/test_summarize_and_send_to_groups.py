@@ -0,0 +1,54 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+
+import summarize_and_send_to_groups
+from models import Group
+from summarize_and_send_to_groups import summarize_groups
+
+
+@pytest.mark.asyncio
+async def test_summarize_groups_bounds_parallelism_and_isolates_failures(monkeypatch):
+    sessions = []
+
+    @asynccontextmanager
+    async def session_factory():
+        session = object()
+        sessions.append(session)
+        yield session
+
+    running = 0
+    peak = 0
+    seen_sessions = set()
+
+    async def fake_summarize_group(session, whatsapp, group):
+        nonlocal running, peak
+        seen_sessions.add(id(session))
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        if group.group_name == "broken":
+            raise RuntimeError("LLM unavailable")
+        return group.group_name
+
+    monkeypatch.setattr(
+        summarize_and_send_to_groups, "summarize_group", fake_summarize_group
+    )
+    groups = [
+        Group.model_validate(
+            {
+                "group_jid": f"12036300000000{i}@g.us",
+                "group_name": "broken" if i == 3 else f"g{i}",
+            }
+        )
+        for i in range(10)
+    ]
+
+    summaries = await summarize_groups(session_factory, None, groups, concurrency=3)
+
+    assert peak == 3
+    assert summaries == [f"g{i}" for i in range(10) if i != 3]
+    # Every group got its own session
+    assert len(seen_sessions) == len(sessions) == 10
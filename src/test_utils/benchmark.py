@@ -0,0 +1,71 @@
+import timeit
+import tracemalloc
+from typing import Any, Callable, Dict
+
+import pytest
+
+
+def bench(
+    fn: Callable[..., Any], *args: Any, number: int = 2000, repeat: int = 5
+) -> float:
+    """Best-of-`repeat` cost of one `fn(*args)` call, in microseconds"""
+    return (
+        min(timeit.repeat(lambda: fn(*args), number=number, repeat=repeat))
+        / number
+        * 1e6
+    )
+
+
+def allocations(
+    fn: Callable[..., Any], *args: Any, number: int = 100
+) -> Dict[str, float]:
+    """
+    Memory blocks and bytes allocated per `fn(*args)` call, as seen by tracemalloc.
+    "kept" counts what the results hold on to; "peak" includes temporaries.
+    """
+    fn(*args)  # Warm up caches so they don't count against the call
+    tracemalloc.start()
+    try:
+        baseline, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        fn(*args)
+        _, peak = tracemalloc.get_traced_memory()
+
+        before = tracemalloc.take_snapshot()
+        results = [fn(*args) for _ in range(number)]
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    kept = [s for s in after.compare_to(before, "filename") if s.size_diff > 0]
+    del results
+    return {
+        "kept_blocks": sum(s.count_diff for s in kept) / number,
+        "kept_bytes": sum(s.size_diff for s in kept) / number,
+        "peak_bytes": peak - baseline,
+    }
+
+
+class Benchmark:
+    """
+    Minimal stand-in for pytest-benchmark's `benchmark` fixture: call it with a
+    function and its arguments to run and time it. Timing (µs per call) and
+    allocation figures end up in `stats` and are printed with `-s`.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.stats: Dict[str, float] = {}
+
+    def __call__(self, fn: Callable[..., Any], *args: Any, number: int = 2000) -> Any:
+        self.stats = {"us_per_call": bench(fn, *args, number=number)}
+        self.stats.update(allocations(fn, *args))
+        print(
+            f"\n{self.name}: "
+            + ", ".join(f"{k}={v:.1f}" for k, v in self.stats.items())
+        )
+        return fn(*args)
+
+
+@pytest.fixture
+def benchmark(request: pytest.FixtureRequest) -> Benchmark:
+    return Benchmark(request.node.name)
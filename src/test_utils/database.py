@@ -0,0 +1,83 @@
+import os
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+# A Postgres database migrated to head, for tests that need real queries
+TEST_DB_URI = os.environ.get("TEST_DB_URI", "")
+
+
+@pytest_asyncio.fixture(loop_scope="function")
+async def db_session():
+    """
+    Session on TEST_DB_URI inside a transaction that is rolled back afterwards.
+    Commits made by the code under test only release savepoints.
+    """
+    if not TEST_DB_URI:
+        pytest.skip("TEST_DB_URI is not set")
+    engine = create_async_engine(
+        TEST_DB_URI.replace("postgresql://", "postgresql+asyncpg://", 1)
+    )
+    try:
+        async with engine.connect() as conn:
+            transaction = await conn.begin()
+            session = AsyncSession(
+                bind=conn,
+                join_transaction_mode="create_savepoint",
+                expire_on_commit=False,
+            )
+            try:
+                yield session
+            finally:
+                await session.close()
+                await transaction.rollback()
+    finally:
+        await engine.dispose()
+
+
+async def seed_group_messages(
+    session: AsyncSession,
+    group_jid: str,
+    since: datetime,
+    end: datetime,
+    steps: range,
+    step: timedelta = timedelta(minutes=1),
+    prefix: str = "seed",
+) -> None:
+    """
+    Create a managed group last summarized at `since` (if missing), with one
+    message `i` steps before `end` for each i in `steps`.
+    """
+    await session.exec(
+        text(
+            "INSERT INTO sender (jid) VALUES ('972500000001@s.whatsapp.net') "
+            "ON CONFLICT DO NOTHING"
+        )
+    )
+    await session.exec(
+        text(
+            'INSERT INTO "group" (group_jid, group_name, managed, notify_on_spam, last_summary_sync) '
+            "VALUES (:jid, 'test', true, false, :since) ON CONFLICT DO NOTHING"
+        ),
+        params={"jid": group_jid, "since": since.astimezone().replace(tzinfo=None)},
+    )
+    await session.exec(
+        text(
+            "INSERT INTO message (message_id, timestamp, text, chat_jid, sender_jid, group_jid) "
+            "SELECT :prefix || i, CAST(:end AS timestamptz) - i * CAST(:step AS interval), "
+            "'hello ' || i, :jid, '972500000001@s.whatsapp.net', :jid "
+            "FROM generate_series(CAST(:first AS int), CAST(:last AS int)) i"
+        ),
+        params={
+            "prefix": prefix,
+            "end": end,
+            "step": step,
+            "jid": group_jid,
+            "first": steps.start,
+            "last": steps.stop - 1,
+        },
+    )
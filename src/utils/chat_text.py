@@ -1,13 +1,124 @@
-from typing import List
+from datetime import timedelta
+from typing import Dict, Iterable, List, Set
 
-from models import Message
+from models import Message, TranscriptLine
+from utils.tokens import estimate_tokens
 from whatsapp.jid import parse_jid
 
+LEGEND = "Senders (tag them as @number):"
 
-def chat2text(history: List[Message]) -> str:
-    return "\n".join(
-        [
-            f"{message.timestamp}: @{parse_jid(message.sender_jid).user}: {message.text}"
-            for message in history
+
+def chat_line(message: Message | TranscriptLine) -> str:
+    return f"{message.timestamp}: @{parse_jid(message.sender_jid).user}: {message.text}"
+
+
+def chat2text(history: Iterable[Message | TranscriptLine]) -> str:
+    return "\n".join(chat_line(message) for message in history)
+
+
+def _indent(text: str | None) -> str:
+    """Indent the continuation lines of a message's text"""
+    return (text or "").replace("\n", "\n  ")
+
+
+def sender_alias(index: int) -> str:
+    """A, B, ..., Z, AA, AB, ... for the index-th sender"""
+    alias = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        alias = chr(ord("A") + remainder) + alias
+    return alias
+
+
+class CompactTranscript:
+    """
+    Token-compact rendering of a transcript for prompts.
+
+    Messages are written oldest first. Senders get short aliases, mapped back
+    to their numbers (for tagging) by a legend on the first line. A day header
+    starts each date, and a turn only starts with its time when that falls in
+    a new `bucket`. Consecutive messages of a sender within the same bucket
+    are merged into one turn. Every line a turn continues on is indented, so
+    lines of a multi-line message can't pass for turns or day headers.
+
+    Lines can be added in any order; `tokens` is a conservative running
+    estimate of the rendered size, so callers can cut chunks without rendering.
+    """
+
+    def __init__(self, bucket: timedelta = timedelta(minutes=10)):
+        self.bucket = bucket
+        self.lines: List[TranscriptLine] = []
+        self._senders: Set[str] = set()
+        self._days: Set[str] = set()
+        self.tokens = estimate_tokens(LEGEND)
+
+    @staticmethod
+    def line_tokens(line: Message | TranscriptLine) -> int:
+        """Estimated tokens of a message's own turn, with its time and alias"""
+        return estimate_tokens(f"00:00 AB: {_indent(line.text)}\n")
+
+    def cost(self, line: Message | TranscriptLine) -> int:
+        """Estimated tokens `add` would add for a line"""
+        tokens = self.line_tokens(line)
+        if line.sender_jid not in self._senders:
+            tokens += estimate_tokens(f" AB=@{parse_jid(line.sender_jid).user},")
+        if self._day(line) not in self._days:
+            tokens += estimate_tokens(f"## {self._day(line)}\n")
+        return tokens
+
+    def add(self, line: Message | TranscriptLine) -> int:
+        """Add a line, returning its estimated tokens"""
+        tokens = self.cost(line)
+        self.lines.append(line)
+        self._senders.add(line.sender_jid)
+        self._days.add(self._day(line))
+        self.tokens += tokens
+        return tokens
+
+    @staticmethod
+    def _day(line: Message | TranscriptLine) -> str:
+        return line.timestamp.strftime("%a %Y-%m-%d %Z").rstrip()
+
+    def _bucket(self, line: Message | TranscriptLine) -> int:
+        return int(line.timestamp.timestamp() // self.bucket.total_seconds())
+
+    def render(self) -> str:
+        lines = sorted(self.lines, key=lambda line: line.timestamp)
+        aliases: Dict[str, str] = {}
+        for line in lines:
+            if line.sender_jid not in aliases:
+                aliases[line.sender_jid] = sender_alias(len(aliases))
+
+        out = [
+            LEGEND
+            + " "
+            + ", ".join(
+                f"{alias}=@{parse_jid(jid).user}" for jid, alias in aliases.items()
+            )
         ]
-    )
+        day = sender = bucket = None
+        for line in lines:
+            if self._day(line) != day:
+                day = self._day(line)
+                out.append(f"## {day}")
+                sender = bucket = None
+            text = _indent(line.text)
+            if line.sender_jid == sender and self._bucket(line) == bucket:
+                out.append(f"  {text}")
+                continue
+            turn = f"{aliases[line.sender_jid]}: {text}"
+            if self._bucket(line) != bucket:
+                bucket = self._bucket(line)
+                turn = f"{line.timestamp:%H:%M} {turn}"
+            sender = line.sender_jid
+            out.append(turn)
+        return "\n".join(out)
+
+
+def compact_chat2text(history: Iterable[Message | TranscriptLine]) -> str:
+    """Render a transcript with `CompactTranscript`, whatever the order of `history`"""
+    transcript = CompactTranscript()
+    for line in history:
+        transcript.add(line)
+    return transcript.render()
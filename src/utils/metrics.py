@@ -0,0 +1,39 @@
+import time
+from collections import deque
+from typing import Any, Dict
+
+
+class LatencyTracker:
+    """Keeps a rolling window of latency samples (in seconds) for metrics reporting."""
+
+    def __init__(self, window: int = 1000):
+        self._samples: deque[float] = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self._samples.append(seconds)
+        self.count += 1
+        self.total += seconds
+
+    def since(self, started: float) -> float:
+        """Record the time elapsed since a `time.perf_counter()` reading and return it."""
+        elapsed = time.perf_counter() - started
+        self.observe(elapsed)
+        return elapsed
+
+    def snapshot(self) -> Dict[str, Any]:
+        samples = sorted(self._samples)
+        if not samples:
+            return {"count": self.count}
+
+        def pct(p: float) -> float:
+            return samples[min(len(samples) - 1, int(p * len(samples)))]
+
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total / self.count * 1000, 3),
+            "p50_ms": round(pct(0.50) * 1000, 3),
+            "p95_ms": round(pct(0.95) * 1000, 3),
+            "max_ms": round(samples[-1] * 1000, 3),
+        }
@@ -0,0 +1,124 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+from models import TranscriptLine
+from utils.chat_text import (
+    CompactTranscript,
+    chat2text,
+    compact_chat2text,
+    sender_alias,
+)
+from utils.tokens import estimate_tokens
+
+START = datetime(2025, 1, 1, 23, 50, tzinfo=timezone.utc)
+
+PHRASES = [
+    "מישהו יודע מתי הפגישה מחר?",
+    "yes, 10am at the office",
+    "תודה!",
+    "I pushed the fix, can someone review?",
+    "👍",
+    "אני אבדוק את זה בערב ואחזור אליכם",
+    "lol",
+    "Did anyone try the new release? It broke the login flow for me",
+    "סגור",
+    "see the doc I shared yesterday, section 3",
+]
+
+
+def line(minute: int, sender: int, text: str) -> TranscriptLine:
+    return TranscriptLine(
+        START + timedelta(minutes=minute), f"97250000000{sender}@s.whatsapp.net", text
+    )
+
+
+def sample_transcript(seed: int, messages: int = 300) -> list[TranscriptLine]:
+    """A group chat with bursts of replies, a few busy senders and quiet hours"""
+    rng = random.Random(seed)
+    senders = [f"9725{rng.randrange(10**7, 10**8)}@s.whatsapp.net" for _ in range(12)]
+    weights = [1 / (i + 1) for i in range(len(senders))]
+    timestamp = START
+    sender = senders[0]
+    lines = []
+    for _ in range(messages):
+        timestamp += timedelta(
+            seconds=rng.expovariate(1 / 40)
+            if rng.random() < 0.9
+            else rng.uniform(1, 6) * 3600
+        )
+        if rng.random() < 0.6:
+            sender = rng.choices(senders, weights)[0]
+        lines.append(TranscriptLine(timestamp, sender, rng.choice(PHRASES)))
+    # The transcript query streams newest first
+    return lines[::-1]
+
+
+def test_sender_aliases():
+    assert [sender_alias(i) for i in (0, 1, 25, 26, 27, 701, 702)] == [
+        "A",
+        "B",
+        "Z",
+        "AA",
+        "AB",
+        "ZZ",
+        "AAA",
+    ]
+
+
+def test_compact_transcript_layout():
+    lines = [
+        line(0, 1, "msg 0"),
+        line(1, 1, "msg 1"),
+        line(2, 2, "msg 2"),
+        line(12, 1, "msg 3"),
+        line(13, 1, "msg 4"),
+        line(30, 3, "msg 5"),
+    ]
+
+    # Newest first in, oldest first out
+    assert compact_chat2text(reversed(lines)).splitlines() == [
+        "Senders (tag them as @number): A=@972500000001, B=@972500000002, C=@972500000003",
+        "## Wed 2025-01-01 UTC",
+        "23:50 A: msg 0",
+        "  msg 1",
+        "B: msg 2",
+        "## Thu 2025-01-02 UTC",
+        "00:02 A: msg 3",
+        "  msg 4",
+        "00:20 C: msg 5",
+    ]
+
+
+def test_multi_line_messages_are_indented():
+    lines = [
+        line(0, 1, "shopping list:\n## milk\nB: eggs"),
+        line(1, 1, "and\nbread"),
+        line(2, 2, "ok"),
+    ]
+
+    assert compact_chat2text(lines).splitlines()[1:] == [
+        "## Wed 2025-01-01 UTC",
+        "23:50 A: shopping list:",
+        "  ## milk",
+        "  B: eggs",
+        "  and",
+        "  bread",
+        "B: ok",
+    ]
+
+
+def test_token_estimate_is_conservative():
+    for seed in range(5):
+        transcript = CompactTranscript()
+        for message in sample_transcript(seed):
+            transcript.add(message)
+        assert estimate_tokens(transcript.render()) <= transcript.tokens
+
+
+def test_compact_format_saves_tokens():
+    for seed in range(5):
+        history = sample_transcript(seed)
+        full = estimate_tokens(chat2text(history))
+        compact = estimate_tokens(compact_chat2text(history))
+        print(f"sample {seed}: {full} -> {compact} tokens ({compact / full:.0%})")
+        assert compact < full * 0.5
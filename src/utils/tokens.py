@@ -0,0 +1,9 @@
+import math
+
+# Conservative for Hebrew and mixed-script chats, which tokenize worse than English
+CHARS_PER_TOKEN = 3
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count of a prompt, without calling a tokenizer"""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
@@ -3,13 +3,21 @@ from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncEngine
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from models import Group, BaseGroup, Sender, BaseSender, upsert
+from models import (
+    Group,
+    Sender,
+    OnConflict,
+    bulk_upsert,
+    known_jids,
+)
 from .client import WhatsAppClient
+from .jid import normalize_jid
 
 
 async def gather_groups(db_engine: AsyncEngine, client: WhatsAppClient):
     groups = await client.get_user_groups()
 
+    sender_jids, group_jids = [], []
     async with AsyncSession(db_engine) as session:
         try:
             if groups is None or groups.results is None:
@@ -17,33 +25,34 @@ async def gather_groups(db_engine: AsyncEngine, client: WhatsAppClient):
             for g in groups.results.data:
                 ownerUsr = g.OwnerPN or g.OwnerJID or None
                 if (await session.get(Sender, ownerUsr)) is None and ownerUsr:
-                    owner = Sender(
-                        **BaseSender(
-                            jid=ownerUsr,
-                        ).model_dump()
-                    )
-                    await upsert(session, owner)
+                    owner = Sender.model_validate({"jid": ownerUsr})
+                    await bulk_upsert(session, [owner], on_conflict=OnConflict.NOTHING)
+                if ownerUsr:
+                    sender_jids.append(normalize_jid(ownerUsr))
 
                 og = await session.get(Group, g.JID)
 
-                group = Group(
-                    **BaseGroup(
-                        group_jid=g.JID,
-                        group_name=g.Name,
-                        group_topic=g.Topic,
-                        owner_jid=ownerUsr,
-                        managed=og.managed if og else False,
-                        community_keys=og.community_keys if og else None,
-                        last_ingest=og.last_ingest if og else datetime.now(),
-                        last_summary_sync=og.last_summary_sync
+                group = Group.model_validate(
+                    {
+                        "group_jid": g.JID,
+                        "group_name": g.Name,
+                        "group_topic": g.Topic,
+                        "owner_jid": ownerUsr,
+                        "managed": og.managed if og else False,
+                        "last_summary_sync": og.last_summary_sync
                         if og
                         else datetime.now(),
-                        forward_url=og.forward_url if og else None,
-                        notify_on_spam=og.notify_on_spam if og else False,
-                    ).model_dump()
+                        "forward_url": og.forward_url if og else None,
+                        "notify_on_spam": og.notify_on_spam if og else False,
+                    }
                 )
-                await upsert(session, group)
+                await bulk_upsert(session, [group])
+                group_jids.append(group.group_jid)
             await session.commit()
         except Exception:
             await session.rollback()
             raise
+
+    # Warm the existence cache used by message storage
+    known_jids.add_senders(sender_jids)
+    known_jids.add_groups(group_jids)
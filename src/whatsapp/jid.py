@@ -1,7 +1,13 @@
+import sys
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Union
 from warnings import warn
 
+# JIDs repeat heavily (the same senders and groups on every message), so parsing
+# and normalizing are memoized; bounded by the number of distinct JIDs seen
+JID_CACHE_SIZE = 10_000
+
 
 class JIDParseError(Exception):
     """Exception raised for errors while parsing JIDs."""
@@ -9,7 +15,7 @@ class JIDParseError(Exception):
     pass
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class JID:
     user: str
     agent: int = 0
@@ -48,19 +54,22 @@ class JID:
 
 
 def new_ad_jid(user: str, agent: int, device: int) -> JID:
-    return JID(user=user, agent=agent, device=device, server=DefaultUserServer, ad=True)
+    return JID(
+        user=sys.intern(user),
+        agent=agent,
+        device=device,
+        server=DefaultUserServer,
+        ad=True,
+    )
 
 
 def parse_ad_jid(user: str) -> JID:
-    full_jid = JID(user="", ad=True, server=DefaultUserServer)
     dot_index = user.find(".")
     colon_index = user.find(":")
 
     if dot_index < 0 or colon_index < 0 or colon_index + 1 <= dot_index:
         raise JIDParseError("failed to parse ADJID: missing separators") from None
 
-    full_jid.user = user[:dot_index]
-
     try:
         agent = int(user[dot_index + 1 : colon_index])
         if agent < 0 or agent > 255:
@@ -71,12 +80,12 @@ def parse_ad_jid(user: str) -> JID:
     except ValueError as err:
         raise JIDParseError(f"failed to parse agent/device from JID: {err}") from err
 
-    full_jid.agent = agent
-    full_jid.device = device
-    return full_jid
+    return new_ad_jid(user[:dot_index], agent, device)
 
 
+@lru_cache(maxsize=JID_CACHE_SIZE)
 def parse_jid(jid: str) -> JID:
+    """Parse a JID string. Results are cached and shared, which is safe as JIDs are immutable."""
     parts = jid.split("@")
     if len(parts) == 1:
         if not parts[0].isnumeric():
@@ -92,10 +101,12 @@ def parse_jid(jid: str) -> JID:
 
 
 def new_jid(user: str, server: str) -> JID:
-    return JID(user=user, server=server)
+    return JID(user=sys.intern(user), server=sys.intern(server))
 
 
+@lru_cache(maxsize=JID_CACHE_SIZE)
 def normalize_jid(jid: Union[JID, str]) -> str:
+    """Normalized (non-AD) string form of a JID, interned so repeats share one string"""
     if isinstance(jid, str):
         try:
             pjid = parse_jid(jid)
@@ -104,7 +115,7 @@ def normalize_jid(jid: Union[JID, str]) -> str:
             return jid
         jid = pjid
 
-    return str(jid.to_non_ad())
+    return sys.intern(str(jid.to_non_ad()))
 
 
 # Known JID servers on WhatsApp
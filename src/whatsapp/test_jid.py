@@ -7,6 +7,7 @@ from whatsapp.jid import (
     normalize_jid,
     parse_jid,
 )
+from test_utils.benchmark import bench
 
 
 def test_jid_creation():
@@ -64,3 +65,81 @@ def test_invalid_jid():
 
     with pytest.raises(JIDParseError):
         parse_jid("1234567890.1:abc@s.whatsapp.net")
+
+
+def test_jid_is_immutable():
+    jid = parse_jid("1234567890@s.whatsapp.net")
+    with pytest.raises(AttributeError):
+        jid.user = "other"
+    assert not hasattr(jid, "__dict__")
+
+
+def realistic_jids(count: int) -> list[str]:
+    """`count` JIDs drawn from 50 senders (plain, AD and @lid forms) and 5 groups"""
+    senders = [f"97250{i:07d}" for i in range(50)]
+    forms = [
+        lambda u, i: f"{u}@s.whatsapp.net",
+        lambda u, i: f"{u}.0:{i % 4}@s.whatsapp.net",
+        lambda u, i: f"{u}@lid",
+        lambda u, i: f"1203630{i % 5:05d}-1600000000@g.us",
+    ]
+    return [forms[i % 4](senders[i % 50], i) for i in range(count)]
+
+
+def test_cached_parsing_matches_uncached():
+    for jid in set(realistic_jids(400)):
+        assert parse_jid(jid) == parse_jid.__wrapped__(jid)
+        assert normalize_jid(jid) == normalize_jid.__wrapped__(jid)
+
+
+def test_transcript_parses_each_sender_once():
+    from models import BaseMessage
+    from utils.chat_text import chat2text
+
+    messages = [
+        BaseMessage(
+            message_id=str(i),
+            text="hi",
+            chat_jid="120363000000-1600000000@g.us",
+            sender_jid=f"97250{i % 50:07d}@s.whatsapp.net",
+        )
+        for i in range(10_000)
+    ]
+    parse_jid.cache_clear()
+
+    chat2text(messages)
+
+    assert parse_jid.cache_info().misses == 50
+
+
+def test_repeated_jids_are_parsed_once():
+    jids = realistic_jids(10_000)
+    parse_jid.cache_clear()
+    normalize_jid.cache_clear()
+
+    normalized = [normalize_jid(jid) for jid in jids]
+
+    # Only the distinct JIDs are parsed; repeats share the cached objects
+    assert parse_jid.cache_info().misses == len(set(jids))
+    assert normalize_jid.cache_info().hits == len(jids) - len(set(jids))
+    hits = parse_jid.cache_info().hits
+    assert parse_jid(jids[0]) is parse_jid(jids[0])
+    assert parse_jid.cache_info().hits == hits + 2
+    assert normalize_jid(jids[0]) is normalized[0]
+
+
+def test_cached_parsing_benchmark():
+    jids = realistic_jids(10_000)
+
+    def uncached():
+        for jid in jids:
+            str(parse_jid.__wrapped__(jid).to_non_ad())
+
+    def cached():
+        for jid in jids:
+            normalize_jid(jid)
+
+    # Report only (run with -s)
+    before = bench(uncached, number=5, repeat=3)
+    after = bench(cached, number=5, repeat=3)
+    print(f"\nnormalize 10k JIDs: uncached {before:.0f}us, cached {after:.0f}us")